@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -34,6 +37,9 @@ INSTALLED_APPS = [
     'core',
     'user',
     'recipe',
+    'job',
+    'sync',
+    'batch',
     'rest_framework',
     'rest_framework.authtoken',
     'drf_spectacular',
@@ -46,7 +52,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so load balancer probes skip the rest of the stack.
+    'core.health.HealthCheckMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.compression.CompressionMiddleware',
+    'core.querycount.DuplicateQueryMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -79,16 +89,68 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connections are kept open per uWSGI worker for CONN_MAX_AGE seconds and
+# health checked before reuse, so requests skip the connect/auth handshake.
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASSWORD')
+        'PASSWORD': os.environ.get('DB_PASSWORD'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
     }
 }
 
+# Read replicas, e.g. DB_REPLICA_HOSTS=replica1,replica2. Safe requests of
+# the recipe API read from a healthy replica; tests mirror the primary.
+
+DATABASE_REPLICAS = []
+replica_hosts = os.environ.get('DB_REPLICA_HOSTS', '').split(',')
+for index, host in enumerate(filter(None, replica_hosts), 1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db.routers.PrimaryReplicaRouter']
+
+# Seconds a user's reads stay on the primary after they write.
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+# Seconds a replica health probe result is reused.
+REPLICA_HEALTH_CHECK_SECONDS = int(
+    os.environ.get('REPLICA_HEALTH_CHECK_SECONDS', 5)
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# The cache is shared by all uWSGI workers and the job worker: it holds
+# replica pins, idempotency locks, throttle buckets and the similarity
+# index versions, none of which work with a per-process cache.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.redis.RedisCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://redis:6379/0'),
+    }
+}
+if DATABASE_REPLICAS and CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    raise ImproperlyConfigured(
+        'DB_REPLICA_HOSTS needs a cache shared between workers to pin '
+        'reads after writes; LocMemCache is per process.'
+    )
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -129,6 +191,25 @@ MEDIA_URL = '/static/media/'
 
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
+# collectstatic adds hashed copies of the static files, which the proxy
+# caches for good; {% static %} links to them when DEBUG is off.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
+        ),
+    },
+}
+
+# Behind the nginx proxy, media bytes are sent by nginx from this internal
+# location after recipe.views.RecipeImageView checked ownership. On by
+# default in scripts/run.sh; runserver and tests stream the file instead.
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', '0') == '1'
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 3600
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -139,8 +220,124 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Proxies in front of uWSGI (nginx). Client IPs for throttling are
+    # read from X-Forwarded-For at this depth, so values a client puts
+    # in the header itself are ignored.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 1)),
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.UserBucketThrottle',
+        'core.throttling.ActionBucketThrottle',
+    ],
+}
+
+# Token buckets for API requests as (capacity, refill per second), kept in
+# the cache so all workers share them; None disables a scope. 'user' and
+# 'anon' apply to every request, the others to the actions that name them
+# (core.throttling.ActionBucketThrottle).
+API_THROTTLE_RATES = {
+    'user': (300, 5),
+    'anon': (60, 1),
+    'recipe_list': (60, 1),
+    'recipe_search': (30, 1 / 2),
+    'upload': (10, 1 / 6),
+    'batch': (10, 1 / 6),
+}
+
+# Auth tokens expire after this much inactivity. Usage is recorded at most
+# once per TOKEN_ACTIVITY_RESOLUTION seconds and written to the database in
+# batches every TOKEN_ACTIVITY_FLUSH_INTERVAL seconds per worker.
+TOKEN_IDLE_TIMEOUT = timedelta(
+    days=int(os.environ.get('TOKEN_IDLE_TIMEOUT_DAYS', 30))
+)
+TOKEN_ACTIVITY_RESOLUTION = 60
+TOKEN_ACTIVITY_FLUSH_INTERVAL = 60
+
+# Maximum number of recipes a single batch request may touch.
+RECIPE_BATCH_MAX_SIZE = int(os.environ.get('RECIPE_BATCH_MAX_SIZE', 500))
+# Maximum number of tags or ingredients added or removed in one batch or
+# merged in one request.
+RECIPE_BATCH_MAX_RELATED = int(
+    os.environ.get('RECIPE_BATCH_MAX_RELATED', 50)
+)
+
+# Number of users whose recipe similarity index is kept in memory per worker.
+SIMILARITY_INDEX_MAX_USERS = int(
+    os.environ.get('SIMILARITY_INDEX_MAX_USERS', 200)
+)
+
+# Rows deleted per transaction when purging deleted recipes and accounts.
+PURGE_CHUNK_SIZE = int(os.environ.get('PURGE_CHUNK_SIZE', 1000))
+# Chunks handled by one purge job before it queues a follow-up job.
+PURGE_JOB_MAX_CHUNKS = int(os.environ.get('PURGE_JOB_MAX_CHUNKS', 100))
+
+# POST /api/batch/ (core.subrequests): operations per call and the paths
+# they may target.
+BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', 20))
+BATCH_ALLOWED_PATHS = ('/api/recipe/', '/api/user/')
+
+# Delta sync (core.sync). Changes younger than SYNC_LAG are held back until
+# transactions stamped before them have committed. Tombstones are kept for
+# SYNC_TOMBSTONE_RETENTION; older cursors have to sync from scratch.
+SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', 200))
+SYNC_MAX_PAGE_SIZE = 1000
+SYNC_LAG = timedelta(seconds=int(os.environ.get('SYNC_LAG_SECONDS', 5)))
+SYNC_TOMBSTONE_RETENTION = timedelta(
+    days=int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+)
+
+# Background jobs (core.jobs, run with `manage.py run_worker`).
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+# Retry delay in seconds, doubled after every failed attempt up to the max.
+JOB_RETRY_BACKOFF = int(os.environ.get('JOB_RETRY_BACKOFF', 10))
+JOB_RETRY_BACKOFF_MAX = int(os.environ.get('JOB_RETRY_BACKOFF_MAX', 3600))
+# Running jobs not finished after this many seconds are handed out again.
+JOB_LOCK_TIMEOUT = int(os.environ.get('JOB_LOCK_TIMEOUT', 600))
+JOB_WORKER_CONCURRENCY = int(os.environ.get('JOB_WORKER_CONCURRENCY', 4))
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1))
+
+# Token buckets for POST /api/user/token/ as (capacity, refill per second).
+LOGIN_THROTTLE_RATES = {
+    'email': (5, 1 / 60),
+    'ip': (30, 1 / 2),
 }
 
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
-}
\ No newline at end of file
+}
+
+# Deployed code version; keys the cached OpenAPI schema (core.schema).
+# When unset the key is derived from the source files.
+APP_VERSION = os.environ.get('APP_VERSION', '')
+SCHEMA_CACHE_DIR = os.environ.get('SCHEMA_CACHE_DIR', '/vol/web/schema')
+SCHEMA_CACHE_MAX_AGE = int(os.environ.get('SCHEMA_CACHE_MAX_AGE', 300))
+
+# Requests running the same SQL statement shape more than this many times
+# are logged by core.querycount.DuplicateQueryMiddleware (DEBUG only).
+QUERY_DUPLICATE_THRESHOLD = int(os.environ.get('QUERY_DUPLICATE_THRESHOLD', 5))
+
+# Response compression (core.compression). Bodies below the minimum size
+# are sent as is; levels trade CPU per response against bytes on the wire,
+# see `manage.py benchmark_compression`.
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 5))
+COMPRESSION_BROTLI_QUALITY = int(
+    os.environ.get('COMPRESSION_BROTLI_QUALITY', 5)
+)
+
+# Idempotency-Key handling (core.idempotency): responses are replayed for
+# IDEMPOTENCY_TTL seconds; a duplicate waits up to IDEMPOTENCY_WAIT_SECONDS
+# for the request holding the key, whose lock expires after
+# IDEMPOTENCY_LOCK_SECONDS should its worker die.
+IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 24 * 60 * 60))
+IDEMPOTENCY_WAIT_SECONDS = 10
+IDEMPOTENCY_LOCK_SECONDS = 60
+
+# Seconds wait_for_db keeps retrying before failing the startup.
+DB_WAIT_TIMEOUT = float(os.environ.get('DB_WAIT_TIMEOUT', 60))
+
+# Seconds a /readyz database ping result is reused (core.health).
+READINESS_CACHE_SECONDS = float(os.environ.get('READINESS_CACHE_SECONDS', 2))
+
+# Prime URL patterns, serializers, DB connections and the schema in each
+# worker when the WSGI application loads (core.warmup).
+WARMUP_ON_START = os.environ.get('WARMUP_ON_START', '1') == '1'
\ No newline at end of file
@@ -14,20 +14,42 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularSwaggerView
 from django.contrib import admin
-from django.urls import path, include
-from django.conf.urls.static import static
+from django.urls import path, re_path, include
 from django.conf import settings
+from core.views import (
+    CachedSchemaView, DatabaseConnectionStatsView, ThrottleStatsView,
+)
+from recipe.views import RecipeImageView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='api-schema'), name='api-docs'),
+    path('api/schema/', CachedSchemaView.as_view(), name='api-schema'),
+    path(
+        'api/docs/',
+        SpectacularSwaggerView.as_view(url_name='api-schema'),
+        name='api-docs',
+    ),
     path('api/user/', include('user.urls')),
-    path('api/recipe/', include('recipe.urls'))
+    path('api/recipe/', include('recipe.urls')),
+    path('api/job/', include('job.urls')),
+    path('api/sync/', include('sync.urls')),
+    path('api/batch/', include('batch.urls')),
+    path(
+        'api/internal/db-connections/',
+        DatabaseConnectionStatsView.as_view(),
+        name='db-connections',
+    ),
+    path(
+        'api/internal/throttles/',
+        ThrottleStatsView.as_view(),
+        name='throttles',
+    ),
+    # Media is served through an ownership check, also in DEBUG.
+    re_path(
+        rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.+)$",
+        RecipeImageView.as_view(),
+        name='media',
+    ),
 ]
-
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
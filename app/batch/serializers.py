@@ -0,0 +1,74 @@
+"""Serializers for batch API"""
+
+from django.conf import settings
+from rest_framework import serializers
+
+from core import subrequests
+
+
+class OperationSerializer(serializers.Serializer):
+    """One sub-request against the recipe or user API"""
+    method = serializers.ChoiceField(
+        choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE']
+    )
+    path = serializers.CharField(max_length=2048)
+    body = serializers.JSONField(required=False)
+    # Sub-request field name -> file part of the multipart batch request.
+    files = serializers.DictField(
+        child=serializers.CharField(), required=False
+    )
+    headers = serializers.DictField(
+        child=serializers.CharField(), required=False
+    )
+
+    def validate_path(self, value):
+        if not value.startswith('/'):
+            raise serializers.ValidationError('Must be an absolute path.')
+        return value
+
+    def validate(self, attrs):
+        uploads = self.context.get('files', {})
+        files = {}
+        for field, part in attrs.get('files', {}).items():
+            if part not in uploads:
+                raise serializers.ValidationError(
+                    {'files': f'No file part named {part!r}.'}
+                )
+            files[field] = uploads[part]
+        attrs['files'] = files
+        if files and not subrequests.is_form_data(attrs.get('body')):
+            raise serializers.ValidationError({'body': (
+                'With files, the body must map field names to plain '
+                'values or lists of plain values.'
+            )})
+        return attrs
+
+
+class BatchSerializer(serializers.Serializer):
+    """Ordered operations, optionally run in one transaction"""
+    operations = OperationSerializer(many=True)
+    atomic = serializers.BooleanField(default=False)
+
+    def validate_operations(self, value):
+        if not value:
+            raise serializers.ValidationError(
+                'At least one operation is required.'
+            )
+        if len(value) > settings.BATCH_MAX_OPERATIONS:
+            raise serializers.ValidationError(
+                f'At most {settings.BATCH_MAX_OPERATIONS} operations are '
+                'allowed.'
+            )
+        return value
+
+
+class OperationResultSerializer(serializers.Serializer):
+    status = serializers.IntegerField()
+    headers = serializers.DictField(child=serializers.CharField())
+    body = serializers.JSONField(allow_null=True)
+
+
+class BatchResultSerializer(serializers.Serializer):
+    """Responses in operation order; committed is false after a rollback"""
+    committed = serializers.BooleanField()
+    responses = OperationResultSerializer(many=True)
@@ -0,0 +1,247 @@
+"""
+Tests for the batch API
+"""
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+BATCH_URL = reverse('batch:batch')
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+RECIPE = {'title': 'Soup', 'time_minutes': 10, 'price': '4.50'}
+INCOMPLETE = {
+    'method': 'POST', 'path': RECIPES_URL, 'body': {'title': 'Incomplete'},
+}
+
+
+def statuses(res):
+    return [result['status'] for result in res.data['responses']]
+
+
+class PublicBatchApiTests(TestCase):
+    """Test unauthenticated API requests"""
+
+    def test_auth_required(self):
+        res = APIClient().post(BATCH_URL, {'operations': [
+            {'method': 'GET', 'path': TAGS_URL},
+        ]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateBatchApiTests(TestCase):
+    """Test authenticated API requests"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'batch@example.com', 'testtestuser'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def batch(self, operations, **params):
+        return self.client.post(
+            BATCH_URL, {'operations': operations, **params}, format='json'
+        )
+
+    def test_runs_operations_in_order(self):
+        res = self.batch([
+            {'method': 'POST', 'path': RECIPES_URL,
+             'body': {**RECIPE, 'tags': [{'name': 'Quick'}]}},
+            {'method': 'GET', 'path': TAGS_URL},
+            {'method': 'GET', 'path': reverse('user:me')},
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data['committed'])
+        self.assertEqual(statuses(res), [201, 200, 200])
+        responses = res.data['responses']
+        self.assertEqual(responses[1]['body'][0]['name'], 'Quick')
+        self.assertEqual(responses[2]['body']['email'], self.user.email)
+
+    def test_placeholders_use_earlier_responses(self):
+        res = self.batch([
+            {'method': 'POST', 'path': RECIPES_URL, 'body': RECIPE},
+            {'method': 'PATCH', 'path': f'{RECIPES_URL}$0.id/',
+             'body': {'title': 'Copy of $0.title'}},
+        ])
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(statuses(res)[1], status.HTTP_200_OK)
+        self.assertEqual(recipe.title, 'Copy of Soup')
+
+    def test_failed_dependency(self):
+        res = self.batch([
+            INCOMPLETE,
+            {'method': 'GET', 'path': f'{RECIPES_URL}$0.id/'},
+        ])
+
+        self.assertEqual(statuses(res), [400, 424])
+
+    def test_atomic_batch_rolls_back(self):
+        res = self.batch([
+            {'method': 'POST', 'path': RECIPES_URL, 'body': RECIPE},
+            INCOMPLETE,
+            {'method': 'GET', 'path': TAGS_URL},
+        ], atomic=True)
+
+        self.assertFalse(res.data['committed'])
+        self.assertEqual(statuses(res), [201, 400])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_repeated_idempotency_key_in_atomic_batch(self):
+        create = {
+            'method': 'POST', 'path': RECIPES_URL, 'body': RECIPE,
+            'headers': {'Idempotency-Key': 'key-1'},
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.batch([create, create], atomic=True)
+
+        first, second = res.data['responses']
+        self.assertEqual([first['status'], second['status']], [201, 201])
+        self.assertEqual(second['body'], first['body'])
+        self.assertEqual(second['headers']['Idempotent-Replayed'], 'true')
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_idempotency_key_reusable_after_rollback(self):
+        create = {
+            'method': 'POST', 'path': RECIPES_URL, 'body': RECIPE,
+            'headers': {'Idempotency-Key': 'key-1'},
+        }
+        self.batch([create, INCOMPLETE], atomic=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.batch([create])
+
+        result = res.data['responses'][0]
+        self.assertEqual(result['status'], status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', result['headers'])
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_non_atomic_batch_keeps_successes(self):
+        res = self.batch([
+            {'method': 'POST', 'path': RECIPES_URL, 'body': RECIPE},
+            INCOMPLETE,
+        ])
+
+        self.assertTrue(res.data['committed'])
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_paths_outside_recipe_and_user_rejected(self):
+        res = self.batch([
+            {'method': 'POST', 'path': BATCH_URL, 'body': {'operations': []}},
+            {'method': 'GET', 'path': reverse('job:job-list')},
+        ])
+
+        self.assertEqual(statuses(res), [403, 403])
+
+    def test_unknown_path(self):
+        res = self.batch([{'method': 'GET', 'path': '/api/recipe/nope/'}])
+
+        self.assertEqual(statuses(res), [status.HTTP_404_NOT_FOUND])
+
+    @override_settings(BATCH_MAX_OPERATIONS=2)
+    def test_operation_limit(self):
+        res = self.batch([{'method': 'GET', 'path': TAGS_URL}] * 3)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sub_requests_use_one_authentication(self):
+        with mock.patch(
+            'user.authentication.ExpiringTokenAuthentication.authenticate',
+            return_value=None,
+        ) as authenticate:
+            self.batch([{'method': 'GET', 'path': TAGS_URL}] * 3)
+
+        authenticate.assert_not_called()
+
+    def test_users_only_see_their_own_data(self):
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testtestuser'
+        )
+        Tag.objects.create(user=other, name='Private')
+
+        res = self.batch([{'method': 'GET', 'path': TAGS_URL}])
+
+        self.assertEqual(res.data['responses'][0]['body'], [])
+
+    def test_sub_requests_are_throttled(self):
+        rates = {'user': (2, 0.001), 'anon': None, 'recipe_list': None,
+                 'recipe_search': None, 'upload': None, 'batch': None}
+        with self.settings(API_THROTTLE_RATES=rates):
+            res = self.batch([{'method': 'GET', 'path': TAGS_URL}] * 2)
+
+        # The batch request itself takes the first token.
+        self.assertEqual(statuses(res), [200, 429])
+        self.assertIn('Retry-After', res.data['responses'][1]['headers'])
+
+    def test_multipart_batch_uploads_image(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        content = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(content, format='JPEG')
+        image = SimpleUploadedFile(
+            'photo.jpg', content.getvalue(), 'image/jpeg'
+        )
+        operations = [
+            {'method': 'POST', 'path': RECIPES_URL, 'body': RECIPE},
+            {'method': 'POST', 'path': f'{RECIPES_URL}$0.id/upload-image/',
+             'files': {'image': 'photo'}},
+        ]
+
+        with self.settings(MEDIA_ROOT=media_root.name):
+            res = self.client.post(BATCH_URL, {
+                'operations': json.dumps(operations), 'photo': image,
+            }, format='multipart')
+            recipe = Recipe.objects.get(user=self.user)
+            self.assertTrue(os.path.exists(recipe.image.path))
+
+        self.assertEqual(statuses(res), [201, 200])
+
+    def test_missing_file_part(self):
+        res = self.batch([
+            {'method': 'POST', 'path': f'{RECIPES_URL}1/upload-image/',
+             'files': {'image': 'photo'}},
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def multipart_batch(self, operations):
+        image = SimpleUploadedFile('photo.jpg', b'data', 'image/jpeg')
+        return self.client.post(BATCH_URL, {
+            'operations': json.dumps(operations), 'photo': image,
+        }, format='multipart')
+
+    def test_nested_form_fields_rejected(self):
+        res = self.multipart_batch([
+            {'method': 'POST', 'path': f'{RECIPES_URL}1/upload-image/',
+             'body': {'meta': {'alt': 'Soup'}}, 'files': {'image': 'photo'}},
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('body', res.data['operations'][0])
+
+    def test_placeholder_object_in_form_field_rejected(self):
+        res = self.multipart_batch([
+            {'method': 'POST', 'path': RECIPES_URL,
+             'body': {**RECIPE, 'tags': [{'name': 'Quick'}]}},
+            {'method': 'POST', 'path': f'{RECIPES_URL}$0.id/upload-image/',
+             'body': {'tags': '$0.tags'}, 'files': {'image': 'photo'}},
+        ])
+
+        self.assertEqual(statuses(res), [201, 400])
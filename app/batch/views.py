@@ -0,0 +1,46 @@
+"""Views for batch API"""
+import json
+
+from drf_spectacular.utils import extend_schema
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from batch import serializers
+from core import subrequests
+from user.authentication import ExpiringTokenAuthentication
+
+
+class BatchView(APIView):
+    """Run several recipe and user API requests in one round trip"""
+
+    authentication_classes = [ExpiringTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def _payload(self, request):
+        data = request.data
+        if not hasattr(data, 'getlist'):
+            return data
+        # Multipart batches carry the JSON operations next to the file parts.
+        try:
+            operations = json.loads(data.get('operations', ''))
+        except ValueError:
+            raise ValidationError({'operations': 'Must be a JSON list.'})
+        return {'operations': operations, 'atomic': data.get('atomic', False)}
+
+    @extend_schema(
+        request=serializers.BatchSerializer,
+        responses=serializers.BatchResultSerializer,
+    )
+    def post(self, request):
+        serializer = serializers.BatchSerializer(
+            data=self._payload(request), context={'files': request.FILES}
+        )
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        results, committed = subrequests.run(
+            request, data['operations'], data['atomic']
+        )
+        return Response({'committed': committed, 'responses': results})
@@ -1,12 +1,33 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
-from .models import User, Recipe, Tag
+from .models import User, Recipe, Tag, Ingredient
+from .paginators import EstimatedCountPaginator
 # Register your models here.
 
-class UserAdmin(BaseUserAdmin):
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables with millions of rows"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    search_help_text = _('Case-sensitive prefix search')
+    
+    def get_search_results(self, request, queryset, search_term):
+        # A plain prefix LIKE can use the column indexes, unlike the
+        # default case-insensitive substring search.
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        condition = Q()
+        for field in self.get_search_fields(request):
+            condition |= Q(**{f'{field}__startswith': search_term})
+        return queryset.filter(condition), False
+
+class UserAdmin(LargeTableAdmin, BaseUserAdmin):
     ordering = ['id']
     list_display = ['email', 'name']
+    list_filter = ['is_active', 'is_staff']
+    search_fields = ['email']
     fieldsets = (
         (_('User Info'), {'fields': ('email', 'password')}),
         (
@@ -36,6 +57,26 @@ class UserAdmin(BaseUserAdmin):
         }),
     )
 
+class RecipeAdmin(LargeTableAdmin):
+    ordering = ['-id']
+    list_display = ['id', 'title', 'user', 'time_minutes', 'price']
+    list_select_related = ['user']
+    list_filter = ['pending_deletion']
+    search_fields = ['title']
+    autocomplete_fields = ['user', 'tags', 'ingredients']
+
+class TagAdmin(LargeTableAdmin):
+    ordering = ['-id']
+    list_display = ['id', 'name', 'user', 'recipe_count']
+    list_select_related = ['user']
+    search_fields = ['name']
+    autocomplete_fields = ['user']
+    readonly_fields = ['recipe_count']
+
+class IngredientAdmin(TagAdmin):
+    pass
+
 admin.site.register(User, UserAdmin)
-admin.site.register(Recipe)
-admin.site.register(Tag)
\ No newline at end of file
+admin.site.register(Recipe, RecipeAdmin)
+admin.site.register(Tag, TagAdmin)
+admin.site.register(Ingredient, IngredientAdmin)
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+Brotli is used when the optional `brotli` package is installed and the
+client prefers it, gzip otherwise. Small bodies, responses that are
+already encoded and formats that are compressed by nature (images,
+archives) are passed through untouched. Streaming responses are
+compressed chunk by chunk.
+"""
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+INCOMPRESSIBLE_TYPES = (
+    'image/', 'video/', 'audio/', 'font/woff',
+    'application/zip', 'application/gzip', 'application/x-gzip',
+    'application/octet-stream', 'application/pdf',
+)
+
+
+def accepted_encodings(header):
+    """Map each encoding in an Accept-Encoding header to its q-value"""
+    encodings = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[name] = quality
+    return encodings
+
+
+def choose_encoding(header):
+    """Best supported encoding for the header, or None"""
+    accepted = accepted_encodings(header)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    wildcard = accepted.get('*', 0.0)
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class Compressor:
+    """Incremental compressor for one response body"""
+
+    def __init__(self, encoding, level=None):
+        self.encoding = encoding
+        if encoding == 'br':
+            quality = (
+                settings.COMPRESSION_BROTLI_QUALITY if level is None
+                else level
+            )
+            self._compressor = brotli.Compressor(
+                quality=quality, mode=brotli.MODE_TEXT
+            )
+        else:
+            level = settings.COMPRESSION_GZIP_LEVEL if level is None else level
+            # wbits 31 selects the gzip container.
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        if self.encoding == 'br':
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self):
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def compress(data, encoding, level=None):
+    compressor = Compressor(encoding, level)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _compressible(response):
+    if (
+        response.has_header('Content-Encoding')
+        or response.has_header('X-Accel-Redirect')
+    ):
+        return False
+    if 'no-transform' in response.get('Cache-Control', ''):
+        return False
+    content_type = response.get('Content-Type', '').lower()
+    return not content_type.startswith(INCOMPRESSIBLE_TYPES)
+
+
+def _stream(compressor, chunks):
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CompressionMiddleware:
+    """Compress eligible responses with brotli or gzip"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method == 'HEAD' or not _compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            compressor = Compressor(encoding)
+            response.streaming_content = _stream(
+                compressor, response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # The representation changed, so a strong validator would lie.
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,44 @@
+"""
+PostgreSQL backend recording connection reuse metrics.
+
+Connections are kept open between requests through CONN_MAX_AGE and checked
+with CONN_HEALTH_CHECKS before reuse; this wrapper only counts what happens
+so the reuse rate can be observed per worker.
+"""
+import time
+
+from django.db.backends.postgresql import base
+
+from core.db import metrics
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        start = time.monotonic()
+        try:
+            connection = super().get_new_connection(conn_params)
+        except Exception:
+            metrics.incr(self.alias, 'connect_errors')
+            raise
+        metrics.incr(self.alias, 'opened')
+        metrics.incr(self.alias, 'connect_seconds', time.monotonic() - start)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            metrics.incr(self.alias, 'closed')
+        return super()._close()
+
+    def close_if_health_check_failed(self):
+        checking = (
+            self.connection is not None
+            and self.health_check_enabled
+            and not self.health_check_done
+        )
+        super().close_if_health_check_failed()
+        if checking:
+            if self.connection is None:
+                metrics.incr(self.alias, 'health_check_failures')
+            else:
+                metrics.incr(self.alias, 'reused')
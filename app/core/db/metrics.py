@@ -0,0 +1,39 @@
+"""
+Per-process counters for database connection reuse
+"""
+import os
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(lambda: defaultdict(float))
+
+COUNTERS = (
+    'opened',
+    'closed',
+    'reused',
+    'health_check_failures',
+    'connect_errors',
+    'connect_seconds',
+)
+
+
+def incr(alias, name, amount=1):
+    with _lock:
+        _counters[alias][name] += amount
+
+
+def snapshot():
+    """Return the counters of this worker process keyed by database alias"""
+    with _lock:
+        stats = {}
+        for alias, values in _counters.items():
+            alias_stats = {name: values.get(name, 0) for name in COUNTERS}
+            alias_stats['open'] = alias_stats['opened'] - alias_stats['closed']
+            stats[alias] = alias_stats
+        return {'pid': os.getpid(), 'databases': stats}
+
+
+def reset():
+    with _lock:
+        _counters.clear()
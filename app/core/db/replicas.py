@@ -0,0 +1,96 @@
+"""
+Replica selection with read-your-writes stickiness.
+
+Reads only go to a replica inside `replica_reads()` (entered by
+ReplicaReadMixin for safe requests). A user who has just written is pinned
+to the primary for REPLICA_STICKY_SECONDS so they never read stale rows.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY = 'default'
+PIN_KEY = 'db-pin:user:{}'
+
+_state = threading.local()
+_health = {}
+_health_lock = threading.Lock()
+
+
+def replica_reads_enabled():
+    return getattr(_state, 'replica_reads', False)
+
+
+@contextmanager
+def replica_reads():
+    """Allow reads in this block to be served by a replica"""
+    previous = replica_reads_enabled()
+    _state.replica_reads = True
+    try:
+        yield
+    finally:
+        _state.replica_reads = previous
+
+
+def pin_to_primary(user):
+    """Send the user's reads to the primary for the sticky window"""
+    cache.set(PIN_KEY.format(user.pk), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user):
+    return bool(cache.get(PIN_KEY.format(user.pk)))
+
+
+def _probe(alias):
+    try:
+        connection = connections[alias]
+        connection.ensure_connection()
+        return connection.is_usable()
+    except DatabaseError:
+        return False
+
+
+def is_healthy(alias):
+    """Return the cached result of the last probe of a replica"""
+    now = time.monotonic()
+    with _health_lock:
+        healthy, checked_at = _health.get(alias, (None, 0))
+    max_age = settings.REPLICA_HEALTH_CHECK_SECONDS
+    if healthy is None or now - checked_at >= max_age:
+        healthy = _probe(alias)
+        with _health_lock:
+            _health[alias] = (healthy, now)
+    return healthy
+
+
+def choose_replica():
+    """Return a healthy replica alias, falling back to the primary"""
+    healthy = [
+        alias for alias in settings.DATABASE_REPLICAS if is_healthy(alias)
+    ]
+    if not healthy:
+        return PRIMARY
+    return random.choice(healthy)
+
+
+class ReplicaReadMixin:
+    """Serve safe requests from replicas unless the user is pinned"""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not settings.DATABASE_REPLICAS:
+            return
+        if request.method not in SAFE_METHODS:
+            pin_to_primary(request.user)
+        elif not is_pinned(request.user):
+            _state.replica_reads = True
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        _state.replica_reads = False
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,23 @@
+"""
+Database router sending writes to the primary and allowed reads to replicas
+"""
+from django.conf import settings
+
+from core.db import replicas
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if replicas.replica_reads_enabled():
+            return replicas.choose_replica()
+        return replicas.PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return replicas.PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
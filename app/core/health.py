@@ -0,0 +1,63 @@
+"""
+Liveness and readiness probes for the load balancer.
+
+The middleware sits first in MIDDLEWARE and answers /healthz and /readyz
+itself, so probes skip sessions, authentication and URL resolution.
+/healthz never touches the database; /readyz runs a trivial query and
+reuses the outcome for READINESS_CACHE_SECONDS. Probe responses are
+public, so database errors are only logged.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PATHS = ('/healthz', '/healthz/')
+READY_PATHS = ('/readyz', '/readyz/')
+
+_lock = threading.Lock()
+_last_check = {'at': None, 'ready': False}
+
+
+def database_ready():
+    """Whether the database answers, pinged at most once per interval"""
+    now = time.monotonic()
+    with _lock:
+        checked_at = _last_check['at']
+        max_age = settings.READINESS_CACHE_SECONDS
+        if checked_at is not None and now - checked_at < max_age:
+            return _last_check['ready']
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            ready = True
+        except DatabaseError:
+            logger.warning('Readiness check failed', exc_info=True)
+            ready = False
+        _last_check.update(at=now, ready=ready)
+    return ready
+
+
+def reset():
+    _last_check.update(at=None, ready=False)
+
+
+class HealthCheckMiddleware:
+    """Answer probe requests before the rest of the middleware stack"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path in HEALTH_PATHS:
+            return JsonResponse({'status': 'ok'})
+        if request.path in READY_PATHS:
+            if database_ready():
+                return JsonResponse({'status': 'ok'})
+            return JsonResponse({'status': 'unavailable'}, status=503)
+        return self.get_response(request)
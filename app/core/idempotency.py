@@ -0,0 +1,190 @@
+"""
+Idempotency-Key support for retried POST requests.
+
+The first response for a (user, key) pair is stored in the Django cache
+for IDEMPOTENCY_TTL seconds and replayed for retries. A short-lived lock
+makes concurrent duplicates wait for the in-flight request instead of
+running the handler twice. Requests rejected by raising (validation,
+permission) are not stored, so the key can be reused once the request is
+fixed. With several workers this needs a shared cache backend
+(CACHE_BACKEND), like the throttles.
+
+Inside a transaction (an atomic /api/batch/ call) the response is only
+stored, and the lock only released, once the transaction commits; until
+then repeats within the transaction replay from a per-thread record.
+"""
+import functools
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connection, transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = 'Idempotency-Key'
+RESPONSE_KEY = 'idempotency:{}:{}'
+LOCK_KEY = 'idempotency-lock:{}:{}'
+REPLAYED_HEADERS = ('Location',)
+
+_local = threading.local()
+
+
+def _hash_value(digest, value):
+    if isinstance(value, UploadedFile):
+        digest.update(f'file:{value.name}:{value.size}'.encode())
+        for chunk in value.chunks():
+            digest.update(chunk)
+        value.seek(0)
+    else:
+        digest.update(repr(value).encode())
+
+
+def request_fingerprint(request):
+    """Hash of what the request asks for, to detect reuse of a key"""
+    digest = hashlib.sha256(f'{request.method} {request.path}'.encode())
+    data = request.data
+    items = data.lists() if hasattr(data, 'lists') else data.items()
+    for name, value in sorted(items, key=lambda item: item[0]):
+        digest.update(f'\0{name}='.encode())
+        for item in value if isinstance(value, list) else [value]:
+            _hash_value(digest, item)
+    return digest.hexdigest()
+
+
+def _replay(stored):
+    response = Response(
+        stored['data'], status=stored['status'], headers=stored['headers']
+    )
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _error(message, status_code):
+    return Response({'detail': message}, status=status_code)
+
+
+def _check(stored, fingerprint):
+    if stored['fingerprint'] != fingerprint:
+        return _error(
+            f'{HEADER} was already used for a different request.',
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return _replay(stored)
+
+
+def _release(lock_key, token):
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _pending():
+    """Responses stored by this thread's open transaction, by response key"""
+    if not hasattr(_local, 'pending'):
+        _local.pending = {}
+    return _local.pending
+
+
+def forget_rolled_back():
+    """
+    Drop pending responses whose transaction was rolled back.
+
+    A rollback discards the on_commit callback that would have stored the
+    response, which is how it is detected here. The key's lock is released
+    so a retry can run; otherwise it would expire only after
+    IDEMPOTENCY_LOCK_SECONDS.
+    """
+    queued = [func for _, func, _ in connection.run_on_commit]
+    pending = _pending()
+    for response_key, entry in list(pending.items()):
+        if not any(func is entry['commit'] for func in queued):
+            del pending[response_key]
+            _release(entry['lock_key'], entry['token'])
+
+
+def _store(response_key, lock_key, token, stored):
+    """Store the response and release the lock once the transaction commits"""
+    def commit():
+        _pending().pop(response_key, None)
+        cache.set(response_key, stored, timeout=settings.IDEMPOTENCY_TTL)
+        _release(lock_key, token)
+
+    if not connection.in_atomic_block:
+        commit()
+        return
+    # Until then repeats in the same transaction replay from memory and
+    # other requests keep waiting on the lock.
+    _pending()[response_key] = {
+        'stored': stored, 'lock_key': lock_key, 'token': token,
+        'commit': commit,
+    }
+    transaction.on_commit(commit)
+
+
+def idempotent(handler):
+    """Make a view handler replay its first response for a repeated key"""
+    @functools.wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return handler(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return _error(
+                f'{HEADER} must be at most 255 characters.',
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        key_hash = hashlib.sha256(key.encode()).hexdigest()
+        response_key = RESPONSE_KEY.format(request.user.pk, key_hash)
+        lock_key = LOCK_KEY.format(request.user.pk, key_hash)
+        fingerprint = request_fingerprint(request)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+
+        forget_rolled_back()
+        if response_key in _pending():
+            return _check(_pending()[response_key]['stored'], fingerprint)
+        while True:
+            stored = cache.get(response_key)
+            if stored is not None:
+                return _check(stored, fingerprint)
+            if cache.add(
+                lock_key, token, timeout=settings.IDEMPOTENCY_LOCK_SECONDS
+            ):
+                break
+            if time.monotonic() >= deadline:
+                return _error(
+                    f'A request with this {HEADER} is still in progress.',
+                    status.HTTP_409_CONFLICT,
+                )
+            time.sleep(0.05)
+
+        holding = True
+        try:
+            # The first request may have finished between get() and add().
+            stored = cache.get(response_key)
+            if stored is not None:
+                return _check(stored, fingerprint)
+            response = handler(self, request, *args, **kwargs)
+            # Server errors and throttling are worth retrying for real.
+            if response.status_code < 500 and response.status_code != 429:
+                _store(response_key, lock_key, token, {
+                    'fingerprint': fingerprint,
+                    'status': response.status_code,
+                    'data': response.data,
+                    'headers': {
+                        name: response[name] for name in REPLAYED_HEADERS
+                        if response.has_header(name)
+                    },
+                })
+                # The lock now goes with the stored response.
+                holding = False
+            return response
+        finally:
+            if holding:
+                _release(lock_key, token)
+    return wrapper
@@ -0,0 +1,163 @@
+"""
+Background jobs stored in the database.
+
+Tasks are registered with `@task('name')` and queued with `enqueue`. The
+run_worker command claims ready rows with SELECT ... FOR UPDATE SKIP LOCKED
+where the backend supports it; elsewhere (SQLite) a conditional UPDATE on
+the status column makes sure a job is only claimed once. Failed jobs are
+retried with exponential backoff until max_attempts is reached.
+
+The job's error field is shown to its owner through the job API, so it
+only holds a short message; the traceback goes to the log.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import Job
+
+logger = logging.getLogger(__name__)
+
+ERROR_MAX_LENGTH = 200
+STALE_ERROR = 'The worker stopped before finishing the job.'
+
+_registry = {}
+
+
+def task(name, max_attempts=None):
+    """Register a function as the handler for jobs called name"""
+    def register(func):
+        _registry[name] = (func, max_attempts)
+        return func
+    return register
+
+
+def enqueue(name, payload=None, user=None, run_at=None, unique=False):
+    """
+    Queue a job; return the Job row.
+
+    With unique=True an already queued job of the same name is returned
+    instead of adding another one.
+    """
+    if name not in _registry:
+        raise ValueError(f'Unknown job {name!r}')
+    if unique:
+        queued = Job.objects.filter(
+            name=name, status=Job.QUEUED
+        ).order_by('id').first()
+        if queued:
+            return queued
+    _, max_attempts = _registry[name]
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        user=user,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def enqueue_on_commit(name, payload=None, user=None, unique=False):
+    """Queue a job once the surrounding transaction commits"""
+    transaction.on_commit(
+        lambda: enqueue(name, payload, user=user, unique=unique)
+    )
+
+
+def requeue_stale(now=None):
+    """
+    Put back jobs whose worker stopped before finishing them; return how
+    many were requeued.
+
+    Jobs that already used all their attempts are marked failed, so a job
+    that keeps killing its worker is not retried forever.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff)
+    unlock = {'locked_by': '', 'locked_at': None, 'updated_at': now}
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, error=STALE_ERROR, **unlock
+    )
+    return stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.QUEUED, run_at=now, **unlock
+    )
+
+
+def claim(worker, limit=1, now=None):
+    """Lock up to limit ready jobs for worker and return them"""
+    now = now or timezone.now()
+    ready = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now
+    ).order_by('run_at', 'id')
+    connection = connections[router.db_for_write(Job)]
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic(using=connection.alias):
+            locked = ready.select_for_update(skip_locked=True)
+            ids = list(locked.values_list('id', flat=True)[:limit])
+            _mark_running(ids, worker, now)
+    else:
+        # Without SKIP LOCKED the conditional UPDATE alone decides which
+        # worker wins a job; SQLite would refuse to upgrade a read lock
+        # taken inside a transaction anyway.
+        ids = list(ready.values_list('id', flat=True)[:limit])
+        _mark_running(ids, worker, now)
+    if not ids:
+        return []
+    return list(Job.objects.filter(
+        id__in=ids, status=Job.RUNNING, locked_by=worker, locked_at=now
+    ).order_by('run_at', 'id'))
+
+
+def _mark_running(ids, worker, now):
+    if ids:
+        Job.objects.filter(id__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt after attempts failures"""
+    delay = settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1)
+    return min(delay, settings.JOB_RETRY_BACKOFF_MAX)
+
+
+def run(job):
+    """Execute a claimed job and record the outcome"""
+    unlock = {'locked_by': '', 'locked_at': None}
+    try:
+        if job.name not in _registry:
+            raise LookupError(f'Unknown job {job.name!r}')
+        func, _ = _registry[job.name]
+        result = func(**job.payload)
+    except Exception as exc:
+        error = f'{type(exc).__name__}: {exc}'[:ERROR_MAX_LENGTH]
+        now = timezone.now()
+        if job.attempts < job.max_attempts:
+            status = Job.QUEUED
+            run_at = now + timedelta(seconds=retry_delay(job.attempts))
+        else:
+            status = Job.FAILED
+            run_at = job.run_at
+        logger.warning(
+            'Job %s (%s) attempt %d failed', job.id, job.name, job.attempts,
+            exc_info=True,
+        )
+        Job.objects.filter(id=job.id).update(
+            status=status, run_at=run_at, error=error, updated_at=now, **unlock
+        )
+        job.status = status
+        return job
+    Job.objects.filter(id=job.id).update(
+        status=Job.SUCCEEDED, result=result, error='',
+        updated_at=timezone.now(), **unlock
+    )
+    job.status, job.result = Job.SUCCEEDED, result
+    return job
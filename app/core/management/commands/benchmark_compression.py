@@ -0,0 +1,96 @@
+"""
+Django command measuring compression CPU time against bytes saved
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core import compression
+
+WORDS = (
+    'chicken', 'garlic', 'roast', 'lemon', 'quick', 'vegan', 'spicy', 'tomato',
+    'basil', 'pasta', 'curry', 'baked', 'salad', 'honey', 'ginger', 'soup',
+)
+
+
+class Command(BaseCommand):
+    """Compress a synthetic recipe list at several levels and compare"""
+
+    help = 'Benchmark gzip/brotli levels on a recipe list payload.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=500)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--gzip-levels', default='1,5,6,9')
+        parser.add_argument('--brotli-levels', default='1,4,5,11')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _name(self, rng, words=2):
+        return ' '.join(rng.choice(WORDS) for _ in range(words)).title()
+
+    def payload(self, options):
+        """Recipe list shaped like RecipeSerializer output, rendered by DRF"""
+        rng = random.Random(options['seed'])
+        recipes = [
+            {
+                'id': recipe_id,
+                'title': self._name(rng, 3),
+                'time_minutes': rng.randint(5, 180),
+                'price': f'{rng.uniform(1, 60):.2f}',
+                'link': f'https://example.com/recipes/{recipe_id}',
+                'tags': [
+                    {'id': rng.randint(1, 200), 'name': self._name(rng, 1)}
+                    for _ in range(options['tags_per_recipe'])
+                ],
+                'ingredients': [
+                    {'id': rng.randint(1, 2000), 'name': self._name(rng)}
+                    for _ in range(options['ingredients_per_recipe'])
+                ],
+            }
+            for recipe_id in range(1, options['recipes'] + 1)
+        ]
+        return JSONRenderer().render(recipes)
+
+    def _levels(self, options):
+        levels = [
+            ('gzip', int(level))
+            for level in options['gzip_levels'].split(',') if level
+        ]
+        if compression.brotli is not None:
+            levels += [
+                ('br', int(level))
+                for level in options['brotli_levels'].split(',') if level
+            ]
+        else:
+            self.stdout.write('brotli is not installed; skipping br levels')
+        return levels
+
+    def handle(self, *args, **options):
+        body = self.payload(options)
+        self.stdout.write(
+            f'Payload: {options["recipes"]} recipes, '
+            f'{len(body) / 1024:.1f} KiB of JSON'
+        )
+        self.stdout.write(
+            f'{"encoding":<10}{"level":>6}{"KiB":>10}'
+            f'{"ratio":>8}{"ms":>9}{"MB/s":>9}'
+        )
+        for encoding, level in self._levels(options):
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                compressed = compression.compress(body, encoding, level)
+                timings.append(time.perf_counter() - start)
+            seconds = sorted(timings)[len(timings) // 2]
+            self.stdout.write(
+                f'{encoding:<10}{level:>6}{len(compressed) / 1024:>10.1f}'
+                f'{len(body) / len(compressed):>8.1f}{seconds * 1000:>9.2f}'
+                f'{len(body) / seconds / 1e6:>9.1f}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Median of {options["repeat"]} runs per level'
+        ))
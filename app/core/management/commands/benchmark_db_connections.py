@@ -0,0 +1,65 @@
+"""
+Django command measuring what persistent database connections save
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+class Command(BaseCommand):
+    """Compare a fresh connection per request with a reused connection"""
+
+    help = (
+        'Time a trivial query on a new connection versus a reused one. '
+        'Run it against a local PostgreSQL to see the handshake cost.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--database', default='default')
+
+    def _run_query(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
+    def _measure(self, connection, iterations, reconnect):
+        timings = []
+        for _ in range(iterations):
+            if reconnect:
+                connection.close()
+            start = time.perf_counter()
+            self._run_query(connection)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def _summary(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f'{label:<12} mean={statistics.mean(timings):.3f}ms '
+            f'p50={statistics.median(timings):.3f}ms p95={p95:.3f}ms'
+        )
+        return statistics.mean(timings)
+
+    def handle(self, *args, **options):
+        iterations = max(options['iterations'], 1)
+        connection = connections[options['database']]
+
+        self._run_query(connection)
+        fresh = self._measure(connection, iterations, reconnect=True)
+        reused = self._measure(connection, iterations, reconnect=False)
+        connection.close()
+
+        self.stdout.write(
+            f'{connection.vendor} {iterations} iterations on '
+            f'"{options["database"]}"'
+        )
+        fresh_mean = self._summary('new conn', fresh)
+        reused_mean = self._summary('reused conn', reused)
+        self.stdout.write(self.style.SUCCESS(
+            f'Saved {fresh_mean - reused_mean:.3f}ms per request '
+            f'({fresh_mean / reused_mean:.1f}x faster)'
+        ))
@@ -0,0 +1,77 @@
+"""
+Django command timing the recipe similarity index on synthetic data
+"""
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from recipe.similarity import RecipeIndex
+
+
+class Command(BaseCommand):
+    """Build a synthetic index and time similarity queries"""
+
+    help = (
+        'Benchmark building the recipe index and its similarity and pantry '
+        'queries.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=50000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--tags', type=int, default=200)
+        parser.add_argument('--per-recipe', type=int, default=10)
+        parser.add_argument('--queries', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _pairs(self, rng, recipe_ids, features, per_recipe):
+        recipes = np.repeat(recipe_ids, per_recipe)
+        chosen = rng.integers(1, features + 1, size=len(recipes))
+        return np.column_stack([recipes, chosen])
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        recipe_ids = np.arange(1, options['recipes'] + 1, dtype=np.int64)
+        ingredient_pairs = self._pairs(
+            rng, recipe_ids, options['ingredients'], options['per_recipe']
+        )
+        tag_pairs = self._pairs(rng, recipe_ids, options['tags'], 3)
+
+        start = time.perf_counter()
+        index = RecipeIndex(recipe_ids, ingredient_pairs, tag_pairs)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        targets = rng.choice(recipe_ids, size=options['queries'])
+        timings = []
+        for recipe_id in targets:
+            start = time.perf_counter()
+            index.similar(int(recipe_id), limit=10)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        pantry_timings = []
+        for _ in range(options['queries']):
+            pantry = rng.choice(
+                options['ingredients'], size=30, replace=False
+            ) + 1
+            start = time.perf_counter()
+            index.cookable(pantry, max_missing=2, limit=50)
+            pantry_timings.append((time.perf_counter() - start) * 1000)
+
+        nbytes = index.ingredients.bits.nbytes + index.tags.bits.nbytes
+        memory_mb = nbytes / 2 ** 20
+        self.stdout.write(
+            f'{len(recipe_ids)} recipes, {options["ingredients"]} '
+            f'ingredients, {options["tags"]} tags: index {memory_mb:.1f} MiB '
+            f'built in {build_ms:.0f}ms'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'similar(): mean={np.mean(timings):.2f}ms '
+            f'p95={np.percentile(timings, 95):.2f}ms '
+            f'over {len(timings)} queries'
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f'cookable(): mean={np.mean(pantry_timings):.2f}ms '
+            f'p95={np.percentile(pantry_timings, 95):.2f}ms '
+            'with 30 pantry items'
+        ))
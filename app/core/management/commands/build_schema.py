@@ -0,0 +1,30 @@
+"""
+Django command pre-generating the cached OpenAPI schema
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from drf_spectacular.views import SpectacularAPIView
+
+from core import schema
+
+
+class Command(BaseCommand):
+    """Render the schema in every served format and store it on disk"""
+
+    help = 'Generate the OpenAPI schema cache for the current code version.'
+
+    def handle(self, *args, **options):
+        renderers = {
+            cls.format: cls for cls in SpectacularAPIView.renderer_classes
+        }
+        for renderer_class in renderers.values():
+            started = time.monotonic()
+            body, etag = schema.get_schema(renderer_class(), rebuild=True)
+            self.stdout.write(
+                f'{renderer_class.format}: {len(body)} bytes, etag {etag}, '
+                f'{time.monotonic() - started:.3f}s'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Schema cached for version {schema.code_version()}'
+        ))
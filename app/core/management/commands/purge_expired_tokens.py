@@ -0,0 +1,38 @@
+"""
+Django command deleting auth tokens idle longer than TOKEN_IDLE_TIMEOUT
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+
+class Command(BaseCommand):
+    """Purge expired tokens in chunks"""
+
+    help = 'Delete auth tokens that have been idle past their expiry.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        # Usage may still sit in a worker buffer for one flush interval.
+        grace = timedelta(seconds=settings.TOKEN_ACTIVITY_FLUSH_INTERVAL * 2)
+        cutoff = timezone.now() - settings.TOKEN_IDLE_TIMEOUT - grace
+        expired = Token.objects.annotate(
+            last_seen=Coalesce('activity__last_used', 'created')
+        ).filter(last_seen__lt=cutoff)
+
+        total = 0
+        while True:
+            keys = list(expired.values_list('key', flat=True)[:chunk_size])
+            if not keys:
+                break
+            Token.objects.filter(key__in=keys).delete()
+            total += len(keys)
+            self.stdout.write(f'Deleted {total} expired tokens')
+        self.stdout.write(self.style.SUCCESS(f'Purged {total} expired tokens'))
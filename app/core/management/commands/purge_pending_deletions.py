@@ -0,0 +1,37 @@
+"""
+Django command removing deleted recipes and closed accounts in chunks
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.purge import purge_pending
+
+
+class Command(BaseCommand):
+    """Purge rows marked for deletion, one short transaction per chunk"""
+
+    help = 'Delete recipes and accounts marked for deletion in bounded chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.PURGE_CHUNK_SIZE
+        )
+        parser.add_argument(
+            '--max-chunks', type=int, default=None,
+            help='Stop after this many chunks; the next run resumes.',
+        )
+
+    def handle(self, *args, **options):
+        totals = Counter()
+        chunks = purge_pending(options['chunk_size'], options['max_chunks'])
+        for label, count in chunks:
+            totals[label] += count
+            self.stdout.write(
+                f'Deleted {count} {label} ({totals[label]} so far)'
+            )
+        summary = ', '.join(
+            f'{count} {label}' for label, count in totals.items()
+        ) or 'nothing'
+        self.stdout.write(self.style.SUCCESS(f'Purged {summary}'))
@@ -0,0 +1,38 @@
+"""
+Django command recomputing the per-user recipe summaries
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.stats import rebuild_user_stats, rebuild_user_usage_counts
+
+
+class Command(BaseCommand):
+    """Rebuild RecipeStats rows from the recipe table"""
+
+    help = 'Recompute recipe statistics and tag/ingredient usage counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id', type=int, action='append', dest='user_ids'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+        if not user_ids:
+            user_ids = get_user_model().objects.order_by(
+                'id'
+            ).values_list('id', flat=True)
+            user_ids = user_ids.iterator(chunk_size=options['chunk_size'])
+
+        total = 0
+        for user_id in user_ids:
+            rebuild_user_stats(user_id)
+            rebuild_user_usage_counts(user_id)
+            total += 1
+            if total % options['chunk_size'] == 0:
+                self.stdout.write(f'Rebuilt {total} users')
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt stats for {total} users')
+        )
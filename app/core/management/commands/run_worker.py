@@ -0,0 +1,121 @@
+"""
+Django command processing background jobs from the database
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connections
+
+from core import jobs
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Claim ready jobs and run them on a thread pool"""
+
+    help = 'Run queued background jobs until stopped.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int,
+            default=settings.JOB_WORKER_CONCURRENCY,
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.JOB_POLL_INTERVAL
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Exit once no job is ready instead of polling.',
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: self.stopping.set())
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        concurrency = max(options['concurrency'], 1)
+        self.stdout.write(
+            f'Worker {worker} started (concurrency {concurrency})'
+        )
+
+        if concurrency == 1:
+            processed = self._run_inline(worker, options)
+        else:
+            processed = self._run_pool(worker, concurrency, options)
+        self.stdout.write(self.style.SUCCESS(
+            f'Worker {worker} stopped after {processed} jobs'
+        ))
+
+    def _report(self, job, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'job={job.id} name={job.name} status={job.status} '
+            f'attempt={job.attempts} seconds={elapsed:.3f}'
+        )
+
+    def _execute(self, job):
+        started = time.monotonic()
+        try:
+            jobs.run(job)
+        finally:
+            # Worker threads own their connections; do not leak them.
+            if threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+        self._report(job, started)
+
+    def _claim(self, worker, limit):
+        close_old_connections()
+        try:
+            jobs.requeue_stale()
+            return jobs.claim(worker, limit)
+        except DatabaseError:
+            # Keep the worker alive through restarts and lock timeouts.
+            logger.exception('Could not claim jobs')
+            return []
+
+    def _idle(self, options):
+        if options['burst']:
+            return True
+        self.stopping.wait(options['poll_interval'])
+        return False
+
+    def _run_inline(self, worker, options):
+        processed = 0
+        while not self.stopping.is_set():
+            claimed = self._claim(worker, 1)
+            if not claimed:
+                if self._idle(options):
+                    break
+                continue
+            self._execute(claimed[0])
+            processed += 1
+        return processed
+
+    def _run_pool(self, worker, concurrency, options):
+        processed = 0
+        running = set()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while not self.stopping.is_set():
+                claimed = self._claim(worker, concurrency - len(running))
+                running.update(
+                    pool.submit(self._execute, job) for job in claimed
+                )
+                processed += len(claimed)
+                if len(running) >= concurrency:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                elif not claimed:
+                    if not running and self._idle(options):
+                        break
+                    done, running = wait(
+                        running, timeout=options['poll_interval']
+                    )
+            wait(running)
+        return processed
@@ -1,22 +1,114 @@
 """
 Django command to wait for the database to be available
 """
-from django.core.management.base import BaseCommand
-from psycopg2 import OperationalError as Psycopg2Error
-from django.db.utils import OperationalError
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import OperationalError
+from psycopg2 import OperationalError as Psycopg2Error
+
 
 class Command(BaseCommand):
     """Django command to wait for the database"""
-    
-    def handle(self, *args, **options):
-        self.stdout.write("Waiting for database")
-        db_up = False
-        while db_up is False:
+
+    help = (
+        'Wait until the databases accept connections, '
+        'with backoff and a deadline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', action='append', dest='databases',
+            help='Alias to wait for (repeatable, default: default).',
+        )
+        parser.add_argument(
+            '--all', action='store_true', dest='all_databases',
+            help='Wait for every configured alias.',
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=settings.DB_WAIT_TIMEOUT,
+            help='Give up after this many seconds (0 waits forever).',
+        )
+        parser.add_argument('--initial-delay', type=float, default=0.1)
+        parser.add_argument('--max-delay', type=float, default=5.0)
+
+    def probe(self, alias):
+        """Open and close a raw connection, bypassing Django's state"""
+        wrapper = connections[alias]
+        connection = wrapper.get_new_connection(
+            wrapper.get_connection_params()
+        )
+        connection.close()
+
+    def backoff(self, attempt, initial_delay, max_delay):
+        """Exponential delay with jitter so restarts do not probe together"""
+        delay = min(max_delay, initial_delay * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def wait_for(self, alias, deadline, options):
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
             try:
-                self.check(databases = ['default'])
-                db_up = True
-            except (Psycopg2Error, OperationalError):
-                self.stdout.write('Database unavailable, waiting for 1 second')
-                time.sleep(1)
-        self.stdout.write(self.style.SUCCESS("Database is connected"))
\ No newline at end of file
+                self.probe(alias)
+            except (Psycopg2Error, OperationalError) as exc:
+                message = str(exc).strip()
+                error = (
+                    message.splitlines()[0] if message
+                    else type(exc).__name__
+                )
+            else:
+                self.stdout.write(
+                    f'database={alias} status=ready attempts={attempt} '
+                    f'elapsed={time.monotonic() - started:.3f}s'
+                )
+                return True
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                self.stdout.write(
+                    f'database={alias} status=timeout attempts={attempt} '
+                    f'elapsed={now - started:.3f}s error={error!r}'
+                )
+                return False
+            delay = self.backoff(
+                attempt, options['initial_delay'], options['max_delay']
+            )
+            if deadline is not None:
+                delay = min(delay, deadline - now)
+            self.stdout.write(
+                f'database={alias} status=unavailable attempt={attempt} '
+                f'elapsed={now - started:.3f}s retry_in={delay:.3f}s '
+                f'error={error!r}'
+            )
+            time.sleep(delay)
+
+    def handle(self, *args, **options):
+        if options['all_databases']:
+            aliases = list(connections)
+        else:
+            aliases = options['databases'] or ['default']
+        timeout = options['timeout']
+        deadline = time.monotonic() + timeout if timeout > 0 else None
+        started = time.monotonic()
+        self.stdout.write(f"Waiting for database {', '.join(aliases)}")
+
+        with ThreadPoolExecutor(max_workers=len(aliases)) as pool:
+            results = dict(zip(aliases, pool.map(
+                lambda alias: self.wait_for(alias, deadline, options), aliases
+            )))
+
+        elapsed = time.monotonic() - started
+        unavailable = [alias for alias, ready in results.items() if not ready]
+        if unavailable:
+            raise CommandError(
+                f"Database {', '.join(unavailable)} unavailable "
+                f'after {elapsed:.3f}s'
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'Database is connected ({elapsed:.3f}s)')
+        )
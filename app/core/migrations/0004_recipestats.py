@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_tokenactivity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recipe_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('recipe_count', models.IntegerField(default=0)),
+                ('total_time_minutes', models.BigIntegerField(default=0)),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('price_under_5', models.IntegerField(default=0)),
+                ('price_under_10', models.IntegerField(default=0)),
+                ('price_under_20', models.IntegerField(default=0)),
+                ('price_under_50', models.IntegerField(default=0)),
+                ('price_50_plus', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
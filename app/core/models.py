@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.conf import settings
+from django.utils import timezone
 import os
 import uuid
 # Create your models here.
@@ -36,6 +37,10 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Set when the account is closed; core.purge removes the rows later.
+    deletion_requested_at = models.DateTimeField(
+        null=True, blank=True, db_index=True
+    )
     
     objects = UserManager()
     
@@ -44,28 +49,221 @@ class User(AbstractBaseUser, PermissionsMixin):
     
 class Recipe(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    title = models.CharField(max_length=255)
+    # Indexed for the admin prefix search.
+    title = models.CharField(max_length=255, db_index=True)
     time_minutes = models.IntegerField()
     price = models.DecimalField(max_digits=5, decimal_places=2)
     description = models.TextField(blank=True)
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredient')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    # Indexed so the media view can find the owner of a file.
+    image = models.ImageField(
+        null=True, upload_to=recipe_image_file_path, db_index=True
+    )
+    # Deleted recipes are hidden at once and removed later by core.purge.
+    pending_deletion = models.BooleanField(default=False)
+    # Change cursor for core.sync; also bumped when tags/ingredients change.
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'time_minutes'],
+                name='core_recipe_user_time_idx',
+            ),
+            models.Index(
+                fields=['user', 'updated_at', 'id'],
+                name='core_recipe_user_updated_idx',
+            ),
+            models.Index(
+                fields=['user', 'price'], name='core_recipe_user_price_idx'
+            ),
+            models.Index(
+                fields=['id'],
+                condition=models.Q(pending_deletion=True),
+                name='core_recipe_pending_idx',
+            ),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored values so signal handlers can apply deltas.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
     
     def __str__(self):
         return self.title
 
 class Tag(models.Model):
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, db_index=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # Number of recipes using this tag, maintained by core.signals.
+    recipe_count = models.IntegerField(default=0)
+    # Change cursor for core.sync (recipe_count updates do not touch it).
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-recipe_count', '-name'],
+                name='core_tag_popular_idx',
+            ),
+            models.Index(
+                fields=['user', 'updated_at', 'id'],
+                name='core_tag_user_updated_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.name
     
 class Ingredient(models.Model):
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, db_index=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # Number of recipes using this ingredient, maintained by core.signals.
+    recipe_count = models.IntegerField(default=0)
+    # Change cursor for core.sync (recipe_count updates do not touch it).
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-recipe_count', '-name'],
+                name='core_ingredient_popular_idx',
+            ),
+            models.Index(
+                fields=['user', 'updated_at', 'id'],
+                name='core_ingr_user_updated_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        return self.name
+
+class Tombstone(models.Model):
+    """Marker for a deleted recipe, tag or ingredient, read by core.sync"""
+    RECIPE = 'recipe'
+    TAG = 'tag'
+    INGREDIENT = 'ingredient'
+    KIND_CHOICES = (
+        (RECIPE, 'Recipe'),
+        (TAG, 'Tag'),
+        (INGREDIENT, 'Ingredient'),
+    )
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE
+    )
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'deleted_at', 'id'],
+                name='core_tombstone_user_idx',
+            ),
+            models.Index(
+                fields=['deleted_at'], name='core_tombstone_deleted_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+class RecipeStats(models.Model):
+    """Per-user recipe aggregates, updated incrementally by signals"""
+    PRICE_BUCKETS = (
+        ('price_under_5', None, 5),
+        ('price_under_10', 5, 10),
+        ('price_under_20', 10, 20),
+        ('price_under_50', 20, 50),
+        ('price_50_plus', 50, None),
+    )
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='recipe_stats',
+    )
+    recipe_count = models.IntegerField(default=0)
+    total_time_minutes = models.BigIntegerField(default=0)
+    total_price = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0
+    )
+    price_under_5 = models.IntegerField(default=0)
+    price_under_10 = models.IntegerField(default=0)
+    price_under_20 = models.IntegerField(default=0)
+    price_under_50 = models.IntegerField(default=0)
+    price_50_plus = models.IntegerField(default=0)
+    
+    @classmethod
+    def price_bucket(cls, price):
+        """Return the name of the counter field for a price"""
+        for field, low, high in cls.PRICE_BUCKETS:
+            if high is None or price < high:
+                return field
+    
+    def __str__(self):
+        return f'Stats for {self.user_id}'
+
+
+class TokenActivity(models.Model):
+    """Last time an auth token was used, written in periodic batches"""
+    token = models.OneToOneField(
+        'authtoken.Token',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='activity',
+    )
+    last_used = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f'{self.token_id} {self.last_used}'
+
+
+class Job(models.Model):
+    """Deferred unit of work picked up by the run_worker command"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    )
+    
+    name = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict, blank=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True,
+        on_delete=models.SET_NULL,
+    )
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=QUEUED
+    )
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=255, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'], name='core_job_ready_idx'
+            ),
+        ]
     
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f'{self.name} ({self.status})'
@@ -0,0 +1,140 @@
+"""
+Deferred deletion of recipes and closed accounts.
+
+Deleting a heavy account (or many recipes) in one request makes Django
+collect every dependent row and delete it under one transaction. Instead
+rows are marked as pending and hidden right away; `purge_pending` then
+removes them in bounded chunks, each in its own short transaction. All
+state lives in the database, so an interrupted purge simply resumes on
+the next run.
+
+Marking rows queues the `core.purge_pending` job, so a running worker
+picks the purge up without a separate schedule.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core import jobs, sync
+from core.models import Ingredient, Recipe, Tag, Tombstone
+from core.signals import bulk_recipe_changes
+
+PURGE_JOB = 'core.purge_pending'
+
+
+def schedule_purge():
+    """Queue a purge job after the current transaction commits"""
+    jobs.enqueue_on_commit(PURGE_JOB, unique=True)
+
+
+def request_account_deletion(user):
+    """Deactivate the account and queue its rows for purging"""
+    with transaction.atomic():
+        get_user_model().objects.filter(pk=user.pk).update(
+            is_active=False, deletion_requested_at=timezone.now()
+        )
+        Token.objects.filter(user=user).delete()
+        schedule_purge()
+
+
+def _delete_recipes(recipe_ids):
+    # Through rows first, so the recipe delete has nothing left to cascade.
+    for field in ('tags', 'ingredients'):
+        through = getattr(Recipe, field).through
+        through.objects.filter(recipe_id__in=recipe_ids).delete()
+    Recipe.objects.filter(id__in=recipe_ids).delete()
+
+
+def _purge_chunks(queryset, delete, chunk_size):
+    """Delete queryset rows chunk by chunk, yielding the chunk sizes"""
+    while True:
+        ids = list(
+            queryset.order_by('id').values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return
+        with transaction.atomic(), bulk_recipe_changes():
+            delete(ids)
+        yield len(ids)
+
+
+def _purge_account(user_id, chunk_size):
+    yield from (
+        ('recipes', count) for count in _purge_chunks(
+            Recipe.objects.filter(user_id=user_id), _delete_recipes, chunk_size
+        )
+    )
+    related = (
+        ('tags', Tag),
+        ('ingredients', Ingredient),
+        ('tombstones', Tombstone),
+    )
+    for label, model in related:
+        rows = model.objects.filter(user_id=user_id)
+        yield from (
+            (label, count) for count in _purge_chunks(
+                rows, lambda ids: rows.filter(id__in=ids).delete(), chunk_size
+            )
+        )
+    # Only a handful of one-to-one rows are left to cascade.
+    get_user_model().objects.filter(id=user_id).delete()
+    yield 'users', 1
+
+
+def purge_pending(chunk_size=1000, max_chunks=None):
+    """
+    Remove rows marked for deletion, yielding (label, count) per chunk.
+
+    Stops after max_chunks chunks when given; calling again continues
+    where the previous run left off.
+    """
+    steps = _pending_steps(chunk_size)
+    for done, step in enumerate(steps, 1):
+        yield step
+        if max_chunks is not None and done >= max_chunks:
+            return
+
+
+def _pending_steps(chunk_size):
+    pending_recipes = Recipe.objects.filter(pending_deletion=True)
+    yield from (
+        ('recipes', count) for count in
+        _purge_chunks(pending_recipes, _delete_recipes, chunk_size)
+    )
+    closed = get_user_model().objects.filter(
+        deletion_requested_at__isnull=False
+    )
+    for user_id in list(closed.order_by('id').values_list('id', flat=True)):
+        yield from _purge_account(user_id, chunk_size)
+    expired = sync.expired_tombstones()
+    yield from (
+        ('tombstones', count) for count in
+        _purge_chunks(
+            expired, lambda ids: expired.filter(id__in=ids).delete(),
+            chunk_size,
+        )
+    )
+
+
+@jobs.task(PURGE_JOB)
+def purge_pending_job(chunk_size=None, max_chunks=None):
+    """Purge a bounded number of chunks; queue a follow-up if work remains"""
+    max_chunks = max_chunks or settings.PURGE_JOB_MAX_CHUNKS
+    totals = Counter()
+    steps = 0
+    chunks = purge_pending(
+        chunk_size or settings.PURGE_CHUNK_SIZE, max_chunks
+    )
+    for label, count in chunks:
+        totals[label] += count
+        steps += 1
+    if steps >= max_chunks:
+        jobs.enqueue(
+            PURGE_JOB, {'chunk_size': chunk_size, 'max_chunks': max_chunks},
+            unique=True,
+        )
+    return dict(totals)
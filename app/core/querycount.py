@@ -0,0 +1,142 @@
+"""
+Detect N+1 and duplicate SQL queries.
+
+Every statement run through the Django connections is reduced to a
+fingerprint (literals and IN lists normalized) and counted. When the same
+statement shape runs more than the allowed number of times within one unit
+of work it is reported, either as a test failure or as a log warning.
+"""
+import logging
+import re
+import traceback
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DUPLICATE_THRESHOLD = 2
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Return the shape of a SQL statement with its literals normalized"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+def _project_stack():
+    """Return the current call stack limited to frames from this project"""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(base_dir)
+    ]
+    return ''.join(traceback.format_list(frames))
+
+
+class QueryCounter:
+    """Count executed statements per fingerprint on the given databases"""
+
+    def __init__(self, using=None, capture_stacks=False):
+        self.using = using
+        self.capture_stacks = capture_stacks
+        self.counts = Counter()
+        self.examples = {}
+        self.stacks = defaultdict(list)
+        self._exit_stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        key = fingerprint(sql)
+        self.counts[key] += 1
+        self.examples.setdefault(key, sql)
+        if self.capture_stacks:
+            self.stacks[key].append(_project_stack())
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        aliases = self.using or list(connections)
+        if isinstance(aliases, str):
+            aliases = [aliases]
+        self._exit_stack = ExitStack()
+        for alias in aliases:
+            self._exit_stack.enter_context(
+                connections[alias].execute_wrapper(self)
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        self._exit_stack.close()
+        self._exit_stack = None
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def duplicates(self, threshold=DEFAULT_DUPLICATE_THRESHOLD):
+        """Return fingerprints that ran more than `threshold` times"""
+        return {
+            key: count for key, count in self.counts.most_common()
+            if count > threshold
+        }
+
+    def report(self, threshold=DEFAULT_DUPLICATE_THRESHOLD):
+        """Human readable description of the duplicated statements"""
+        lines = []
+        for key, count in self.duplicates(threshold).items():
+            lines.append(f'{count}x {key}')
+            stacks = self.stacks.get(key)
+            if stacks:
+                lines.append(stacks[-1])
+        return '\n'.join(lines)
+
+
+class QueryCountAssertionsMixin:
+    """TestCase mixin asserting that code does not repeat query shapes"""
+
+    duplicate_query_threshold = DEFAULT_DUPLICATE_THRESHOLD
+
+    @contextmanager
+    def assertNoDuplicateQueries(self, threshold=None, using='default'):
+        if threshold is None:
+            threshold = self.duplicate_query_threshold
+        with QueryCounter(using=using, capture_stacks=True) as counter:
+            yield counter
+        if counter.duplicates(threshold):
+            self.fail(
+                f'Statements repeated more than {threshold} times:\n'
+                f'{counter.report(threshold)}'
+            )
+
+
+class DuplicateQueryMiddleware:
+    """Log requests repeating the same statement shape (DEBUG only)"""
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.threshold = getattr(
+            settings, 'QUERY_DUPLICATE_THRESHOLD', DEFAULT_DUPLICATE_THRESHOLD
+        )
+
+    def __call__(self, request):
+        with QueryCounter(capture_stacks=True) as counter:
+            response = self.get_response(request)
+        if counter.duplicates(self.threshold):
+            logger.warning(
+                'Duplicate queries in %s %s (%d total):\n%s',
+                request.method, request.path, counter.total,
+                counter.report(self.threshold),
+            )
+        return response
@@ -0,0 +1,86 @@
+"""
+OpenAPI schema generated once per code version.
+
+Introspecting every viewset and serializer takes hundreds of milliseconds,
+so the rendered schema is kept in process memory and in SCHEMA_CACHE_DIR,
+keyed by the code version. A new deploy (APP_VERSION, or the source files
+when it is unset) produces a new key and the schema is built again, either
+by the build_schema command or lazily on the first request.
+"""
+import hashlib
+import os
+import threading
+from functools import lru_cache
+
+import drf_spectacular
+from django.conf import settings
+from drf_spectacular.generators import SchemaGenerator
+
+_memory = {}
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    """Key identifying the code the schema is generated from"""
+    digest = hashlib.sha256()
+    digest.update(drf_spectacular.__version__.encode())
+    spectacular_settings = getattr(settings, 'SPECTACULAR_SETTINGS', {})
+    digest.update(repr(sorted(spectacular_settings.items())).encode())
+    if settings.APP_VERSION:
+        digest.update(settings.APP_VERSION.encode())
+    else:
+        for path in sorted(settings.BASE_DIR.rglob('*.py')):
+            digest.update(str(path.relative_to(settings.BASE_DIR)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _path(renderer):
+    return os.path.join(
+        settings.SCHEMA_CACHE_DIR,
+        f'schema-{code_version()}.{renderer.format}',
+    )
+
+
+def _generate(renderer):
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return renderer.render(schema, renderer_context={})
+
+
+def _write(path, body):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as tmp_file:
+            tmp_file.write(body)
+        os.replace(tmp_path, path)
+    except OSError:
+        # A read-only disk only costs the other workers a rebuild.
+        pass
+
+
+def get_schema(renderer, rebuild=False):
+    """Return (body, etag) of the schema rendered with renderer"""
+    path = _path(renderer)
+    if not rebuild and path in _memory:
+        return _memory[path]
+    with _lock:
+        if not rebuild and path in _memory:
+            return _memory[path]
+        body = None
+        if not rebuild and os.path.exists(path):
+            with open(path, 'rb') as schema_file:
+                body = schema_file.read()
+        if body is None:
+            body = _generate(renderer)
+            _write(path, body)
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        _memory[path] = (body, etag)
+    return _memory[path]
+
+
+def clear():
+    """Forget the in-memory copies (the files stay on disk)"""
+    _memory.clear()
+    code_version.cache_clear()
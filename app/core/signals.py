@@ -0,0 +1,173 @@
+"""
+Signal handlers keeping denormalized recipe data up to date
+"""
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete,
+)
+from django.db.models import F
+from django.dispatch import receiver
+
+from core import stats, sync
+from core.models import Ingredient, Recipe, Tag
+
+TRACKED_FIELDS = ('user_id', 'time_minutes', 'price')
+
+_state = threading.local()
+
+
+@contextmanager
+def bulk_recipe_changes():
+    """Skip per-recipe handlers; the caller refreshes derived data set-based"""
+    previous = handlers_suppressed()
+    _state.suppressed = True
+    try:
+        yield
+    finally:
+        _state.suppressed = previous
+
+
+def handlers_suppressed():
+    return getattr(_state, 'suppressed', False)
+
+
+def _stored_values(instance):
+    loaded = getattr(instance, '_loaded_values', {})
+    return {
+        field: loaded.get(field, getattr(instance, field))
+        for field in TRACKED_FIELDS
+    }
+
+
+def _current_values(instance):
+    return {field: getattr(instance, field) for field in TRACKED_FIELDS}
+
+
+def _remember_values(instance):
+    instance._loaded_values = {
+        **getattr(instance, '_loaded_values', {}), **_current_values(instance)
+    }
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or handlers_suppressed():
+        return
+    current = _current_values(instance)
+    added = [(current['time_minutes'], current['price'])]
+    if created:
+        stats.apply_recipe_changes(current['user_id'], added=added)
+    else:
+        previous = _stored_values(instance)
+        removed = [(previous['time_minutes'], previous['price'])]
+        if previous['user_id'] != current['user_id']:
+            stats.apply_recipe_changes(previous['user_id'], removed=removed)
+            stats.apply_recipe_changes(current['user_id'], added=added)
+        elif previous != current:
+            stats.apply_recipe_changes(
+                current['user_id'], removed=removed, added=added
+            )
+    _remember_values(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    if handlers_suppressed():
+        return
+    previous = _stored_values(instance)
+    stats.apply_recipe_changes(
+        previous['user_id'],
+        removed=[(previous['time_minutes'], previous['price'])],
+    )
+
+
+def _usage_changed(model, field, instance, action, reverse, pk_set):
+    if handlers_suppressed():
+        return
+    if not reverse:
+        # instance is a Recipe and pk_set holds tag/ingredient ids.
+        if action == 'post_add':
+            stats.adjust_usage_counts(model, pk_set, 1)
+        elif action == 'post_remove':
+            stats.refresh_usage_counts(
+                model, model.objects.filter(pk__in=pk_set)
+            )
+        elif action == 'pre_clear':
+            instance.__dict__[f'_cleared_{field}'] = list(
+                getattr(instance, field).values_list('pk', flat=True)
+            )
+        elif action == 'post_clear':
+            cleared = instance.__dict__.pop(f'_cleared_{field}', [])
+            stats.adjust_usage_counts(model, cleared, -1)
+    elif action == 'post_add':
+        # instance is the tag/ingredient and pk_set holds recipe ids.
+        stats.adjust_usage_counts(model, [instance.pk], len(pk_set))
+    elif action in ('post_remove', 'post_clear'):
+        stats.refresh_usage_counts(model, model.objects.filter(pk=instance.pk))
+
+
+def _relations_changed(instance, action, reverse, pk_set):
+    if handlers_suppressed():
+        return
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            sync.touch_recipes([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        sync.touch_recipes(pk_set)
+    elif action == 'pre_clear':
+        # pk_set is not given for clear(), so read the recipes beforehand.
+        sync.touch_recipes(instance.recipe_set.values('pk'))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    _usage_changed(Tag, 'tags', instance, action, reverse, pk_set)
+    _relations_changed(instance, action, reverse, pk_set)
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_ingredients_changed(sender, instance, action, reverse, pk_set,
+                               **kwargs):
+    _usage_changed(
+        Ingredient, 'ingredients', instance, action, reverse, pk_set
+    )
+    _relations_changed(instance, action, reverse, pk_set)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(sender, instance, **kwargs):
+    if handlers_suppressed():
+        return
+    # Through rows are removed by the cascade without m2m_changed.
+    decrement = {'recipe_count': F('recipe_count') - 1}
+    Tag.objects.filter(recipe=instance).update(**decrement)
+    Ingredient.objects.filter(recipe=instance).update(**decrement)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def related_deleting(sender, instance, **kwargs):
+    if handlers_suppressed():
+        return
+    # The cascade drops the through rows without m2m_changed.
+    sync.touch_recipes(instance.recipe_set.values('pk'))
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def leave_tombstone(sender, instance, origin=None, **kwargs):
+    # Recipes pending deletion already have one; rows removed with their
+    # account need none.
+    if handlers_suppressed() or getattr(instance, 'pending_deletion', False):
+        return
+    user_model = get_user_model()
+    if (
+        isinstance(origin, user_model)
+        or getattr(origin, 'model', None) is user_model
+    ):
+        return
+    sync.record_deletions(instance.user_id, sender, [instance.pk])
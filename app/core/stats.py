@@ -0,0 +1,101 @@
+"""
+Maintenance of the per-user RecipeStats summary rows
+"""
+from collections import Counter
+from decimal import Decimal
+
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from core.models import Ingredient, Recipe, RecipeStats, Tag
+
+USAGE_FIELDS = {Tag: 'tags', Ingredient: 'ingredients'}
+
+
+def _bucket_filter(low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+
+def compute_user_stats(user_id):
+    """Aggregate a user's recipes from scratch"""
+    buckets = {
+        field: Count('id', filter=_bucket_filter(low, high))
+        for field, low, high in RecipeStats.PRICE_BUCKETS
+    }
+    recipes = Recipe.objects.filter(user_id=user_id, pending_deletion=False)
+    return recipes.aggregate(
+        recipe_count=Count('id'),
+        total_time_minutes=Coalesce(Sum('time_minutes'), Value(0)),
+        total_price=Coalesce(Sum('price'), Value(Decimal('0.00'))),
+        **buckets,
+    )
+
+
+def rebuild_user_stats(user_id):
+    """Replace a user's summary row with a full aggregation"""
+    stats, _ = RecipeStats.objects.update_or_create(
+        user_id=user_id, defaults=compute_user_stats(user_id)
+    )
+    return stats
+
+
+def _to_python(pairs):
+    # Saved instances keep the values they were given, e.g. '5.00'.
+    return [(int(t), Decimal(str(p))) for t, p in pairs]
+
+
+def apply_recipe_changes(user_id, removed=(), added=()):
+    """Remove and add (time_minutes, price) pairs with a single UPDATE"""
+    removed, added = _to_python(removed), _to_python(added)
+    count = len(added) - len(removed)
+    time_minutes = sum(t for t, _ in added) - sum(t for t, _ in removed)
+    price = sum(p for _, p in added) - sum(p for _, p in removed)
+    buckets = Counter(RecipeStats.price_bucket(p) for _, p in added)
+    buckets.subtract(RecipeStats.price_bucket(p) for _, p in removed)
+
+    updated = RecipeStats.objects.filter(user_id=user_id).update(
+        recipe_count=F('recipe_count') + count,
+        total_time_minutes=F('total_time_minutes') + time_minutes,
+        total_price=F('total_price') + price,
+        **{
+            field: F(field) + delta
+            for field, delta in buckets.items() if delta
+        },
+    )
+    if not updated:
+        # No summary yet: the recipe table already reflects this change.
+        rebuild_user_stats(user_id)
+
+
+def _through_column(model):
+    return f'{model._meta.model_name}_id'
+
+
+def adjust_usage_counts(model, ids, delta):
+    """Shift recipe_count of the given tags or ingredients by delta"""
+    if ids:
+        model.objects.filter(pk__in=ids).update(
+            recipe_count=F('recipe_count') + delta
+        )
+
+
+def refresh_usage_counts(model, queryset=None):
+    """Recount recipe_count from the through table in one UPDATE"""
+    through = getattr(Recipe, USAGE_FIELDS[model]).through
+    column = _through_column(model)
+    counts = through.objects.filter(
+        recipe__pending_deletion=False, **{column: OuterRef('pk')}
+    ).order_by().values(column).annotate(total=Count('*')).values('total')
+    if queryset is None:
+        queryset = model.objects.all()
+    return queryset.update(recipe_count=Coalesce(Subquery(counts), Value(0)))
+
+
+def rebuild_user_usage_counts(user_id):
+    for model in USAGE_FIELDS:
+        refresh_usage_counts(model, model.objects.filter(user_id=user_id))
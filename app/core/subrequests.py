@@ -0,0 +1,235 @@
+"""
+In-process execution of batched API requests.
+
+Each operation is turned into a WSGIRequest and handed straight to the
+view its path resolves to, skipping the HTTP round trip, the middleware
+stack and the token lookup: sub-requests reuse the batch request's user
+through DRF's forced authentication. Throttles and permissions still run
+for every operation.
+
+Strings of the form `$<index>.<field>` in an operation's path or body are
+replaced with a field from the response of an earlier operation, e.g.
+`/api/recipe/recipes/$0.id/upload-image/`.
+"""
+import io
+import json
+import logging
+import re
+import uuid
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.urls import Resolver404, resolve
+from rest_framework.utils.encoders import JSONEncoder
+
+from core import idempotency
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = re.compile(r'\$(\d+)\.([\w.]+)')
+FORWARDED_META = (
+    'SERVER_NAME', 'SERVER_PORT', 'HTTP_HOST', 'REMOTE_ADDR',
+    'HTTP_X_FORWARDED_FOR', 'HTTP_X_FORWARDED_PROTO', 'HTTP_ACCEPT_LANGUAGE',
+    'wsgi.url_scheme',
+)
+FORWARDED_HEADERS = ('Idempotency-Key',)
+RETURNED_HEADERS = ('Location', 'Retry-After', 'Idempotent-Replayed')
+FORM_SCALARS = (str, int, float, bool)
+
+
+class PlaceholderError(Exception):
+    """A placeholder points at an operation that failed or a missing field"""
+
+
+def _lookup(results, index, fields):
+    if index >= len(results) or results[index]['status'] >= 400:
+        raise PlaceholderError(
+            f'Operation {index} has no successful response.'
+        )
+    value = results[index]['body']
+    for field in fields.split('.'):
+        try:
+            if isinstance(value, list):
+                value = value[int(field)]
+            else:
+                value = value[field]
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise PlaceholderError(
+                f'Operation {index} has no field {fields!r}.'
+            )
+    return value
+
+
+def resolve_placeholders(value, results):
+    """Replace placeholders in a (nested) value with earlier response fields"""
+    if isinstance(value, dict):
+        return {
+            key: resolve_placeholders(item, results)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [resolve_placeholders(item, results) for item in value]
+    if not isinstance(value, str):
+        return value
+    match = PLACEHOLDER.fullmatch(value)
+    if match:
+        # A lone placeholder keeps the type of the referenced value.
+        return _lookup(results, int(match.group(1)), match.group(2))
+    return PLACEHOLDER.sub(
+        lambda match: str(
+            _lookup(results, int(match.group(1)), match.group(2))
+        ),
+        value,
+    )
+
+
+def is_form_data(body):
+    """Whether body can be sent as form fields next to uploaded files"""
+    if body is None:
+        return True
+    if not isinstance(body, dict):
+        return False
+    return all(
+        all(isinstance(item, FORM_SCALARS) for item in value)
+        if isinstance(value, list) else isinstance(value, FORM_SCALARS)
+        for value in body.values()
+    )
+
+
+def _multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        for item in value if isinstance(value, list) else [value]:
+            parts.append(
+                f'--{boundary}\r\n'
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f'{item}\r\n'.encode()
+            )
+    for name, upload in files.items():
+        upload.seek(0)
+        content_type = upload.content_type or 'application/octet-stream'
+        parts.append(
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{name}"; '
+            f'filename="{upload.name}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode()
+            + upload.read() + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return f'multipart/form-data; boundary={boundary}', b''.join(parts)
+
+
+def build_request(request, method, path, body=None, files=None,
+                  headers=None):
+    """WSGIRequest for one operation, authenticated as the batch's user"""
+    path, _, query = path.partition('?')
+    if files:
+        content_type, content = _multipart(body or {}, files)
+    elif body is not None and method != 'GET':
+        content_type = 'application/json'
+        content = json.dumps(body, cls=JSONEncoder).encode()
+    else:
+        content_type, content = '', b''
+
+    environ = {
+        key: request.META[key] for key in FORWARDED_META
+        if key in request.META
+    }
+    environ.update({
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': content_type,
+        'CONTENT_LENGTH': str(len(content)),
+        'wsgi.input': io.BytesIO(content),
+    })
+    for name, value in (headers or {}).items():
+        if name in FORWARDED_HEADERS:
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+    sub_request = WSGIRequest(environ)
+    # Read by rest_framework.request.Request in place of the authenticators.
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def _allowed(path):
+    return path.startswith(tuple(settings.BATCH_ALLOWED_PATHS))
+
+
+def _result(status, body, response=None):
+    headers = {}
+    if response is not None:
+        headers = {
+            name: response[name] for name in RETURNED_HEADERS
+            if response.has_header(name)
+        }
+    return {'status': status, 'headers': headers, 'body': body}
+
+
+def run_operation(request, operation, results):
+    """Execute one operation and return its status, headers and body"""
+    try:
+        path = resolve_placeholders(operation['path'], results)
+        body = resolve_placeholders(operation.get('body'), results)
+    except PlaceholderError as exc:
+        return _result(424, {'detail': str(exc)})
+    if not _allowed(path.partition('?')[0]):
+        return _result(
+            403, {'detail': 'This path is not available in a batch.'}
+        )
+    if operation.get('files') and not is_form_data(body):
+        # A placeholder may have put an object into a form field.
+        return _result(
+            400, {'detail': 'Form fields must be plain values.'}
+        )
+    try:
+        match = resolve(path.partition('?')[0])
+    except Resolver404:
+        return _result(404, {'detail': 'Not found.'})
+
+    sub_request = build_request(
+        request, operation['method'], path, body,
+        operation.get('files'), operation.get('headers'),
+    )
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception(
+            'Batch operation %s %s failed', operation['method'], path
+        )
+        return _result(500, {'detail': 'Server error.'})
+    return _result(
+        response.status_code, getattr(response, 'data', None), response
+    )
+
+
+def run(request, operations, atomic=False):
+    """
+    Execute operations in order, returning (results, committed).
+
+    With atomic, all operations share one transaction and the first
+    failing one rolls back the batch; the rest are not run.
+    """
+    results = []
+    if not atomic:
+        for operation in operations:
+            results.append(run_operation(request, operation, results))
+        return results, True
+
+    committed = True
+    with transaction.atomic():
+        for operation in operations:
+            result = run_operation(request, operation, results)
+            results.append(result)
+            if result['status'] >= 400:
+                transaction.set_rollback(True)
+                committed = False
+                break
+    if not committed:
+        # Free the Idempotency-Keys of the rolled back operations.
+        idempotency.forget_rolled_back()
+    return results, committed
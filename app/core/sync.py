@@ -0,0 +1,136 @@
+"""
+Change feed for offline clients.
+
+Recipes, tags and ingredients carry an `updated_at` timestamp and every
+deletion leaves a Tombstone, so a client holding a cursor downloads only
+what changed since. The four streams are read in (timestamp, kind, id)
+order from the per-user indexes and merged into pages of at most `limit`
+rows, so the cost of a sync follows the number of changes.
+
+`auto_now` stamps a row when it is saved, not when its transaction
+commits. Rows younger than SYNC_LAG are therefore held back, or a slow
+transaction could commit a timestamp behind a cursor already handed out.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Ingredient, Recipe, Tag, Tombstone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MAX_ID = 2 ** 63 - 1
+KINDS = {
+    Recipe: Tombstone.RECIPE,
+    Tag: Tombstone.TAG,
+    Ingredient: Tombstone.INGREDIENT,
+}
+STREAMS = ('recipes', 'tags', 'ingredients', 'deleted')
+
+
+class CursorExpired(Exception):
+    """The cursor predates the retained tombstones; sync from scratch"""
+
+
+def encode_cursor(moment, stream, row_id):
+    micros = (moment - EPOCH) // timedelta(microseconds=1)
+    return f'{micros}-{stream}-{row_id}'
+
+
+def decode_cursor(cursor):
+    """Return (timestamp, stream, id); raise ValueError when malformed"""
+    micros, stream, row_id = (int(part) for part in cursor.split('-'))
+    try:
+        moment = EPOCH + timedelta(microseconds=micros)
+    except OverflowError:
+        raise ValueError(f'Cursor timestamp out of range: {micros}')
+    # len(STREAMS) marks a caught-up cursor, see changes_since.
+    if stream > len(STREAMS) or row_id > MAX_ID:
+        raise ValueError(f'Cursor position out of range: {cursor}')
+    return moment, stream, row_id
+
+
+def record_deletions(user_id, model, ids):
+    """Leave tombstones for deleted rows of a synced model"""
+    Tombstone.objects.bulk_create([
+        Tombstone(user_id=user_id, kind=KINDS[model], object_id=object_id)
+        for object_id in ids
+    ])
+
+
+def touch_recipes(ids):
+    """Move recipes to the end of the feed after a change that skips save()"""
+    Recipe.objects.filter(id__in=ids).update(updated_at=timezone.now())
+
+
+def _streams(user):
+    """(queryset, timestamp field) per entry of STREAMS"""
+    return [
+        (Recipe.objects.filter(
+            user=user, pending_deletion=False
+        ).prefetch_related('tags', 'ingredients'), 'updated_at'),
+        (Tag.objects.filter(user=user), 'updated_at'),
+        (Ingredient.objects.filter(user=user), 'updated_at'),
+        (Tombstone.objects.filter(user=user), 'deleted_at'),
+    ]
+
+
+def _after(field, stream, cursor):
+    moment, cursor_stream, cursor_id = cursor
+    if stream > cursor_stream:
+        return Q(**{f'{field}__gte': moment})
+    if stream == cursor_stream:
+        return (
+            Q(**{f'{field}__gt': moment})
+            | Q(**{field: moment, 'id__gt': cursor_id})
+        )
+    return Q(**{f'{field}__gt': moment})
+
+
+def changes_since(user, cursor=None, limit=None, now=None):
+    """
+    One page of the user's changes after cursor (from the start when None).
+
+    Returns a dict with the changed recipes, tags and ingredients, the
+    deleted ids per kind, the cursor for the next call and whether more
+    changes are waiting.
+    """
+    now = now or timezone.now()
+    limit = limit or settings.SYNC_PAGE_SIZE
+    position = decode_cursor(cursor) if cursor else None
+    if position and position[0] < now - settings.SYNC_TOMBSTONE_RETENTION:
+        raise CursorExpired(cursor)
+
+    upper = now - settings.SYNC_LAG
+    rows = []
+    for stream, (queryset, field) in enumerate(_streams(user)):
+        queryset = queryset.filter(**{f'{field}__lte': upper})
+        if position:
+            queryset = queryset.filter(_after(field, stream, position))
+        # One extra row per stream tells whether anything is left.
+        for obj in queryset.order_by(field, 'id')[:limit + 1]:
+            rows.append((getattr(obj, field), stream, obj.id, obj))
+    rows.sort(key=lambda row: row[:3])
+
+    page = {name: [] for name in STREAMS}
+    for _, stream, _, obj in rows[:limit]:
+        page[STREAMS[stream]].append(obj)
+    deleted = {kind: [] for kind in KINDS.values()}
+    for tombstone in page['deleted']:
+        deleted[tombstone.kind].append(tombstone.object_id)
+    page['deleted'] = deleted
+    page['has_more'] = len(rows) > limit
+    if page['has_more']:
+        page['cursor'] = encode_cursor(*rows[limit - 1][:3])
+    else:
+        # Caught up: everything up to `upper` has been sent, so the cursor
+        # moves on even when nothing changed and never goes stale.
+        page['cursor'] = encode_cursor(upper, len(STREAMS), 0)
+    return page
+
+
+def expired_tombstones(now=None):
+    """Tombstones older than the retention window, removed by core.purge"""
+    cutoff = (now or timezone.now()) - settings.SYNC_TOMBSTONE_RETENTION
+    return Tombstone.objects.filter(deleted_at__lt=cutoff)
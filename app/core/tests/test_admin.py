@@ -1,10 +1,29 @@
 """Test for django admin modifications"""
+from decimal import Decimal
+from unittest.mock import patch
 
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import Client
 
+from core.models import Ingredient, Recipe, Tag
+from core.paginators import EstimatedCountPaginator
+
+# The tests run without collectstatic, so there is no manifest to read.
+PLAIN_STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+
+@override_settings(STORAGES=PLAIN_STORAGES)
 class AdminSiteTests(TestCase):
     
     def setUp(self):
@@ -40,4 +59,110 @@ class AdminSiteTests(TestCase):
         res = self.client.get(url)
         
         self.assertEqual(res.status_code, 200)
-        
\ No newline at end of file
+        
+
+@override_settings(STORAGES=PLAIN_STORAGES)
+class LargeTableAdminTests(TestCase):
+    """Test the recipe, tag and ingredient admins"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testtestuser'
+        )
+        self.client.force_login(self.admin_user)
+        self.tags = [
+            Tag.objects.create(user=self.admin_user, name=f'Unused tag {i}')
+            for i in range(3)
+        ]
+        self.recipe = Recipe.objects.create(
+            user=self.admin_user, title='Pancakes', time_minutes=10,
+            price=Decimal('3.00'),
+        )
+        self.recipe.tags.add(self.tags[0])
+    
+    def test_recipe_change_form_does_not_list_all_tags(self):
+        url = reverse('admin:core_recipe_change', args=[self.recipe.id])
+        res = self.client.get(url)
+        
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, self.tags[0].name)
+        self.assertNotContains(res, self.tags[1].name)
+    
+    def test_recipe_changelist_query_count_is_bounded(self):
+        url = reverse('admin:core_recipe_changelist')
+        self.client.get(url)
+        for i in range(5):
+            Recipe.objects.create(
+                user=self.admin_user, title=f'Extra {i}', time_minutes=5,
+                price=Decimal('1.00'),
+            )
+        
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as after:
+            res = self.client.get(url)
+        
+        self.assertContains(res, 'Extra 4')
+        self.assertEqual(len(before), len(after))
+    
+    def test_prefix_search(self):
+        url = reverse('admin:core_recipe_changelist')
+        Recipe.objects.create(
+            user=self.admin_user, title='Crepes with Pancakes',
+            time_minutes=5, price=Decimal('1.00'),
+        )
+        
+        res = self.client.get(url, {'q': 'Pan'})
+        
+        self.assertContains(res, 'Pancakes')
+        self.assertNotContains(res, 'Crepes with Pancakes')
+    
+    def test_ingredient_admin_registered(self):
+        ingredient = Ingredient.objects.create(
+            user=self.admin_user, name='Flour'
+        )
+        
+        res = self.client.get(reverse('admin:core_ingredient_changelist'))
+        
+        self.assertContains(res, ingredient.name)
+    
+    def test_tag_autocomplete(self):
+        res = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'core', 'model_name': 'recipe',
+            'field_name': 'tags', 'term': 'Unused tag 1',
+        })
+        
+        self.assertEqual(
+            [item['text'] for item in res.json()['results']],
+            ['Unused tag 1'],
+        )
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    """Test the paginator only trusts estimates for large results"""
+    
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            'count@example.com', 'testtestuser'
+        )
+        for i in range(3):
+            Tag.objects.create(user=user, name=f'Tag {i}')
+    
+    def test_exact_count_without_estimate(self):
+        paginator = EstimatedCountPaginator(Tag.objects.order_by('id'), 2)
+        
+        self.assertEqual(paginator.count, 3)
+    
+    @patch('core.paginators.estimate_count', return_value=2500000)
+    def test_large_estimate_used(self, mock_estimate):
+        paginator = EstimatedCountPaginator(Tag.objects.order_by('id'), 100)
+        
+        self.assertEqual(paginator.count, 2500000)
+    
+    @patch('core.paginators.estimate_count', return_value=40)
+    def test_small_estimate_counted_exactly(self, mock_estimate):
+        paginator = EstimatedCountPaginator(Tag.objects.order_by('id'), 100)
+        
+        self.assertEqual(paginator.count, 3)
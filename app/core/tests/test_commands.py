@@ -2,31 +2,77 @@
 Test custom Django management commands
 """
 
+from io import StringIO
 from unittest.mock import patch
 from psycopg2 import OperationalError as Psycopg2Error
-from django.core.management import call_command
+from django.core.management import CommandError, call_command
 from django.db.utils import OperationalError
 from django.test import SimpleTestCase
 import time
 
-@patch('core.management.commands.wait_for_db.Command.check')
+@patch('core.management.commands.wait_for_db.Command.probe')
 class CommandTests(SimpleTestCase):
     """Test commands"""
     
-    def test_wait_for_db_ready(self, patched_check):
+    def test_wait_for_db_ready(self, patched_probe):
         """Test Wait for db for database is ready"""
-        patched_check.return_value = True
+        patched_probe.return_value = None
+        out = StringIO()
         
-        call_command("wait_for_db")
+        call_command("wait_for_db", stdout=out)
         
-        patched_check.assert_called_once_with(databases = ['default'])
+        patched_probe.assert_called_once_with('default')
+        self.assertIn(
+            'database=default status=ready attempts=1', out.getvalue()
+        )
     
     @patch('time.sleep')
-    def test_wiat_for_db_delay(self, patched_sleep, patched_check):
-        patched_check.side_effect = [Psycopg2Error] * 2 + [OperationalError] * 3 + [True]
+    def test_wiat_for_db_delay(self, patched_sleep, patched_probe):
+        patched_probe.side_effect = (
+            [Psycopg2Error] * 2 + [OperationalError] * 3 + [None]
+        )
         
-        call_command("wait_for_db")
+        call_command("wait_for_db", stdout=StringIO())
         
-        self.assertEqual(patched_check.call_count, 6)
+        self.assertEqual(patched_probe.call_count, 6)
         self.assertEqual(patched_sleep.call_count, 5)
-        patched_check.assert_called_with(databases = ['default'])
+        patched_probe.assert_called_with('default')
+    
+    @patch('time.sleep')
+    def test_backoff_grows_with_jitter(self, patched_sleep, patched_probe):
+        patched_probe.side_effect = [OperationalError] * 5 + [None]
+        
+        call_command(
+            "wait_for_db", initial_delay=0.1, max_delay=0.8, stdout=StringIO()
+        )
+        
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        for delay, base in zip(delays, [0.1, 0.2, 0.4, 0.8, 0.8]):
+            self.assertGreaterEqual(delay, base / 2)
+            self.assertLessEqual(delay, base)
+    
+    def test_deadline(self, patched_probe):
+        patched_probe.side_effect = OperationalError('connection refused')
+        out = StringIO()
+        started = time.monotonic()
+        
+        with self.assertRaises(CommandError):
+            call_command(
+                "wait_for_db", timeout=0.2, initial_delay=0.05, stdout=out
+            )
+        
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertIn('status=timeout', out.getvalue())
+        self.assertIn("error='connection refused'", out.getvalue())
+    
+    def test_multiple_databases(self, patched_probe):
+        patched_probe.return_value = None
+        
+        call_command(
+            "wait_for_db", databases=['default', 'other'], stdout=StringIO()
+        )
+        
+        self.assertEqual(
+            sorted(call.args[0] for call in patched_probe.call_args_list),
+            ['default', 'other'],
+        )
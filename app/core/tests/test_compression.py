@@ -0,0 +1,99 @@
+"""
+Tests for the response compression middleware
+"""
+import gzip
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import compression
+from core.compression import CompressionMiddleware, choose_encoding
+
+BODY = b'{"title": "Roast chicken", "tags": []}' * 100
+
+
+def respond(response, accept_encoding='gzip, br', method='get'):
+    request = getattr(RequestFactory(), method)(
+        '/', HTTP_ACCEPT_ENCODING=accept_encoding
+    )
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+@override_settings(
+    COMPRESSION_MIN_SIZE=1024,
+    COMPRESSION_GZIP_LEVEL=5,
+    COMPRESSION_BROTLI_QUALITY=5,
+)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test negotiation and the skip rules"""
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_negotiation(self):
+        self.assertEqual(choose_encoding('gzip, br'), 'br')
+        self.assertEqual(choose_encoding('gzip;q=1.0, br;q=0.5'), 'gzip')
+        self.assertEqual(choose_encoding('br;q=0, gzip;q=0'), None)
+        self.assertEqual(choose_encoding('*'), 'br')
+        self.assertEqual(choose_encoding('identity'), None)
+
+    @patch('core.compression.brotli', None)
+    def test_gzip_without_brotli(self):
+        res = respond(HttpResponse(BODY, content_type='application/json'))
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), BODY)
+        self.assertEqual(res['Content-Length'], str(len(res.content)))
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_brotli(self):
+        res = respond(
+            HttpResponse(BODY, content_type='application/json'), 'br'
+        )
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(res.content), BODY)
+
+    def test_small_body_skipped(self):
+        res = respond(HttpResponse(b'{}', content_type='application/json'))
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(res.content, b'{}')
+
+    def test_encoded_and_binary_bodies_skipped(self):
+        encoded = HttpResponse(BODY, content_type='application/json')
+        encoded['Content-Encoding'] = 'gzip'
+        image = HttpResponse(BODY, content_type='image/jpeg')
+
+        self.assertEqual(respond(encoded).content, BODY)
+        self.assertFalse(respond(image).has_header('Content-Encoding'))
+
+    def test_strong_etag_weakened(self):
+        response = HttpResponse(BODY, content_type='application/json')
+        response['ETag'] = '"abc"'
+
+        self.assertEqual(respond(response, 'gzip')['ETag'], 'W/"abc"')
+
+    def test_streaming(self):
+        response = StreamingHttpResponse(
+            (BODY for _ in range(5)), content_type='application/json'
+        )
+
+        res = respond(response, 'gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertFalse(res.has_header('Content-Length'))
+        self.assertEqual(
+            gzip.decompress(b''.join(res.streaming_content)), BODY * 5
+        )
+
+    def test_benchmark_command(self):
+        out = StringIO()
+
+        call_command('benchmark_compression', recipes=20, repeat=1, stdout=out)
+
+        self.assertIn('gzip', out.getvalue())
+        self.assertIn('Median of 1 runs', out.getvalue())
@@ -0,0 +1,92 @@
+"""
+Tests for database connection reuse metrics
+"""
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db import metrics
+from core.db.backends.postgresql.base import DatabaseWrapper
+
+DB_STATS_URL = reverse('db-connections')
+
+
+def make_wrapper():
+    settings_dict = {
+        'ENGINE': 'core.db.backends.postgresql',
+        'NAME': 'metrics', 'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '',
+        'OPTIONS': {}, 'TIME_ZONE': None, 'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True, 'AUTOCOMMIT': True,
+        'ATOMIC_REQUESTS': False,
+        'TEST': {},
+    }
+    return DatabaseWrapper(settings_dict, alias='metrics')
+
+
+class ConnectionMetricsTests(SimpleTestCase):
+    """Test the instrumented PostgreSQL wrapper"""
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_new_connection_counted(self):
+        wrapper = make_wrapper()
+        with patch(
+            'django.db.backends.postgresql.base.'
+            'DatabaseWrapper.get_new_connection'
+        ):
+            wrapper.get_new_connection({})
+
+        stats = metrics.snapshot()['databases']['metrics']
+        self.assertEqual(stats['opened'], 1)
+        self.assertEqual(stats['open'], 1)
+
+    def test_reuse_and_health_check_failures_counted(self):
+        wrapper = make_wrapper()
+        wrapper.connection = MagicMock()
+        wrapper.health_check_enabled = True
+
+        with patch.object(wrapper, 'is_usable', return_value=True):
+            wrapper.close_if_health_check_failed()
+        wrapper.health_check_done = False
+        with patch.object(wrapper, 'is_usable', return_value=False):
+            wrapper.close_if_health_check_failed()
+
+        stats = metrics.snapshot()['databases']['metrics']
+        self.assertEqual(stats['reused'], 1)
+        self.assertEqual(stats['health_check_failures'], 1)
+        self.assertEqual(stats['closed'], 1)
+        self.assertIsNone(wrapper.connection)
+
+
+class ConnectionStatsApiTests(TestCase):
+    """Test the connection stats endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_requires_admin(self):
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'testtestuser'
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(DB_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_admin_gets_stats(self):
+        admin = get_user_model().objects.create_superuser(
+            'admin@example.com', 'testtestuser'
+        )
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(DB_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('pid', res.data)
+        self.assertIn('databases', res.data)
@@ -0,0 +1,106 @@
+"""
+Tests for primary/replica database routing
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db import replicas
+from core.db.routers import PrimaryReplicaRouter
+from core.models import Recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica_1', 'replica_2'],
+    REPLICA_HEALTH_CHECK_SECONDS=5,
+)
+class RouterTests(SimpleTestCase):
+    """Test the router decisions"""
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        replicas._health.clear()
+
+    def test_reads_use_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_writes_use_primary(self):
+        with replicas.replica_reads():
+            self.assertEqual(self.router.db_for_write(Recipe), 'default')
+
+    @patch('core.db.replicas._probe', return_value=True)
+    def test_replica_reads(self, patched_probe):
+        with replicas.replica_reads():
+            alias = self.router.db_for_read(Recipe)
+
+        self.assertIn(alias, ['replica_1', 'replica_2'])
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    @patch(
+        'core.db.replicas._probe',
+        side_effect=lambda alias: alias == 'replica_2',
+    )
+    def test_unhealthy_replica_skipped(self, patched_probe):
+        with replicas.replica_reads():
+            aliases = {self.router.db_for_read(Recipe) for _ in range(10)}
+
+        self.assertEqual(aliases, {'replica_2'})
+
+    @patch('core.db.replicas._probe', return_value=False)
+    def test_fallback_to_primary(self, patched_probe):
+        with replicas.replica_reads():
+            self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    @patch('core.db.replicas._probe', return_value=True)
+    def test_health_is_cached(self, patched_probe):
+        replicas.is_healthy('replica_1')
+        replicas.is_healthy('replica_1')
+
+        self.assertEqual(patched_probe.call_count, 1)
+
+    def test_no_migrations_on_replicas(self):
+        self.assertTrue(self.router.allow_migrate('default', 'core'))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'core'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_STICKY_SECONDS=30)
+@patch('core.db.replicas.choose_replica', return_value='default')
+class ReplicaStickinessApiTests(TestCase):
+    """Test viewsets route reads and pin writers to the primary"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'replica@example.com', 'testtestuser'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_safe_request_reads_replica(self, patched_choose):
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(patched_choose.called)
+        self.assertFalse(replicas.replica_reads_enabled())
+
+    def test_write_pins_user_to_primary(self, patched_choose):
+        payload = {
+            'title': 'Pinned', 'time_minutes': 5, 'price': Decimal('1.00'),
+        }
+        res = self.client.post(RECIPES_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(replicas.is_pinned(self.user))
+
+        patched_choose.reset_mock()
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data), 1)
+        patched_choose.assert_not_called()
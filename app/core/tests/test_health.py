@@ -0,0 +1,73 @@
+"""
+Tests for the probe endpoints and worker warmup
+"""
+import tempfile
+from unittest.mock import patch
+
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+
+from core import health, schema
+from core.warmup import STEPS, warmup
+
+
+@override_settings(READINESS_CACHE_SECONDS=60)
+class HealthCheckTests(TestCase):
+    """Test /healthz and /readyz"""
+
+    def setUp(self):
+        health.reset()
+        self.addCleanup(health.reset)
+
+    def test_healthz_without_database(self):
+        with self.assertNumQueries(0):
+            res = self.client.get('/healthz')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    def test_healthz_skips_session_middleware(self):
+        res = self.client.get('/healthz', HTTP_HOST='10.0.0.5')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('Vary', res)
+
+    def test_readyz_result_is_cached(self):
+        with self.assertNumQueries(1):
+            first = self.client.get('/readyz')
+            second = self.client.get('/readyz/')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+
+    def test_readyz_database_down(self):
+        error = OperationalError('password authentication failed for "app"')
+        with patch('core.health.connection.cursor', side_effect=error):
+            with self.assertLogs('core.health', level='WARNING') as logs:
+                res = self.client.get('/readyz')
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json(), {'status': 'unavailable'})
+        self.assertIn('password authentication failed', logs.output[0])
+
+
+class WarmupTests(TestCase):
+    """Test the warmup steps run and never raise"""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        override = override_settings(SCHEMA_CACHE_DIR=tmp_dir.name)
+        override.enable()
+        self.addCleanup(tmp_dir.cleanup)
+        self.addCleanup(override.disable)
+        self.addCleanup(schema.clear)
+
+    def test_all_steps_timed(self):
+        timings = warmup()
+
+        self.assertEqual(list(timings), [name for name, _ in STEPS])
+
+    @patch('core.warmup.get_resolver', side_effect=RuntimeError('boom'))
+    def test_failing_step_logged(self, patched_resolver):
+        with self.assertLogs('core.warmup', 'ERROR'):
+            warmup()
@@ -0,0 +1,158 @@
+"""
+Tests for the database-backed job queue
+"""
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job, Recipe
+from core.purge import PURGE_JOB, request_account_deletion
+
+calls = []
+
+
+@jobs.task('tests.record')
+def record(value=None):
+    calls.append(value)
+    return {'value': value}
+
+
+@jobs.task('tests.fail', max_attempts=2)
+def fail():
+    raise RuntimeError('boom')
+
+
+@override_settings(
+    JOB_RETRY_BACKOFF=10, JOB_RETRY_BACKOFF_MAX=25, JOB_LOCK_TIMEOUT=60
+)
+class JobQueueTests(TestCase):
+    """Test enqueueing, claiming, retries and the worker command"""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_unknown_job(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue('tests.missing')
+
+    def test_enqueue_unique(self):
+        first = jobs.enqueue('tests.record', unique=True)
+        second = jobs.enqueue('tests.record', unique=True)
+
+        self.assertEqual(first, second)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_claim_skips_future_and_claimed_jobs(self):
+        ready = jobs.enqueue('tests.record')
+        jobs.enqueue(
+            'tests.record', run_at=timezone.now() + timedelta(hours=1)
+        )
+
+        claimed = jobs.claim('w1', limit=5)
+
+        self.assertEqual(claimed, [ready])
+        self.assertEqual(claimed[0].status, Job.RUNNING)
+        self.assertEqual(claimed[0].attempts, 1)
+        self.assertEqual(jobs.claim('w2', limit=5), [])
+
+    def test_run_success(self):
+        job = jobs.enqueue('tests.record', {'value': 3})
+
+        jobs.run(jobs.claim('w1')[0])
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result, {'value': 3})
+        self.assertEqual(job.locked_by, '')
+
+    def test_retry_with_backoff_then_fail(self):
+        job = jobs.enqueue('tests.fail')
+        now = timezone.now()
+
+        jobs.run(jobs.claim('w1', now=now)[0])
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreaterEqual(job.run_at, now + timedelta(seconds=10))
+        self.assertEqual(job.error, 'RuntimeError: boom')
+
+        jobs.run(jobs.claim('w1', now=job.run_at)[0])
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_retry_delay_is_capped(self):
+        self.assertEqual(
+            [jobs.retry_delay(n) for n in (1, 2, 3)], [10, 20, 25]
+        )
+
+    def test_stale_running_job_requeued(self):
+        earlier = timezone.now() - timedelta(minutes=5)
+        job = jobs.enqueue('tests.record', run_at=earlier)
+        jobs.claim('w1', now=earlier)
+
+        self.assertEqual(jobs.requeue_stale(), 1)
+
+        self.assertEqual(jobs.claim('w2')[0].id, job.id)
+
+    def test_stale_job_out_of_attempts_failed(self):
+        earlier = timezone.now() - timedelta(minutes=5)
+        job = jobs.enqueue('tests.fail', run_at=earlier)
+        Job.objects.filter(id=job.id).update(attempts=1)
+        jobs.claim('w1', now=earlier)
+
+        self.assertEqual(jobs.requeue_stale(), 0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(job.error, jobs.STALE_ERROR)
+        self.assertEqual(jobs.claim('w2'), [])
+
+    def test_traceback_logged_not_stored(self):
+        job = jobs.enqueue('tests.fail')
+
+        with self.assertLogs('core.jobs', level='WARNING') as logs:
+            jobs.run(jobs.claim('w1')[0])
+
+        job.refresh_from_db()
+        self.assertNotIn('Traceback', job.error)
+        self.assertIn('Traceback', logs.output[0])
+
+    def test_run_worker_burst(self):
+        for value in range(3):
+            jobs.enqueue('tests.record', {'value': value})
+        out = StringIO()
+
+        with patch('core.management.commands.run_worker.signal.signal'):
+            call_command('run_worker', burst=True, concurrency=1, stdout=out)
+
+        self.assertEqual(calls, [0, 1, 2])
+        self.assertIn('stopped after 3 jobs', out.getvalue())
+        self.assertEqual(Job.objects.filter(status=Job.SUCCEEDED).count(), 3)
+
+    def test_account_deletion_queues_purge(self):
+        user = get_user_model().objects.create_user(
+            'jobs@example.com', 'testtestuser'
+        )
+        Recipe.objects.create(
+            user=user, title='Soup', time_minutes=5, price=Decimal('1.00')
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            request_account_deletion(user)
+
+        job = Job.objects.get(name=PURGE_JOB)
+        jobs.run(jobs.claim('w1')[0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result, {'recipes': 1, 'users': 1})
+        self.assertFalse(Recipe.objects.exists())
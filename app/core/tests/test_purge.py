@@ -0,0 +1,126 @@
+"""
+Tests for deferred deletion of recipes and accounts
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import stats
+from core.models import Ingredient, Recipe, RecipeStats, Tag
+from core.purge import purge_pending, request_account_deletion
+
+
+def create_recipes(user, count, tag):
+    recipes = [
+        Recipe.objects.create(
+            user=user, title=f'Recipe {i}', time_minutes=5,
+            price=Decimal('2.00'),
+        )
+        for i in range(count)
+    ]
+    for recipe in recipes:
+        recipe.tags.add(tag)
+    return recipes
+
+
+class PurgeTests(TestCase):
+    """Test recipes and accounts are hidden first and purged in chunks"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'purge@example.com', 'testtestuser'
+        )
+        self.tag = Tag.objects.create(user=self.user, name='Quick')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_deleted_recipe_hidden_until_purged(self):
+        recipes = create_recipes(self.user, 2, self.tag)
+
+        res = self.client.delete(
+            reverse('recipe:recipe-detail', args=[recipes[0].id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(Recipe.objects.filter(
+            id=recipes[0].id, pending_deletion=True
+        ).exists())
+        res = self.client.get(reverse('recipe:recipe-list'))
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data], [recipes[1].id]
+        )
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 1)
+        user_stats = RecipeStats.objects.get(user=self.user)
+        self.assertEqual(user_stats.recipe_count, 1)
+
+        list(purge_pending())
+
+        self.assertEqual(list(Recipe.objects.all()), [recipes[1]])
+        self.assertEqual(list(self.tag.recipe_set.all()), [recipes[1]])
+
+    def test_purge_account_in_chunks(self):
+        create_recipes(self.user, 5, self.tag)
+        Ingredient.objects.create(user=self.user, name='Salt')
+        other = get_user_model().objects.create_user(
+            'keep@example.com', 'testtestuser'
+        )
+        kept = create_recipes(
+            other, 1, Tag.objects.create(user=other, name='Kept')
+        )
+        request_account_deletion(self.user)
+
+        steps = list(purge_pending(chunk_size=2))
+
+        self.assertEqual(steps, [
+            ('recipes', 2), ('recipes', 2), ('recipes', 1),
+            ('tags', 1), ('ingredients', 1), ('users', 1),
+        ])
+        self.assertFalse(
+            get_user_model().objects.filter(id=self.user.id).exists()
+        )
+        self.assertEqual(list(Recipe.objects.all()), kept)
+        self.assertEqual(Tag.objects.get(user=other).recipe_count, 1)
+
+    def test_purge_resumes_after_interruption(self):
+        create_recipes(self.user, 5, self.tag)
+        request_account_deletion(self.user)
+
+        chunks = list(purge_pending(chunk_size=2, max_chunks=2))
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(Recipe.objects.count(), 1)
+
+        out = StringIO()
+        call_command('purge_pending_deletions', chunk_size=2, stdout=out)
+
+        self.assertIn('Purged 1 recipes, 1 tags, 1 users', out.getvalue())
+        self.assertFalse(
+            get_user_model().objects.filter(id=self.user.id).exists()
+        )
+
+    def test_closed_account_cannot_log_in(self):
+        request_account_deletion(self.user)
+
+        res = APIClient().post(
+            reverse('user:token'),
+            {'email': 'purge@example.com', 'password': 'testtestuser'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_pending_recipes_excluded_from_usage_counts(self):
+        recipes = create_recipes(self.user, 3, self.tag)
+        Recipe.objects.filter(id=recipes[0].id).update(pending_deletion=True)
+
+        stats.refresh_usage_counts(Tag)
+
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 2)
+        computed = stats.compute_user_stats(self.user.id)
+        self.assertEqual(computed['recipe_count'], 2)
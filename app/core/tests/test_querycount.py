@@ -0,0 +1,99 @@
+"""
+Tests for the duplicate query detector
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.core.exceptions import MiddlewareNotUsed
+
+from core import querycount
+from core.models import Tag
+
+
+class FingerprintTests(SimpleTestCase):
+    """Test SQL normalization"""
+
+    def test_literals_normalized(self):
+        a = querycount.fingerprint(
+            "SELECT * FROM t WHERE id = 1 AND name = 'x'"
+        )
+        b = querycount.fingerprint(
+            "SELECT  *  FROM t WHERE id = 42 AND name = 'it''s'"
+        )
+
+        self.assertEqual(a, b)
+
+    def test_in_lists_normalized(self):
+        a = querycount.fingerprint('SELECT * FROM t WHERE id IN (%s, %s)')
+        b = querycount.fingerprint(
+            'SELECT * FROM t WHERE id IN (%s, %s, %s, %s)'
+        )
+
+        self.assertEqual(a, b)
+        self.assertIn('IN (...)', a)
+
+    def test_different_shapes_differ(self):
+        a = querycount.fingerprint('SELECT * FROM t WHERE id = %s')
+        b = querycount.fingerprint('SELECT * FROM t WHERE name = %s')
+
+        self.assertNotEqual(a, b)
+
+
+class QueryCounterTests(querycount.QueryCountAssertionsMixin, TestCase):
+    """Test query counting and the assertion mixin"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'querycount@example.com', 'testtestuser'
+        )
+        for name in ['a', 'b', 'c', 'd']:
+            Tag.objects.create(user=self.user, name=name)
+
+    def test_counts_repeated_statements(self):
+        with querycount.QueryCounter(using='default') as counter:
+            for tag in Tag.objects.all():
+                Tag.objects.get(id=tag.id)
+
+        self.assertEqual(counter.total, 5)
+        duplicates = counter.duplicates(threshold=2)
+        self.assertEqual(list(duplicates.values()), [4])
+
+    def test_assertion_fails_on_n_plus_one(self):
+        with self.assertRaises(AssertionError):
+            with self.assertNoDuplicateQueries():
+                for tag in Tag.objects.all():
+                    tag.user.email
+
+    def test_assertion_passes_with_select_related(self):
+        with self.assertNoDuplicateQueries():
+            for tag in Tag.objects.select_related('user'):
+                tag.user.email
+
+
+class DuplicateQueryMiddlewareTests(TestCase):
+    """Test the debug middleware"""
+
+    def _view(self, request):
+        for _ in range(3):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        return HttpResponse('ok')
+
+    @override_settings(DEBUG=False)
+    def test_disabled_without_debug(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            querycount.DuplicateQueryMiddleware(self._view)
+
+    @override_settings(DEBUG=True, QUERY_DUPLICATE_THRESHOLD=2)
+    def test_logs_duplicates(self):
+        middleware = querycount.DuplicateQueryMiddleware(self._view)
+        request = RequestFactory().get('/api/recipe/recipes/')
+
+        with self.assertLogs('core.querycount', level='WARNING') as logs:
+            middleware(request)
+
+        self.assertIn('3x SELECT ?', logs.output[0])
+        self.assertIn('test_querycount.py', logs.output[0])
@@ -0,0 +1,85 @@
+"""
+Tests for the cached OpenAPI schema
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import schema
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class CachedSchemaTests(TestCase):
+    """Test the schema is generated once and served with validators"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        override = override_settings(
+            SCHEMA_CACHE_DIR=self.tmp_dir.name, APP_VERSION='test-1'
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(self.tmp_dir.cleanup)
+        schema.clear()
+        self.addCleanup(schema.clear)
+        self.client = APIClient()
+
+    def test_generated_once_and_cached_on_disk(self):
+        with patch(
+            'core.schema._generate', wraps=schema._generate
+        ) as generate:
+            first = self.client.get(SCHEMA_URL)
+            second = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.content, second.content)
+        self.assertIn(b'openapi:', first.content)
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(first['Cache-Control'], 'public, max-age=300')
+        self.assertEqual(len(os.listdir(self.tmp_dir.name)), 1)
+
+    def test_not_modified(self):
+        etag = self.client.get(SCHEMA_URL)['ETag']
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.content, b'')
+
+    def test_json_format(self):
+        res = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertEqual(
+            res['Content-Type'], 'application/vnd.oai.openapi+json'
+        )
+        self.assertIn('paths', json.loads(res.content))
+
+    def test_new_version_regenerates(self):
+        self.client.get(SCHEMA_URL)
+        schema.clear()
+
+        with override_settings(APP_VERSION='test-2'), patch(
+            'core.schema._generate', wraps=schema._generate
+        ) as generate:
+            self.client.get(SCHEMA_URL)
+
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(len(os.listdir(self.tmp_dir.name)), 2)
+
+    def test_build_command_fills_disk_cache(self):
+        call_command('build_schema', stdout=StringIO())
+        schema.clear()
+
+        with patch('core.schema._generate') as generate:
+            res = self.client.get(SCHEMA_URL)
+
+        generate.assert_not_called()
+        self.assertEqual(res.status_code, 200)
@@ -0,0 +1,228 @@
+"""
+Tests for change tracking and the delta sync feed
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import sync
+from core.models import Ingredient, Recipe, Tag, Tombstone
+from core.purge import purge_pending, request_account_deletion
+from recipe import batch
+
+
+def create_recipe(user, **params):
+    return Recipe.objects.create(
+        user=user, title=params.pop('title', 'Soup'), time_minutes=5,
+        price=Decimal('2.00'), **params
+    )
+
+
+@override_settings(SYNC_LAG=timedelta(0))
+class ChangesSinceTests(TestCase):
+    """Test cursors, paging and what ends up in the feed"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'sync@example.com', 'testtestuser'
+        )
+
+    def drain(self, cursor=None, limit=2):
+        """Follow the cursor to the end, returning every page"""
+        pages = []
+        while True:
+            page = sync.changes_since(self.user, cursor, limit)
+            pages.append(page)
+            cursor = page['cursor']
+            if not page['has_more']:
+                return pages
+
+    def test_cursor_round_trip(self):
+        moment = timezone.now()
+
+        cursor = sync.encode_cursor(moment, 2, 7)
+
+        self.assertEqual(sync.decode_cursor(cursor), (moment, 2, 7))
+
+    def test_malformed_cursor(self):
+        with self.assertRaises(ValueError):
+            sync.decode_cursor('nope')
+
+    def test_out_of_range_cursor(self):
+        for cursor in [
+            '99999999999999999999-0-0', f'0-{len(sync.STREAMS) + 1}-0',
+            f'0-0-{2 ** 63}',
+        ]:
+            with self.assertRaises(ValueError):
+                sync.decode_cursor(cursor)
+
+    def test_pages_cover_every_change_once(self):
+        tag = Tag.objects.create(user=self.user, name='Quick')
+        recipes = [
+            create_recipe(self.user, title=f'Recipe {i}') for i in range(3)
+        ]
+        Ingredient.objects.create(user=self.user, name='Salt')
+
+        pages = self.drain()
+
+        self.assertEqual(len(pages), 3)
+        self.assertTrue(all(
+            sum(
+                len(page[name]) for name in ('recipes', 'tags', 'ingredients')
+            ) <= 2
+            for page in pages
+        ))
+        synced = [recipe for page in pages for recipe in page['recipes']]
+        self.assertCountEqual(synced, recipes)
+        self.assertEqual([t for page in pages for t in page['tags']], [tag])
+
+    def test_only_changes_after_cursor(self):
+        recipe = create_recipe(self.user)
+        other = create_recipe(self.user, title='Other')
+        cursor = self.drain()[-1]['cursor']
+
+        recipe.title = 'Renamed'
+        recipe.save()
+        page = sync.changes_since(self.user, cursor)
+
+        self.assertEqual(page['recipes'], [recipe])
+        self.assertNotIn(other, page['recipes'])
+
+    def test_cursor_advances_without_changes(self):
+        page = sync.changes_since(self.user, None)
+        again = sync.changes_since(
+            self.user, page['cursor'],
+            now=timezone.now() + timedelta(minutes=1),
+        )
+
+        self.assertGreater(
+            sync.decode_cursor(again['cursor']),
+            sync.decode_cursor(page['cursor']),
+        )
+
+    def test_tag_change_touches_recipe(self):
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Quick')
+        cursor = self.drain()[-1]['cursor']
+
+        recipe.tags.add(tag)
+        page = sync.changes_since(self.user, cursor)
+
+        self.assertEqual(page['recipes'], [recipe])
+
+    def test_reverse_clear_touches_recipes(self):
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Quick')
+        recipe.tags.add(tag)
+        cursor = self.drain()[-1]['cursor']
+
+        tag.recipe_set.clear()
+        page = sync.changes_since(self.user, cursor)
+
+        self.assertEqual(page['recipes'], [recipe])
+
+    def test_batch_changes_touch_recipes(self):
+        recipes = [
+            create_recipe(self.user, title=f'Recipe {i}') for i in range(2)
+        ]
+        tag = Tag.objects.create(user=self.user, name='Quick')
+        cursor = self.drain()[-1]['cursor']
+
+        batch.change_relations(
+            self.user, [recipes[0].id], 'tags', add=[tag.id]
+        )
+        batch.update_recipes(self.user, [recipes[1].id], {'title': 'New'})
+        page = sync.changes_since(self.user, cursor)
+
+        self.assertCountEqual(page['recipes'], recipes)
+
+    def test_deletions_leave_tombstones(self):
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Quick')
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        cursor = self.drain()[-1]['cursor']
+
+        deleted = {
+            'recipe': [recipe.id],
+            'tag': [tag.id],
+            'ingredient': [ingredient.id],
+        }
+
+        batch.delete_recipes(self.user, [recipe.id])
+        tag.delete()
+        ingredient.delete()
+        page = sync.changes_since(self.user, cursor)
+
+        self.assertEqual(page['deleted'], deleted)
+        self.assertEqual(page['recipes'], [])
+
+    def test_purged_recipe_gets_one_tombstone(self):
+        recipe = create_recipe(self.user)
+        batch.delete_recipes(self.user, [recipe.id])
+
+        list(purge_pending())
+
+        self.assertEqual(
+            Tombstone.objects.filter(object_id=recipe.id).count(), 1
+        )
+
+    def test_merge_leaves_tombstones_for_sources(self):
+        target = Tag.objects.create(user=self.user, name='Quick')
+        source = Tag.objects.create(user=self.user, name='Fast')
+        recipe = create_recipe(self.user)
+        recipe.tags.add(source)
+        cursor = self.drain()[-1]['cursor']
+
+        batch.merge_related(self.user, 'tags', target, [source.id])
+        page = sync.changes_since(self.user, cursor)
+
+        self.assertEqual(page['deleted']['tag'], [source.id])
+        self.assertEqual(page['recipes'], [recipe])
+
+    def test_account_deletion_leaves_no_tombstones(self):
+        create_recipe(self.user)
+        Tag.objects.create(user=self.user, name='Quick')
+
+        request_account_deletion(self.user)
+        list(purge_pending())
+
+        self.assertFalse(
+            get_user_model().objects.filter(id=self.user.id).exists()
+        )
+        self.assertFalse(Tombstone.objects.exists())
+
+    @override_settings(SYNC_LAG=timedelta(seconds=5))
+    def test_recent_changes_held_back(self):
+        create_recipe(self.user)
+
+        page = sync.changes_since(self.user, None)
+
+        self.assertEqual(page['recipes'], [])
+        page = sync.changes_since(
+            self.user, None, now=timezone.now() + timedelta(seconds=5)
+        )
+        self.assertEqual(len(page['recipes']), 1)
+
+    def test_expired_cursor(self):
+        cursor = sync.encode_cursor(timezone.now() - timedelta(days=31), 0, 1)
+
+        with self.assertRaises(sync.CursorExpired):
+            sync.changes_since(self.user, cursor)
+
+    def test_expired_tombstones_purged(self):
+        old = Tombstone.objects.create(
+            user=self.user, kind=Tombstone.TAG, object_id=1,
+            deleted_at=timezone.now() - timedelta(days=31),
+        )
+        recent = Tombstone.objects.create(
+            user=self.user, kind=Tombstone.TAG, object_id=2
+        )
+
+        steps = list(purge_pending())
+
+        self.assertIn(('tombstones', 1), steps)
+        self.assertFalse(Tombstone.objects.filter(id=old.id).exists())
+        self.assertTrue(Tombstone.objects.filter(id=recent.id).exists())
@@ -0,0 +1,52 @@
+"""
+Tests for cache backed token buckets
+"""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.throttling import TokenBucket, record_rejection, rejection_counts
+
+
+@patch('core.throttling.time')
+class TokenBucketTests(SimpleTestCase):
+    """Test token bucket semantics"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_burst_then_reject(self, patched_time):
+        patched_time.time.return_value = 1000.0
+        bucket = TokenBucket('test', capacity=3, rate=1)
+
+        waits = [bucket.consume() for _ in range(4)]
+
+        self.assertEqual(waits[:3], [0, 0, 0])
+        self.assertAlmostEqual(waits[3], 1.0)
+
+    def test_refill_over_time(self, patched_time):
+        patched_time.time.return_value = 1000.0
+        bucket = TokenBucket('test', capacity=2, rate=0.5)
+        bucket.consume()
+        bucket.consume()
+        self.assertGreater(bucket.consume(), 0)
+
+        patched_time.time.return_value = 1002.0
+
+        self.assertEqual(bucket.consume(), 0)
+        self.assertGreater(bucket.consume(), 0)
+
+
+class RejectionCountTests(SimpleTestCase):
+    """Test rejection counters"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rejection_counts(self):
+        record_rejection('a')
+        record_rejection('a')
+        record_rejection('b')
+
+        self.assertEqual(rejection_counts(), {'a': 2, 'b': 1})
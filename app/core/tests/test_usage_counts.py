@@ -0,0 +1,90 @@
+"""
+Tests for denormalized tag and ingredient usage counters
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core import stats
+from core.models import Ingredient, Recipe, Tag
+
+
+def create_recipe(user, title='Recipe'):
+    return Recipe.objects.create(
+        user=user, title=title, time_minutes=5, price=Decimal('2.00')
+    )
+
+
+class UsageCountTests(TestCase):
+    """Test recipe_count follows the through tables"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'usage@example.com', 'testtestuser'
+        )
+        self.tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(3)
+        ]
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name='Salt'
+        )
+        self.r1 = create_recipe(self.user, 'One')
+        self.r2 = create_recipe(self.user, 'Two')
+
+    def assertCountsConsistent(self):
+        expected = {
+            tag.id: tag.recipe_set.count() for tag in Tag.objects.all()
+        }
+        actual = dict(Tag.objects.values_list('id', 'recipe_count'))
+        self.assertEqual(actual, expected)
+        self.ingredient.refresh_from_db()
+        self.assertEqual(
+            self.ingredient.recipe_count, self.ingredient.recipe_set.count()
+        )
+
+    def test_add_remove_clear(self):
+        self.r1.tags.add(*self.tags)
+        self.r1.tags.add(self.tags[0])
+        self.r2.tags.add(self.tags[0])
+        self.r1.ingredients.add(self.ingredient)
+        self.assertCountsConsistent()
+        self.tags[0].refresh_from_db()
+        self.assertEqual(self.tags[0].recipe_count, 2)
+
+        unused = Tag.objects.create(user=self.user, name='Unused')
+        self.r1.tags.remove(self.tags[1], unused)
+        self.assertCountsConsistent()
+
+        self.r1.tags.clear()
+        self.assertCountsConsistent()
+
+    def test_reverse_side(self):
+        self.tags[0].recipe_set.add(self.r1, self.r2)
+        self.assertCountsConsistent()
+
+        self.tags[0].recipe_set.remove(self.r1)
+        self.assertCountsConsistent()
+
+        self.tags[0].recipe_set.clear()
+        self.assertCountsConsistent()
+
+    def test_recipe_delete(self):
+        self.r1.tags.add(*self.tags)
+        self.r2.tags.add(self.tags[0])
+        self.r1.ingredients.add(self.ingredient)
+
+        self.r1.delete()
+        self.assertCountsConsistent()
+
+        Recipe.objects.all().delete()
+        self.assertCountsConsistent()
+
+    def test_refresh_fixes_drift(self):
+        self.r1.tags.add(self.tags[0])
+        Tag.objects.update(recipe_count=99)
+
+        stats.rebuild_user_usage_counts(self.user.id)
+
+        self.assertCountsConsistent()
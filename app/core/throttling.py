@@ -0,0 +1,133 @@
+"""
+Token bucket rate limiting backed by the Django cache.
+
+Bucket state lives in the cache so every uWSGI worker sees the same budget
+(given a shared cache backend). Updates are read-modify-write, so a burst of
+concurrent requests may let a few extra through; that is acceptable for
+load protection.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import BaseThrottle
+
+REJECTED_KEY = 'throttle:rejected:{}'
+REJECTED_SCOPES_KEY = 'throttle:rejected-scopes'
+
+
+class TokenBucket:
+    """Bucket holding up to `capacity` tokens refilled at `rate` per second"""
+
+    def __init__(self, key, capacity, rate):
+        self.key = f'bucket:{key}'
+        self.capacity = capacity
+        self.rate = rate
+
+    def _refilled(self, now):
+        tokens, updated = cache.get(self.key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def consume(self, tokens=1):
+        """Take tokens from the bucket; return the seconds to wait if empty"""
+        now = time.time()
+        available = self._refilled(now)
+        if available < tokens:
+            return (tokens - available) / self.rate
+        available -= tokens
+        ttl = (self.capacity - available) / self.rate
+        cache.set(self.key, (available, now), timeout=max(int(ttl) + 1, 1))
+        return 0
+
+    def reset(self):
+        cache.delete(self.key)
+
+
+class BucketThrottle(BaseThrottle):
+    """
+    DRF throttle drawing one token per request from a per-client bucket.
+
+    Rates come from API_THROTTLE_RATES as (capacity, refill per second);
+    a scope mapped to None is not throttled.
+    """
+
+    def get_scope(self, request, view):
+        raise NotImplementedError('.get_scope() must be overridden')
+
+    def get_client(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(request, view)
+        if scope is None:
+            return True
+        try:
+            rate = settings.API_THROTTLE_RATES[scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f'No API_THROTTLE_RATES entry for scope {scope!r}'
+            )
+        if rate is None:
+            return True
+        bucket = TokenBucket(f'api:{scope}:{self.get_client(request)}', *rate)
+        wait = bucket.consume()
+        if wait:
+            record_rejection(scope)
+            self.wait_seconds = wait
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserBucketThrottle(BucketThrottle):
+    """Overall request budget per user (per IP for anonymous requests)"""
+
+    def get_scope(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return 'user'
+        return 'anon'
+
+
+class ActionBucketThrottle(BucketThrottle):
+    """
+    Separate budget for expensive actions.
+
+    Views name the scope with `get_throttle_scope()` or a `throttle_scopes`
+    mapping from viewset action to scope; other requests pass.
+    """
+
+    def get_scope(self, request, view):
+        if hasattr(view, 'get_throttle_scope'):
+            return view.get_throttle_scope()
+        scopes = getattr(view, 'throttle_scopes', {})
+        return scopes.get(getattr(view, 'action', None))
+
+
+def record_rejection(scope):
+    """Count a throttled request for the given scope"""
+    key = REJECTED_KEY.format(scope)
+    if cache.add(key, 1, timeout=None):
+        scopes = cache.get(REJECTED_SCOPES_KEY, set())
+        scopes.add(scope)
+        cache.set(REJECTED_SCOPES_KEY, scopes, timeout=None)
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def rejection_counts():
+    """Return the number of throttled requests per scope"""
+    scopes = cache.get(REJECTED_SCOPES_KEY, set())
+    counts = cache.get_many([REJECTED_KEY.format(scope) for scope in scopes])
+    return {
+        scope: counts.get(REJECTED_KEY.format(scope), 0)
+        for scope in sorted(scopes)
+    }
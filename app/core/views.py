@@ -0,0 +1,55 @@
+"""
+Views for operational endpoints
+"""
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import schema, throttling
+from core.db import metrics
+from user.authentication import ExpiringTokenAuthentication
+
+
+class DatabaseConnectionStatsView(APIView):
+    """Connection reuse counters of the worker serving the request"""
+
+    authentication_classes = [ExpiringTokenAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.snapshot())
+
+
+class ThrottleStatsView(APIView):
+    """Number of throttled requests per scope"""
+
+    authentication_classes = [ExpiringTokenAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(throttling.rejection_counts())
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """OpenAPI schema served from the per-version cache with an ETag"""
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('lang') or request.GET.get('version'):
+            return super().get(request, *args, **kwargs)
+        body, etag = schema.get_schema(request.accepted_renderer)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                body, content_type=request.accepted_renderer.media_type
+            )
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True, max_age=settings.SCHEMA_CACHE_MAX_AGE
+        )
+        return response
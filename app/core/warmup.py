@@ -0,0 +1,93 @@
+"""
+Per-worker warmup run when the WSGI application is loaded.
+
+uWSGI runs with --lazy-apps, so this happens in every worker after the
+fork: the database connection opened here belongs to that worker alone.
+Each step primes something the first request would otherwise pay for.
+"""
+import importlib
+import inspect
+import logging
+import time
+
+from django.apps import apps
+from django.db import DatabaseError, connections
+from django.urls import get_resolver
+from drf_spectacular.renderers import OpenApiYamlRenderer
+from rest_framework import serializers
+
+from core import schema
+
+logger = logging.getLogger(__name__)
+
+
+def _resolve_urls():
+    resolver = get_resolver()
+    # Building the reverse dictionary compiles every URL pattern.
+    return len(resolver.reverse_dict)
+
+
+def _build_serializers():
+    built = 0
+    for app_config in apps.get_app_configs():
+        try:
+            module = importlib.import_module(f'{app_config.name}.serializers')
+        except ImportError:
+            continue
+        for _, cls in inspect.getmembers(module, inspect.isclass):
+            if (
+                not issubclass(cls, serializers.Serializer)
+                or cls.__module__ != module.__name__
+            ):
+                continue
+            try:
+                # Field construction populates the model _meta caches.
+                cls().fields
+            except Exception:
+                continue
+            built += 1
+    return built
+
+
+def _connect_databases():
+    connected = 0
+    for alias in connections:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            logger.warning('Warmup could not connect to database %s', alias)
+            continue
+        connected += 1
+    return connected
+
+
+def _load_schema():
+    body, _ = schema.get_schema(OpenApiYamlRenderer())
+    return len(body)
+
+
+STEPS = (
+    ('urls', _resolve_urls),
+    ('serializers', _build_serializers),
+    ('databases', _connect_databases),
+    ('schema', _load_schema),
+)
+
+
+def warmup():
+    """Run every warmup step; failures are logged, never raised"""
+    timings = {}
+    for name, step in STEPS:
+        started = time.monotonic()
+        try:
+            step()
+        except Exception:
+            logger.exception('Warmup step %s failed', name)
+        timings[name] = time.monotonic() - started
+    logger.info(
+        'Warmup finished: %s',
+        ', '.join(
+            f'{name} {seconds:.3f}s' for name, seconds in timings.items()
+        ),
+    )
+    return timings
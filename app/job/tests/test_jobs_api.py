@@ -0,0 +1,66 @@
+"""
+Tests for the job status API
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Job
+
+JOBS_URL = reverse('job:job-list')
+
+
+def detail_url(job_id):
+    return reverse('job:job-detail', args=[job_id])
+
+
+class PublicJobApiTests(TestCase):
+    """Test unauthenticated API requests"""
+
+    def test_auth_required(self):
+        res = APIClient().get(JOBS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateJobApiTests(TestCase):
+    """Test authenticated API requests"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'job@example.com', 'testtestuser'
+        )
+        self.other = get_user_model().objects.create_user(
+            'other@example.com', 'testtestuser'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_limited_to_user(self):
+        mine = Job.objects.create(name='core.purge_pending', user=self.user)
+        Job.objects.create(name='core.purge_pending', user=self.other)
+
+        res = self.client.get(JOBS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([job['id'] for job in res.data], [mine.id])
+
+    def test_filter_by_status(self):
+        Job.objects.create(name='core.purge_pending', user=self.user)
+        failed = Job.objects.create(
+            name='core.purge_pending', user=self.user, status=Job.FAILED
+        )
+
+        res = self.client.get(JOBS_URL, {'status': Job.FAILED})
+
+        self.assertEqual([job['id'] for job in res.data], [failed.id])
+
+    def test_retrieve_other_users_job_not_found(self):
+        job = Job.objects.create(name='core.purge_pending', user=self.other)
+
+        res = self.client.get(detail_url(job.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,40 @@
+"""Views for job API"""
+from drf_spectacular.utils import (
+    extend_schema_view, extend_schema, OpenApiParameter, OpenApiTypes,
+)
+from rest_framework import viewsets
+from rest_framework.permissions import IsAuthenticated
+
+from core.models import Job
+from job import serializers
+from user.authentication import ExpiringTokenAuthentication
+
+
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'status',
+                OpenApiTypes.STR,
+                enum=[value for value, _ in Job.STATUS_CHOICES],
+                description='Only jobs in this state'
+            )
+        ]
+    )
+)
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status of background jobs started by the user (all jobs for staff)"""
+    
+    serializer_class = serializers.JobSerializer
+    queryset = Job.objects.all()
+    authentication_classes = [ExpiringTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = self.queryset
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        status = self.request.query_params.get('status')
+        if status:
+            queryset = queryset.filter(status=status)
+        return queryset.order_by('-id')
@@ -0,0 +1,131 @@
+"""
+Set-based bulk operations on a user's recipes.
+
+Deleted recipes are only marked as pending here; core.purge removes the
+rows and their through rows later in bounded chunks.
+
+Per-recipe signal handlers are suppressed while a batch runs; derived data
+(recipe stats, tag/ingredient usage counts, the similarity index) is
+refreshed once per batch instead, so the number of statements does not
+grow with the batch size. The similarity index is only invalidated once
+the batch commits, so no worker rebuilds it from the old rows.
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from core import purge, stats, sync
+from core.models import Ingredient, Recipe, Tag
+from core.signals import bulk_recipe_changes
+from recipe import similarity
+
+RELATIONS = {'tags': Tag, 'ingredients': Ingredient}
+
+
+def _related_ids(field, recipe_ids):
+    through = getattr(Recipe, field).through
+    column = f'{RELATIONS[field]._meta.model_name}_id'
+    return set(through.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list(column, flat=True).distinct())
+
+
+def _owned_recipes(user, ids):
+    return Recipe.objects.filter(user=user, id__in=ids, pending_deletion=False)
+
+
+def _owned_recipe_ids(user, ids):
+    return list(_owned_recipes(user, ids).values_list('id', flat=True))
+
+
+def delete_recipes(user, ids):
+    """Mark the user's recipes among ids as deleted; return how many"""
+    with transaction.atomic(), bulk_recipe_changes():
+        recipe_ids = _owned_recipe_ids(user, ids)
+        if not recipe_ids:
+            return 0
+        affected = {
+            field: _related_ids(field, recipe_ids) for field in RELATIONS
+        }
+        Recipe.objects.filter(id__in=recipe_ids).update(pending_deletion=True)
+        sync.record_deletions(user.id, Recipe, recipe_ids)
+        purge.schedule_purge()
+        for field, model in RELATIONS.items():
+            if affected[field]:
+                stats.refresh_usage_counts(
+                    model, model.objects.filter(id__in=affected[field])
+                )
+        stats.rebuild_user_stats(user.id)
+        transaction.on_commit(lambda: similarity.invalidate(user.id))
+    return len(recipe_ids)
+
+
+def change_relations(user, ids, field, add=(), remove=()):
+    """Add/remove tags or ingredients on the user's recipes among ids"""
+    model = RELATIONS[field]
+    through = getattr(Recipe, field).through
+    column = f'{model._meta.model_name}_id'
+    with transaction.atomic(), bulk_recipe_changes():
+        recipe_ids = _owned_recipe_ids(user, ids)
+        if recipe_ids and remove:
+            through.objects.filter(
+                recipe_id__in=recipe_ids, **{f'{column}__in': remove}
+            ).delete()
+        if recipe_ids and add:
+            through.objects.bulk_create(
+                [through(recipe_id=recipe_id, **{column: related_id})
+                 for recipe_id in recipe_ids for related_id in add],
+                ignore_conflicts=True,
+            )
+        changed = set(add) | set(remove)
+        if recipe_ids and changed:
+            stats.refresh_usage_counts(
+                model, model.objects.filter(id__in=changed)
+            )
+            sync.touch_recipes(recipe_ids)
+        if recipe_ids:
+            transaction.on_commit(lambda: similarity.invalidate(user.id))
+    return len(recipe_ids)
+
+
+def update_recipes(user, ids, values):
+    """Set the same field values on the user's recipes among ids"""
+    with transaction.atomic(), bulk_recipe_changes():
+        updated = _owned_recipes(user, ids).update(
+            **values, updated_at=timezone.now()
+        )
+        if updated and {'time_minutes', 'price'} & set(values):
+            stats.rebuild_user_stats(user.id)
+    return updated
+
+
+def merge_related(user, field, target, source_ids):
+    """Repoint recipes from source tags/ingredients to target; drop sources"""
+    model = RELATIONS[field]
+    through = getattr(Recipe, field).through
+    column = f'{model._meta.model_name}_id'
+    with transaction.atomic(), bulk_recipe_changes():
+        sources = list(model.objects.filter(
+            user=user, id__in=source_ids
+        ).exclude(id=target.id).values_list('id', flat=True))
+        if not sources:
+            return 0
+        rows = through.objects.filter(**{f'{column}__in': sources})
+        recipe_ids = list(rows.values_list('recipe_id', flat=True).distinct())
+        # Keep one row per recipe: drop it when the recipe already has the
+        # target or a lower-numbered source that will become the target.
+        has_target = through.objects.filter(
+            recipe_id=OuterRef('recipe_id'), **{column: target.id}
+        )
+        has_lower_source = through.objects.filter(
+            recipe_id=OuterRef('recipe_id'),
+            **{f'{column}__in': sources, f'{column}__lt': OuterRef(column)},
+        )
+        rows.filter(Exists(has_target) | Exists(has_lower_source)).delete()
+        rows.update(**{column: target.id})
+        model.objects.filter(id__in=sources).delete()
+        sync.record_deletions(user.id, model, sources)
+        sync.touch_recipes(recipe_ids)
+        stats.refresh_usage_counts(model, model.objects.filter(id=target.id))
+        transaction.on_commit(lambda: similarity.invalidate(user.id))
+    return len(sources)
@@ -1,8 +1,9 @@
 """Serializers for recipe API"""
 
 from rest_framework import serializers
-from core.models import Recipe, Tag, Ingredient
+from core.models import Recipe, RecipeStats, Tag, Ingredient
 from django.contrib.auth import get_user_model
+from django.conf import settings
 
 class TagSerializer(serializers.ModelSerializer):
     """Serializer for Tags"""
@@ -74,6 +75,28 @@ class RecipeSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
         
+class SimilarRecipeSerializer(RecipeSerializer):
+    """Recipe with its similarity score to another recipe"""
+    similarity = serializers.FloatField(read_only=True)
+    
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ['similarity']
+        
+class CookableRecipeSerializer(RecipeSerializer):
+    """Recipe with the ingredients missing from a pantry"""
+    missing_count = serializers.SerializerMethodField()
+    missing_ingredients = serializers.ListField(
+        child=serializers.IntegerField(), read_only=True
+    )
+    
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + [
+            'missing_count', 'missing_ingredients',
+        ]
+    
+    def get_missing_count(self, obj) -> int:
+        return len(obj.missing_ingredients)
+        
 class RecipeDetailSerializer(RecipeSerializer):
     """Serializer for recipe detail view"""
     
@@ -85,4 +108,128 @@ class RecipeImageSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = ['id', 'image']
         read_only_fields = ['id']
-        extra_kwargs = {'image': {'required': True}}
\ No newline at end of file
+        extra_kwargs = {'image': {'required': True}}
+
+class RecipeUsageSerializer(serializers.Serializer):
+    """Tag or ingredient with the number of recipes using it"""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    recipe_count = serializers.IntegerField()
+
+
+class RecipeStatsSerializer(serializers.ModelSerializer):
+    """Serializer for a user's recipe statistics"""
+    average_time_minutes = serializers.SerializerMethodField()
+    average_price = serializers.SerializerMethodField()
+    price_distribution = serializers.SerializerMethodField()
+    top_tags = RecipeUsageSerializer(many=True, read_only=True)
+    top_ingredients = RecipeUsageSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = RecipeStats
+        fields = [
+            'recipe_count', 'average_time_minutes', 'average_price',
+            'price_distribution', 'top_tags', 'top_ingredients',
+        ]
+        read_only_fields = fields
+    
+    def get_average_time_minutes(self, obj):
+        if not obj.recipe_count:
+            return None
+        return round(obj.total_time_minutes / obj.recipe_count, 2)
+    
+    def get_average_price(self, obj):
+        if not obj.recipe_count:
+            return None
+        return str(round(obj.total_price / obj.recipe_count, 2))
+    
+    def get_price_distribution(self, obj):
+        return [
+            {'min': low, 'max': high, 'count': getattr(obj, field)}
+            for field, low, high in RecipeStats.PRICE_BUCKETS
+        ]
+
+
+class RecipeBatchSerializer(serializers.Serializer):
+    """Ids of the recipes a batch operation applies to"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False
+    )
+    
+    def validate_ids(self, value):
+        if len(value) > settings.RECIPE_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'At most {settings.RECIPE_BATCH_MAX_SIZE} recipes per batch.'
+            )
+        return list(dict.fromkeys(value))
+
+
+class RecipeBatchRelationSerializer(RecipeBatchSerializer):
+    """Tags or ingredients to add to and remove from a batch of recipes"""
+    add = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list
+    )
+
+    def _validate_related(self, value):
+        if len(value) > settings.RECIPE_BATCH_MAX_RELATED:
+            raise serializers.ValidationError(
+                f'At most {settings.RECIPE_BATCH_MAX_RELATED} ids per batch.'
+            )
+        return list(dict.fromkeys(value))
+
+    def validate_add(self, value):
+        return self._validate_related(value)
+
+    def validate_remove(self, value):
+        return self._validate_related(value)
+
+    def validate(self, attrs):
+        model = self.context['related_model']
+        requested = set(attrs['add']) | set(attrs['remove'])
+        owned = set(model.objects.filter(
+            user=self.context['request'].user, id__in=requested
+        ).values_list('id', flat=True))
+        errors = {}
+        for field in ('add', 'remove'):
+            unknown = sorted(set(attrs[field]) - owned)
+            if unknown:
+                errors[field] = f'Unknown ids: {unknown}'
+        if errors:
+            raise serializers.ValidationError(errors)
+        if not requested:
+            raise serializers.ValidationError('Nothing to add or remove.')
+        return attrs
+
+
+class RecipeBatchUpdateSerializer(RecipeBatchSerializer,
+                                  serializers.ModelSerializer):
+    """Field values applied to every recipe of a batch"""
+    
+    class Meta:
+        model = Recipe
+        fields = [
+            'ids', 'title', 'time_minutes', 'price', 'link', 'description',
+        ]
+        extra_kwargs = {field: {'required': False} for field in fields[1:]}
+    
+    def validate(self, attrs):
+        if len(attrs) == 1:
+            raise serializers.ValidationError('No fields to update.')
+        return attrs
+
+
+class MergeSerializer(serializers.Serializer):
+    """Ids of the tags or ingredients merged into another one"""
+    sources = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False
+    )
+
+    def validate_sources(self, value):
+        if len(value) > settings.RECIPE_BATCH_MAX_RELATED:
+            raise serializers.ValidationError(
+                f'At most {settings.RECIPE_BATCH_MAX_RELATED} ids per merge.'
+            )
+        return list(dict.fromkeys(value))
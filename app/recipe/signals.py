@@ -0,0 +1,39 @@
+"""
+Signal handlers invalidating the recipe similarity index
+"""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Ingredient, Recipe, Tag
+from core.signals import handlers_suppressed
+from recipe import similarity
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and not handlers_suppressed():
+        similarity.invalidate(instance.user_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    if not handlers_suppressed():
+        similarity.invalidate(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_features_changed(sender, instance, action, **kwargs):
+    changed = action in ('post_add', 'post_remove', 'post_clear')
+    if changed and not handlers_suppressed():
+        similarity.invalidate(instance.user_id)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def feature_deleted(sender, instance, **kwargs):
+    # The cascade removes the through rows without sending m2m_changed.
+    if not handlers_suppressed():
+        user_id = instance.user_id
+        transaction.on_commit(lambda: similarity.invalidate(user_id))
@@ -0,0 +1,184 @@
+"""
+In-memory recipe similarity index.
+
+Each user's recipes are encoded as packed bitsets of their ingredient and
+tag ids, built lazily from the through tables and cached per process. Each
+bit column doubles as an inverted list (ingredient -> recipes), so both
+similarity and pantry matching are a single vectorized pass. A
+version stamp in the Django cache is bumped whenever the user's recipes or
+their tags/ingredients change, so every worker rebuilds on next use.
+"""
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from core.models import Recipe
+
+VERSION_KEY = 'similarity-version:{}'
+
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(packed):
+    """Number of set bits in each row of a packed uint8 matrix"""
+    return _POPCOUNT[packed].sum(axis=-1, dtype=np.int32)
+
+
+def _bit_masks(positions):
+    return (0x80 >> (positions & 7)).astype(np.uint8)
+
+
+class FeatureIndex:
+    """Packed bitsets of one kind of feature (ingredients or tags)"""
+
+    def __init__(self, recipe_ids, pairs):
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        self.feature_ids = np.unique(pairs[:, 1])
+        rows = np.searchsorted(recipe_ids, pairs[:, 0])
+        cols = np.searchsorted(self.feature_ids, pairs[:, 1])
+        width = max((len(self.feature_ids) + 7) // 8, 1)
+        self.bits = np.zeros((len(recipe_ids), width), dtype=np.uint8)
+        np.bitwise_or.at(self.bits, (rows, cols >> 3), _bit_masks(cols))
+        self.sizes = popcount(self.bits)
+
+    def vector(self, feature_ids):
+        """Packed bitset for arbitrary feature ids; unknown ids are ignored"""
+        feature_ids = np.asarray(list(feature_ids), dtype=np.int64)
+        _, positions, _ = np.intersect1d(
+            self.feature_ids, feature_ids, return_indices=True
+        )
+        vector = np.zeros(self.bits.shape[1], dtype=np.uint8)
+        np.bitwise_or.at(vector, positions >> 3, _bit_masks(positions))
+        return vector
+
+    def members(self, row, vector=None):
+        """Feature ids set in a row, optionally excluding those in vector"""
+        bits = self.bits[row] if vector is None else self.bits[row] & ~vector
+        positions = np.flatnonzero(np.unpackbits(bits)[:len(self.feature_ids)])
+        return [int(feature_id) for feature_id in self.feature_ids[positions]]
+
+    def overlap(self, vector):
+        """Size of the intersection of every recipe with the vector"""
+        # Only the bytes set in the query can contribute to the overlap.
+        columns = np.flatnonzero(vector)
+        return popcount(self.bits[:, columns] & vector[columns])
+
+
+class RecipeIndex:
+    """Ingredient and tag bitsets for all recipes of one user"""
+
+    def __init__(self, recipe_ids, ingredient_pairs, tag_pairs, version=None):
+        self.recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+        self.ingredients = FeatureIndex(self.recipe_ids, ingredient_pairs)
+        self.tags = FeatureIndex(self.recipe_ids, tag_pairs)
+        self.version = version
+
+    @classmethod
+    def build(cls, user_id, version=None):
+        recipe_ids = list(
+            Recipe.objects.filter(
+                user_id=user_id, pending_deletion=False
+            ).order_by('id').values_list('id', flat=True)
+        )
+        ingredient_pairs = list(Recipe.ingredients.through.objects.filter(
+            recipe__user_id=user_id, recipe__pending_deletion=False
+        ).values_list('recipe_id', 'ingredient_id'))
+        tag_pairs = list(Recipe.tags.through.objects.filter(
+            recipe__user_id=user_id, recipe__pending_deletion=False
+        ).values_list('recipe_id', 'tag_id'))
+        return cls(recipe_ids, ingredient_pairs, tag_pairs, version)
+
+    def position(self, recipe_id):
+        position = np.searchsorted(self.recipe_ids, recipe_id)
+        if (position >= len(self.recipe_ids)
+                or self.recipe_ids[position] != recipe_id):
+            return None
+        return position
+
+    def similar(self, recipe_id, limit=10):
+        """Return (recipe_id, jaccard) of the most similar other recipes"""
+        position = self.position(recipe_id)
+        if position is None:
+            return []
+        intersection = (
+            self.ingredients.overlap(self.ingredients.bits[position])
+            + self.tags.overlap(self.tags.bits[position])
+        )
+        sizes = self.ingredients.sizes + self.tags.sizes
+        union = sizes + sizes[position] - intersection
+        scores = np.divide(
+            intersection, union,
+            out=np.zeros(len(union), dtype=np.float64), where=union > 0,
+        )
+        scores[position] = 0
+        limit = min(limit, len(scores))
+        if not limit:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [
+            (int(self.recipe_ids[i]), float(scores[i]))
+            for i in top if scores[i] > 0
+        ]
+
+    def cookable(self, pantry_ids, max_missing=0, limit=50):
+        """Recipes makeable from the pantry, missing at most max_missing
+
+        Returns (recipe_id, missing ingredient ids) ordered by fewest missing,
+        then by most ingredients used. Recipes without ingredients are skipped.
+        """
+        ingredients = self.ingredients
+        vector = ingredients.vector(pantry_ids)
+        missing = ingredients.sizes - ingredients.overlap(vector)
+        candidates = np.flatnonzero(
+            (missing <= max_missing) & (ingredients.sizes > 0)
+        )
+        order = np.lexsort((
+            -self.recipe_ids[candidates],
+            -ingredients.sizes[candidates],
+            missing[candidates],
+        ))
+        return [
+            (int(self.recipe_ids[row]), ingredients.members(row, vector))
+            for row in candidates[order[:limit]]
+        ]
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def invalidate(user_id):
+    """Mark a user's index stale in every worker"""
+    cache.set(VERSION_KEY.format(user_id), uuid.uuid4().hex, timeout=None)
+
+
+def current_version(user_id):
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key)
+    return version
+
+
+def get_index(user_id):
+    """Return an up-to-date index for the user, building it if needed"""
+    version = current_version(user_id)
+    with _lock:
+        index = _indexes.get(user_id)
+        if index is not None and index.version == version:
+            _indexes.move_to_end(user_id)
+            return index
+    index = RecipeIndex.build(user_id, version)
+    with _lock:
+        _indexes[user_id] = index
+        _indexes.move_to_end(user_id)
+        while len(_indexes) > settings.SIMILARITY_INDEX_MAX_USERS:
+            _indexes.popitem(last=False)
+    return index
@@ -0,0 +1,146 @@
+"""
+Tests for pantry matching of recipes
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+
+COOKABLE_URL = reverse('recipe:recipe-cookable')
+
+
+def create_recipe(user, title, ingredients):
+    recipe = Recipe.objects.create(
+        user=user, title=title, time_minutes=10, price=Decimal('5.00')
+    )
+    recipe.ingredients.add(*ingredients)
+    return recipe
+
+
+def pantry(*ingredients):
+    return ','.join(str(ingredient.id) for ingredient in ingredients)
+
+
+class CookableApiTests(TestCase):
+    """Test the cookable action"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'pantry@example.com', 'testtestuser'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.rice, self.egg, self.onion, self.chicken = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ['Rice', 'Egg', 'Onion', 'Chicken']
+        ]
+        self.plain_rice = create_recipe(self.user, 'Plain Rice', [self.rice])
+        self.fried_rice = create_recipe(
+            self.user, 'Fried Rice', [self.rice, self.egg, self.onion]
+        )
+        self.biryani = create_recipe(
+            self.user, 'Biryani', [self.rice, self.chicken, self.onion]
+        )
+        Recipe.objects.create(
+            user=self.user, title='Water', time_minutes=1,
+            price=Decimal('0.00'),
+        )
+
+    def test_fully_makeable_only(self):
+        res = self.client.get(
+            COOKABLE_URL, {'pantry': pantry(self.rice, self.egg, self.onion)}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in res.data],
+            [self.fried_rice.id, self.plain_rice.id],
+        )
+        self.assertEqual(res.data[0]['missing_count'], 0)
+
+    def test_max_missing_ranked_by_fewest_missing(self):
+        res = self.client.get(COOKABLE_URL, {
+            'pantry': pantry(self.rice, self.egg), 'max_missing': 1,
+        })
+
+        self.assertEqual(
+            [(r['id'], r['missing_ingredients']) for r in res.data],
+            [(self.plain_rice.id, []), (self.fried_rice.id, [self.onion.id])],
+        )
+
+    def test_other_users_ingredients_ignored(self):
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testtestuser'
+        )
+        other_rice = Ingredient.objects.create(user=other, name='Rice')
+        create_recipe(other, 'Other Rice', [other_rice])
+
+        res = self.client.get(COOKABLE_URL, {'pantry': pantry(other_rice)})
+
+        self.assertEqual(res.data, [])
+
+    def test_limit(self):
+        everything = pantry(self.rice, self.egg, self.onion, self.chicken)
+        res = self.client.get(
+            COOKABLE_URL, {'pantry': everything, 'limit': 2}
+        )
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_index_invalidated_on_ingredient_delete(self):
+        self.client.get(COOKABLE_URL, {'pantry': pantry(self.rice)})
+        url = reverse('recipe:ingredient-detail', args=[self.onion.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(url)
+
+        res = self.client.get(
+            COOKABLE_URL, {'pantry': pantry(self.rice, self.egg)}
+        )
+
+        self.assertEqual(
+            [r['id'] for r in res.data],
+            [self.fried_rice.id, self.plain_rice.id],
+        )
+
+    def test_stale_index_skips_pending_deletion(self):
+        self.client.get(COOKABLE_URL, {'pantry': pantry(self.rice)})
+        # A queryset update sends no signals, so the index is not rebuilt.
+        Recipe.objects.filter(id=self.plain_rice.id).update(
+            pending_deletion=True
+        )
+
+        res = self.client.get(COOKABLE_URL, {'pantry': pantry(self.rice)})
+
+        self.assertEqual(res.data, [])
+
+    def test_invalid_pantry(self):
+        for value in ['a', '1,,2']:
+            res = self.client.get(COOKABLE_URL, {'pantry': value})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('pantry', res.data)
+
+    def test_invalid_numbers(self):
+        for param in ['max_missing', 'limit']:
+            res = self.client.get(
+                COOKABLE_URL, {'pantry': pantry(self.rice), param: 'x'}
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(param, res.data)
+
+    def test_negative_numbers_clamped(self):
+        res = self.client.get(COOKABLE_URL, {
+            'pantry': pantry(self.rice), 'max_missing': -5, 'limit': -1,
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data], [self.plain_rice.id])
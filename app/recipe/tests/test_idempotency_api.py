@@ -0,0 +1,219 @@
+"""
+Tests for Idempotency-Key handling on recipe creation and image upload
+"""
+import io
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import idempotency
+from core.models import Recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+PAYLOAD = {'title': 'Retry Soup', 'time_minutes': 10, 'price': Decimal('4.50')}
+
+
+def image_upload_url(recipe_id):
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+class IdempotencyApiTests(TestCase):
+    """Test retried POSTs with the same key run once"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(
+            'retry@example.com', 'testtestuser'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, key, payload=PAYLOAD, client=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        # Responses are stored once the request's transaction commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            return (client or self.client).post(
+                RECIPES_URL, payload, format='json', **headers
+            )
+
+    def test_retry_replays_first_response(self):
+        first = self.post('key-1')
+        second = self.post('key-1')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_key_reused_for_other_payload(self):
+        self.post('key-1')
+        res = self.post('key-1', {**PAYLOAD, 'title': 'Other'})
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_without_key_not_deduplicated(self):
+        self.post(None)
+        self.post(None)
+
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def test_keys_scoped_per_user(self):
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testtestuser'
+        )
+        client = APIClient()
+        client.force_authenticate(other)
+
+        self.post('key-1')
+        res = self.post('key-1', client=client)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', res)
+        self.assertEqual(Recipe.objects.count(), 2)
+
+    def test_key_usable_after_validation_error(self):
+        first = self.post('key-1', {'title': 'No time'})
+        second = self.post('key-1')
+
+        self.assertEqual(first.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', second)
+
+    def test_key_locked_until_commit(self):
+        key_hash = idempotency.hashlib.sha256(b'key-1').hexdigest()
+        lock_key = idempotency.LOCK_KEY.format(self.user.pk, key_hash)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(
+                RECIPES_URL, PAYLOAD, format='json',
+                HTTP_IDEMPOTENCY_KEY='key-1',
+            )
+            self.assertIsNotNone(cache.get(lock_key))
+        for callback in callbacks:
+            callback()
+
+        self.assertIsNone(cache.get(lock_key))
+
+    def test_key_too_long(self):
+        res = self.post('k' * 256)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_in_flight_duplicate_conflicts(self):
+        key_hash = idempotency.hashlib.sha256(b'key-1').hexdigest()
+        cache.add(
+            idempotency.LOCK_KEY.format(self.user.pk, key_hash),
+            'other-worker',
+        )
+
+        res = self.post('key-1')
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_waiter_replays_response_of_in_flight_request(self):
+        key_hash = idempotency.hashlib.sha256(b'key-1').hexdigest()
+        lock_key = idempotency.LOCK_KEY.format(self.user.pk, key_hash)
+        cache.add(lock_key, 'other-worker')
+        first = self.post('key-2')
+        stored = cache.get(idempotency.RESPONSE_KEY.format(
+            self.user.pk, idempotency.hashlib.sha256(b'key-2').hexdigest()
+        ))
+
+        def finish_other_request(seconds):
+            cache.set(
+                idempotency.RESPONSE_KEY.format(self.user.pk, key_hash),
+                stored,
+            )
+            cache.delete(lock_key)
+
+        with mock.patch(
+            'core.idempotency.time.sleep', side_effect=finish_other_request
+        ) as sleep:
+            res = self.post('key-1')
+
+        sleep.assert_called_once()
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, first.data)
+        self.assertEqual(Recipe.objects.count(), 1)
+
+
+class IdempotentImageUploadTests(TestCase):
+    """Test retried image uploads replay the stored response"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        override = override_settings(MEDIA_ROOT=media_root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = get_user_model().objects.create_user(
+            'upload@example.com', 'testtestuser'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Toast', time_minutes=2,
+            price=Decimal('1.00'),
+        )
+
+    def upload(self, key, color):
+        content = io.BytesIO()
+        Image.new('RGB', (10, 10), color).save(content, format='JPEG')
+        image_file = SimpleUploadedFile(
+            'photo.jpg', content.getvalue(), 'image/jpeg'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                image_upload_url(self.recipe.id), {'image': image_file},
+                format='multipart', HTTP_IDEMPOTENCY_KEY=key,
+            )
+
+    def test_retried_upload_stores_one_file(self):
+        first = self.upload('upload-1', 'red')
+        second = self.upload('upload-1', 'red')
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.recipe.refresh_from_db()
+        image_dir = os.path.dirname(self.recipe.image.path)
+        self.assertEqual(len(os.listdir(image_dir)), 1)
+
+    def test_retry_after_invalid_upload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.client.post(
+                image_upload_url(self.recipe.id), {'image': 'notimage'},
+                format='multipart', HTTP_IDEMPOTENCY_KEY='upload-1',
+            )
+        second = self.upload('upload-1', 'red')
+
+        self.assertEqual(first.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Idempotent-Replayed', second)
+
+    def test_other_image_with_same_key_rejected(self):
+        self.upload('upload-1', 'red')
+        res = self.upload('upload-1', 'blue')
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
@@ -0,0 +1,123 @@
+"""
+Tests for merging tags and ingredients
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+
+
+def merge_url(kind, item_id):
+    return reverse(f'recipe:{kind}-merge', args=[item_id])
+
+
+def create_recipe(user, title):
+    return Recipe.objects.create(
+        user=user, title=title, time_minutes=5, price=Decimal('1.00')
+    )
+
+
+class MergeApiTests(TestCase):
+    """Test merging near-duplicate tags and ingredients"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'merge@example.com', 'testtestuser'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_merge_tags_deduplicates(self):
+        target = Tag.objects.create(user=self.user, name='Tomato')
+        lower = Tag.objects.create(user=self.user, name='tomato')
+        plural = Tag.objects.create(user=self.user, name='Tomatoes')
+        has_target = create_recipe(self.user, 'Has target')
+        has_target.tags.add(target, lower)
+        has_both_sources = create_recipe(self.user, 'Has both sources')
+        has_both_sources.tags.add(lower, plural)
+        has_one_source = create_recipe(self.user, 'Has one source')
+        has_one_source.tags.add(plural)
+
+        res = self.client.post(
+            merge_url('tag', target.id), {'sources': [lower.id, plural.id]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['merged'], 2)
+        self.assertEqual(list(Tag.objects.filter(user=self.user)), [target])
+        for recipe in [has_target, has_both_sources, has_one_source]:
+            self.assertEqual(list(recipe.tags.all()), [target])
+        target.refresh_from_db()
+        self.assertEqual(target.recipe_count, 3)
+
+    def test_merge_ingredients(self):
+        target = Ingredient.objects.create(user=self.user, name='Salt')
+        source = Ingredient.objects.create(user=self.user, name='salt')
+        recipe = create_recipe(self.user, 'Soup')
+        recipe.ingredients.add(source)
+
+        res = self.client.post(
+            merge_url('ingredient', target.id), {'sources': [source.id]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(recipe.ingredients.all()), [target])
+        self.assertFalse(Ingredient.objects.filter(id=source.id).exists())
+
+    def test_merge_ignores_other_users_items(self):
+        target = Tag.objects.create(user=self.user, name='Mine')
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testtestuser'
+        )
+        foreign = Tag.objects.create(user=other, name='Theirs')
+
+        res = self.client.post(
+            merge_url('tag', target.id), {'sources': [foreign.id, target.id]},
+            format='json',
+        )
+
+        self.assertEqual(res.data['merged'], 0)
+        self.assertTrue(Tag.objects.filter(id=foreign.id).exists())
+
+        res = self.client.post(
+            merge_url('tag', foreign.id), {'sources': [target.id]},
+            format='json',
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(RECIPE_BATCH_MAX_RELATED=2)
+    def test_sources_limit(self):
+        target = Tag.objects.create(user=self.user, name='Tomato')
+
+        res = self.client.post(
+            merge_url('tag', target.id), {'sources': [1, 2, 3]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('sources', res.data)
+
+    def test_merge_cost_independent_of_recipes(self):
+        def merge_with_recipes(count):
+            target = Tag.objects.create(user=self.user, name=f'Target {count}')
+            source = Tag.objects.create(user=self.user, name=f'Source {count}')
+            for i in range(count):
+                create_recipe(self.user, f'R{i}').tags.add(source)
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(
+                    merge_url('tag', target.id), {'sources': [source.id]},
+                    format='json',
+                )
+            return len(queries)
+
+        self.assertEqual(merge_with_recipes(2), merge_with_recipes(20))
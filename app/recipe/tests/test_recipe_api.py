@@ -10,6 +10,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Recipe, Tag, Ingredient
+from core.querycount import QueryCountAssertionsMixin
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 import tempfile
@@ -47,7 +48,7 @@ class PublicRecipeAPITests(TestCase):
         
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
         
-class PrivateRecipeAPITests(TestCase):
+class PrivateRecipeAPITests(QueryCountAssertionsMixin, TestCase):
     
     def setUp(self):
         self.client = APIClient()
@@ -68,6 +69,23 @@ class PrivateRecipeAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
         
+    def test_retrieve_recipes_no_duplicate_queries(self):
+        """Test listing recipes does not query tags/ingredients per row"""
+        for i in range(5):
+            recipe = create_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(
+                Tag.objects.create(user=self.user, name=f'Tag {i}')
+            )
+            recipe.ingredients.add(Ingredient.objects.create(
+                user=self.user, name=f'Ingredient {i}'
+            ))
+        
+        with self.assertNoDuplicateQueries():
+            res = self.client.get(RECIPES_URL)
+        
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 5)
+        
     def test_recipe_list_limited_to_user(self):
         
         other_user = get_user_model().objects.create_user(
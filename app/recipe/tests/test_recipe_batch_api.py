@@ -0,0 +1,214 @@
+"""
+Tests for batch recipe mutations
+"""
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, RecipeStats, Tag
+from core.stats import compute_user_stats
+
+BATCH_DELETE_URL = reverse('recipe:recipe-batch-delete')
+BATCH_TAGS_URL = reverse('recipe:recipe-batch-tags')
+BATCH_INGREDIENTS_URL = reverse('recipe:recipe-batch-ingredients')
+BATCH_UPDATE_URL = reverse('recipe:recipe-batch-update')
+
+
+def create_recipes(user, count, **params):
+    return [
+        Recipe.objects.create(
+            user=user, title=f'Recipe {i}', time_minutes=10 + i,
+            price=Decimal('5.00'), **params
+        )
+        for i in range(count)
+    ]
+
+
+class RecipeBatchApiTests(TestCase):
+    """Test batch delete, relation and update actions"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'batch@example.com', 'testtestuser'
+        )
+        self.other = get_user_model().objects.create_user(
+            'other@example.com', 'testtestuser'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Quick')
+
+    def _query_count(self, url, payload):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(url, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return len(queries)
+
+    def assertStatsConsistent(self):
+        stats = RecipeStats.objects.get(user=self.user)
+        for field, value in compute_user_stats(self.user.id).items():
+            self.assertEqual(getattr(stats, field), value)
+
+    def test_batch_delete(self):
+        mine = create_recipes(self.user, 3)
+        theirs = create_recipes(self.other, 1)
+        for recipe in mine:
+            recipe.tags.add(self.tag)
+
+        res = self.client.post(BATCH_DELETE_URL, {
+            'ids': [mine[0].id, mine[1].id, theirs[0].id],
+        }, format='json')
+
+        self.assertEqual(res.data, {'deleted': 2})
+        self.assertEqual(
+            list(Recipe.objects.filter(
+                user=self.user, pending_deletion=False
+            )),
+            [mine[2]],
+        )
+        self.assertTrue(Recipe.objects.filter(id=theirs[0].id).exists())
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 1)
+        self.assertStatsConsistent()
+
+    def test_batch_delete_query_count_is_bounded(self):
+        small = [r.id for r in create_recipes(self.user, 3)]
+        large = [r.id for r in create_recipes(self.user, 30)]
+        for recipe_id in small + large:
+            Recipe.objects.get(id=recipe_id).tags.add(self.tag)
+
+        self.assertEqual(
+            self._query_count(BATCH_DELETE_URL, {'ids': small}),
+            self._query_count(BATCH_DELETE_URL, {'ids': large}),
+        )
+
+    def test_batch_add_and_remove_tags(self):
+        recipes = create_recipes(self.user, 4)
+        old_tag = Tag.objects.create(user=self.user, name='Old')
+        recipes[0].tags.add(old_tag, self.tag)
+        ids = [r.id for r in recipes]
+
+        count_small = self._query_count(
+            BATCH_TAGS_URL, {'ids': ids[:2], 'add': [self.tag.id]}
+        )
+        count_large = self._query_count(BATCH_TAGS_URL, {
+            'ids': ids, 'add': [self.tag.id], 'remove': [old_tag.id],
+        })
+
+        self.assertLessEqual(count_large, count_small + 1)
+        for recipe in recipes:
+            self.assertEqual(list(recipe.tags.all()), [self.tag])
+        self.tag.refresh_from_db()
+        old_tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 4)
+        self.assertEqual(old_tag.recipe_count, 0)
+
+    def test_batch_ingredients(self):
+        recipes = create_recipes(self.user, 2)
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+
+        res = self.client.post(BATCH_INGREDIENTS_URL, {
+            'ids': [r.id for r in recipes], 'add': [salt.id],
+        }, format='json')
+
+        self.assertEqual(res.data, {'updated': 2})
+        salt.refresh_from_db()
+        self.assertEqual(salt.recipe_count, 2)
+
+    def test_cannot_use_other_users_tags(self):
+        recipes = create_recipes(self.user, 1)
+        foreign = Tag.objects.create(user=self.other, name='Foreign')
+
+        res = self.client.post(BATCH_TAGS_URL, {
+            'ids': [recipes[0].id], 'add': [foreign.id],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(recipes[0].tags.exists())
+
+    def test_unknown_ids_keyed_by_field(self):
+        recipes = create_recipes(self.user, 1)
+        foreign = Tag.objects.create(user=self.other, name='Foreign')
+
+        res = self.client.post(BATCH_TAGS_URL, {
+            'ids': [recipes[0].id], 'add': [self.tag.id],
+            'remove': [foreign.id],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.data), ['remove'])
+
+    @override_settings(RECIPE_BATCH_MAX_RELATED=2)
+    def test_related_ids_limit(self):
+        recipes = create_recipes(self.user, 1)
+
+        for field in ('add', 'remove'):
+            res = self.client.post(BATCH_TAGS_URL, {
+                'ids': [recipes[0].id], field: [self.tag.id, 2, 3],
+            }, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(field, res.data)
+
+    def test_similarity_invalidated_after_commit(self):
+        recipes = create_recipes(self.user, 1)
+
+        with mock.patch('recipe.batch.similarity.invalidate') as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(BATCH_TAGS_URL, {
+                    'ids': [recipes[0].id], 'add': [self.tag.id],
+                }, format='json')
+                invalidate.assert_not_called()
+
+        invalidate.assert_called_once_with(self.user.id)
+
+    def test_batch_update(self):
+        recipes = create_recipes(self.user, 3)
+        theirs = create_recipes(self.other, 1)
+
+        res = self.client.post(BATCH_UPDATE_URL, {
+            'ids': [r.id for r in recipes] + [theirs[0].id],
+            'price': '12.50', 'time_minutes': 20,
+        }, format='json')
+
+        self.assertEqual(res.data, {'updated': 3})
+        self.assertEqual(
+            set(Recipe.objects.filter(
+                user=self.user
+            ).values_list('price', 'time_minutes')),
+            {(Decimal('12.50'), 20)},
+        )
+        theirs[0].refresh_from_db()
+        self.assertEqual(theirs[0].price, Decimal('5.00'))
+        self.assertStatsConsistent()
+
+    def test_batch_update_validates_fields(self):
+        recipes = create_recipes(self.user, 1)
+
+        res = self.client.post(BATCH_UPDATE_URL, {
+            'ids': [recipes[0].id], 'price': 'free',
+        }, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            BATCH_UPDATE_URL, {'ids': [recipes[0].id]}, format='json'
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(RECIPE_BATCH_MAX_SIZE=2)
+    def test_batch_size_limit(self):
+        res = self.client.post(
+            BATCH_DELETE_URL, {'ids': [1, 2, 3]}, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,147 @@
+"""
+Tests for range filtering and ordering of recipes
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import Recipe, Tag
+from recipe.views import RecipeViewSet
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def create_recipe(user, title, time_minutes, price):
+    return Recipe.objects.create(
+        user=user, title=title, time_minutes=time_minutes, price=Decimal(price)
+    )
+
+
+class RecipeRangeFilterTests(TestCase):
+    """Test time and price filters combined with tags and ordering"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'filters@example.com', 'testtestuser'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.quick_cheap = create_recipe(self.user, 'Toast', 5, '2.00')
+        self.quick_pricey = create_recipe(self.user, 'Sashimi', 15, '30.00')
+        self.slow_cheap = create_recipe(self.user, 'Stew', 120, '8.00')
+
+    def _ids(self, params):
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in res.data]
+
+    def test_time_and_price_range(self):
+        ids = self._ids({'max_time': 30, 'max_price': '10'})
+
+        self.assertEqual(ids, [self.quick_cheap.id])
+
+    def test_min_bounds(self):
+        ids = self._ids({'min_time': 10, 'min_price': '5.00'})
+
+        self.assertEqual(ids, [self.slow_cheap.id, self.quick_pricey.id])
+
+    def test_ordering(self):
+        self.assertEqual(
+            self._ids({'ordering': 'price'}),
+            [self.quick_cheap.id, self.slow_cheap.id, self.quick_pricey.id],
+        )
+        self.assertEqual(
+            self._ids({'ordering': '-time_minutes'}),
+            [self.slow_cheap.id, self.quick_pricey.id, self.quick_cheap.id],
+        )
+
+    def test_combined_with_tags(self):
+        tag = Tag.objects.create(user=self.user, name='Weeknight')
+        tag2 = Tag.objects.create(user=self.user, name='Easy')
+        self.quick_cheap.tags.add(tag, tag2)
+        self.slow_cheap.tags.add(tag)
+
+        ids = self._ids({
+            'tags': f'{tag.id},{tag2.id}', 'max_price': '10',
+            'ordering': 'time_minutes',
+        })
+
+        self.assertEqual(ids, [self.quick_cheap.id, self.slow_cheap.id])
+
+    def test_invalid_number(self):
+        res = self.client.get(RECIPES_URL, {'max_price': 'cheap'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_tag_ids(self):
+        res = self.client.get(RECIPES_URL, {'tags': '1,,2'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data)
+
+    def test_not_a_number_price(self):
+        res = self.client.get(RECIPES_URL, {'min_price': 'NaN'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('min_price', res.data)
+
+    def test_time_out_of_range(self):
+        res = self.client.get(
+            RECIPES_URL, {'max_time': '99999999999999999999'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('max_time', res.data)
+
+
+class RecipeFilterIndexTests(TestCase):
+    """Test the filters are served by the composite indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user_model = get_user_model()
+        cls.users = [
+            user_model.objects.create_user(
+                f'seed{i}@example.com', 'testtestuser'
+            )
+            for i in range(4)
+        ]
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=cls.users[i % 4], title=f'Seeded {i}',
+                time_minutes=(i * 7) % 180, price=Decimal((i * 13) % 900) / 10,
+            )
+            for i in range(2000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def _plan(self, params):
+        request = Request(APIRequestFactory().get(RECIPES_URL, params))
+        request.user = self.users[0]
+        view = RecipeViewSet(request=request, action='list', format_kwarg=None)
+        queryset = view.get_queryset()
+        if connection.vendor == 'postgresql':
+            # Small test tables would otherwise favour sequential scans.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_time_range_uses_index(self):
+        plan = self._plan({'max_time': 30, 'ordering': 'time_minutes'})
+
+        self.assertIn('core_recipe_user_time_idx', plan)
+
+    def test_price_range_uses_index(self):
+        plan = self._plan(
+            {'min_price': '10', 'max_price': '20', 'ordering': '-price'}
+        )
+
+        self.assertIn('core_recipe_user_price_idx', plan)
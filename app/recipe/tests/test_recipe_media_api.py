@@ -0,0 +1,98 @@
+"""
+Tests for owner-only recipe image delivery
+"""
+import os
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+IMAGE_NAME = 'uploads/recipe/3f1c.jpg'
+
+
+def media_url(path):
+    return reverse('media', args=[path])
+
+
+class RecipeMediaApiTests(TestCase):
+    """Test recipe images are only served to their owner"""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        override = override_settings(
+            MEDIA_ROOT=media_root.name, MEDIA_ACCEL_REDIRECT=False
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(media_root.name, 'uploads', 'recipe'))
+        image_path = os.path.join(media_root.name, IMAGE_NAME)
+        with open(image_path, 'wb') as image_file:
+            image_file.write(b'jpeg bytes')
+
+        self.user = get_user_model().objects.create_user(
+            'media@example.com', 'testtestuser'
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Toast', time_minutes=2,
+            price=Decimal('1.00'), image=IMAGE_NAME,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_url_matches_media_url(self):
+        self.assertEqual(media_url(IMAGE_NAME), self.recipe.image.url)
+
+    def test_owner_gets_file(self):
+        res = self.client.get(media_url(IMAGE_NAME))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(res.streaming_content), b'jpeg bytes')
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertIn('private', res['Cache-Control'])
+
+    def test_auth_required(self):
+        res = APIClient().get(media_url(IMAGE_NAME))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_other_user_not_found(self):
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testtestuser'
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(media_url(IMAGE_NAME))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unknown_path_not_found(self):
+        res = self.client.get(media_url('uploads/recipe/../../settings.py'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deleted_recipe_not_found(self):
+        self.client.delete(
+            reverse('recipe:recipe-detail', args=[self.recipe.id])
+        )
+
+        res = self.client.get(media_url(IMAGE_NAME))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT=True)
+    def test_accel_redirect(self):
+        res = self.client.get(media_url(IMAGE_NAME))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res['X-Accel-Redirect'], f'/protected-media/{IMAGE_NAME}'
+        )
+        self.assertEqual(res.content, b'')
@@ -0,0 +1,146 @@
+"""
+Tests for the recipe statistics API
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, RecipeStats, Tag
+from core.stats import compute_user_stats
+
+STATS_URL = reverse('recipe:recipe-stats')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    defaults = {
+        'title': 'Sample Recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def stored_stats(user):
+    stats = RecipeStats.objects.get(user=user)
+    return {
+        field: getattr(stats, field) for field in compute_user_stats(user.id)
+    }
+
+
+class RecipeStatsTests(TestCase):
+    """Test incrementally maintained recipe statistics"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'stats@example.com', 'testtestuser'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_stats_endpoint(self):
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        r1 = create_recipe(self.user, time_minutes=10, price=Decimal('4.00'))
+        create_recipe(self.user, time_minutes=30, price=Decimal('12.00'))
+        r1.tags.add(tag)
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testtestuser'
+        )
+        create_recipe(other, time_minutes=100, price=Decimal('99.00'))
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 2)
+        self.assertEqual(res.data['average_time_minutes'], 20)
+        self.assertEqual(res.data['average_price'], '8.00')
+        counts = {b['min']: b['count'] for b in res.data['price_distribution']}
+        self.assertEqual(counts, {None: 1, 5: 0, 10: 1, 20: 0, 50: 0})
+        self.assertEqual(
+            res.data['top_tags'],
+            [{'id': tag.id, 'name': 'Dinner', 'recipe_count': 1}],
+        )
+
+    def test_stats_empty(self):
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 0)
+        self.assertIsNone(res.data['average_price'])
+
+    def test_incremental_matches_full_aggregation(self):
+        """Test create/update/delete keep the summary consistent"""
+        for i in range(6):
+            payload = {
+                'title': f'Recipe {i}', 'time_minutes': 5 * i,
+                'price': Decimal(f'{7 * i}.25'),
+            }
+            self.client.post(RECIPES_URL, payload)
+        recipes = list(Recipe.objects.filter(user=self.user).order_by('id'))
+        self.client.patch(
+            detail_url(recipes[0].id), {'price': Decimal('60.00')}
+        )
+        self.client.patch(detail_url(recipes[1].id), {'title': 'Renamed'})
+        self.client.put(detail_url(recipes[2].id), {
+            'title': 'Replaced', 'time_minutes': 1, 'price': Decimal('1.00'),
+        })
+        self.client.delete(detail_url(recipes[3].id))
+        recipes[4].delete()
+
+        self.assertEqual(
+            stored_stats(self.user), compute_user_stats(self.user.id)
+        )
+        stats = RecipeStats.objects.get(user=self.user)
+        self.assertEqual(stats.recipe_count, 4)
+
+    def test_string_values(self):
+        """Test values not yet converted by the model are counted"""
+        recipe = create_recipe(self.user, time_minutes='5', price='5.00')
+        recipe.price = '12.50'
+        recipe.save()
+        create_recipe(self.user, time_minutes=7, price='60')
+
+        self.assertEqual(
+            stored_stats(self.user), compute_user_stats(self.user.id)
+        )
+        stats = RecipeStats.objects.get(user=self.user)
+        self.assertEqual(stats.total_price, Decimal('72.50'))
+        self.assertEqual(stats.price_under_20, 1)
+
+    def test_update_costs_no_extra_reads(self):
+        """Test deltas come from loaded values, not a re-fetch"""
+        recipe = create_recipe(self.user)
+        recipe = Recipe.objects.get(id=recipe.id)
+        recipe.price = Decimal('25.00')
+
+        with self.assertNumQueries(2):
+            recipe.save()
+
+        self.assertEqual(
+            stored_stats(self.user), compute_user_stats(self.user.id)
+        )
+
+    def test_rebuild_command_fixes_drift(self):
+        create_recipe(self.user)
+        create_recipe(self.user, price=Decimal('70.00'))
+        RecipeStats.objects.filter(user=self.user).update(
+            recipe_count=42, price_50_plus=0
+        )
+
+        call_command('rebuild_recipe_stats', stdout=StringIO())
+
+        self.assertEqual(
+            stored_stats(self.user), compute_user_stats(self.user.id)
+        )
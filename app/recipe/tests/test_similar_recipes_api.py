@@ -0,0 +1,148 @@
+"""
+Tests for the similar recipes API
+"""
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.similarity import RecipeIndex
+
+
+def similar_url(recipe_id):
+    return reverse('recipe:recipe-similar', args=[recipe_id])
+
+
+def create_recipe(user, title, ingredients=(), tags=()):
+    recipe = Recipe.objects.create(
+        user=user, title=title, time_minutes=10, price=Decimal('5.00')
+    )
+    recipe.ingredients.add(*ingredients)
+    recipe.tags.add(*tags)
+    return recipe
+
+
+class RecipeIndexTests(SimpleTestCase):
+    """Test the vectorized Jaccard scoring against plain sets"""
+
+    def test_scores_match_set_jaccard(self):
+        rng = random.Random(1)
+        features = {
+            recipe_id: ({rng.randint(1, 40) for _ in range(rng.randint(0, 8))},
+                        {rng.randint(1, 10) for _ in range(rng.randint(0, 3))})
+            for recipe_id in range(1, 60)
+        }
+        index = RecipeIndex(
+            sorted(features),
+            [(r, i) for r, (ings, _) in features.items() for i in ings],
+            [(r, t) for r, (_, tags) in features.items() for t in tags],
+        )
+
+        results = index.similar(7, limit=100)
+
+        def combined(recipe_id):
+            ings, tags = features[recipe_id]
+            return {('i', i) for i in ings} | {('t', t) for t in tags}
+
+        target = combined(7)
+        for recipe_id, score in results:
+            other = combined(recipe_id)
+            self.assertAlmostEqual(
+                score, len(target & other) / len(target | other)
+            )
+        scores = [score for _, score in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertNotIn(7, [recipe_id for recipe_id, _ in results])
+
+    def test_pantry_vector_ignores_unknown_ids(self):
+        index = RecipeIndex([1, 2], [(1, 10), (2, 20)], [])
+
+        vector = index.ingredients.vector([20, 99])
+
+        self.assertEqual(list(index.ingredients.overlap(vector)), [0, 1])
+
+
+class SimilarRecipesApiTests(TestCase):
+    """Test the similar recipes action"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'similar@example.com', 'testtestuser'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.rice, self.chicken, self.egg, self.flour = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ['Rice', 'Chicken', 'Egg', 'Flour']
+        ]
+        self.dinner = Tag.objects.create(user=self.user, name='Dinner')
+
+    def test_ranked_by_overlap(self):
+        biryani = create_recipe(
+            self.user, 'Biryani', [self.rice, self.chicken], [self.dinner]
+        )
+        fried_rice = create_recipe(
+            self.user, 'Fried Rice', [self.rice, self.chicken, self.egg],
+            [self.dinner],
+        )
+        rice_bowl = create_recipe(self.user, 'Rice Bowl', [self.rice])
+        create_recipe(self.user, 'Cake', [self.flour, self.egg])
+
+        res = self.client.get(similar_url(biryani.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in res.data], [fried_rice.id, rice_bowl.id]
+        )
+        self.assertAlmostEqual(res.data[0]['similarity'], 0.75)
+
+    def test_index_invalidated_on_change(self):
+        biryani = create_recipe(self.user, 'Biryani', [self.rice])
+        self.assertEqual(self.client.get(similar_url(biryani.id)).data, [])
+
+        cake = create_recipe(self.user, 'Cake', [self.flour])
+        cake.ingredients.add(self.rice)
+        res = self.client.get(similar_url(biryani.id))
+
+        self.assertEqual([r['id'] for r in res.data], [cake.id])
+
+    def test_other_users_recipes_excluded(self):
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testtestuser'
+        )
+        other_rice = Ingredient.objects.create(user=other, name='Rice')
+        other_recipe = create_recipe(other, 'Other Biryani', [other_rice])
+        biryani = create_recipe(self.user, 'Biryani', [self.rice])
+
+        res = self.client.get(similar_url(biryani.id))
+        self.assertEqual(res.data, [])
+
+        res = self.client.get(similar_url(other_recipe.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_limit(self):
+        biryani = create_recipe(self.user, 'Biryani', [self.rice])
+        create_recipe(self.user, 'Rice Bowl', [self.rice])
+        create_recipe(self.user, 'Fried Rice', [self.rice, self.egg])
+
+        res = self.client.get(similar_url(biryani.id), {'limit': 1})
+        self.assertEqual(len(res.data), 1)
+
+        res = self.client.get(similar_url(biryani.id), {'limit': -1})
+        self.assertEqual(len(res.data), 1)
+
+    def test_invalid_limit(self):
+        biryani = create_recipe(self.user, 'Biryani', [self.rice])
+
+        res = self.client.get(similar_url(biryani.id), {'limit': 'abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('limit', res.data)
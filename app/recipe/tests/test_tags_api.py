@@ -4,7 +4,8 @@ from django.test import TestCase
 
 from rest_framework import status
 from rest_framework.test import APIClient
-from core.models import Tag
+from core.models import Recipe, Tag
+from decimal import Decimal
 from recipe.serializers import TagSerializer
 
 TAGS_URL = reverse('recipe:tag-list')
@@ -78,4 +79,25 @@ class PrivateTagsApiTest(TestCase):
         url = detail_url(tag_id=tag.id)
         res = self.client.delete(url)
         
-        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+    
+    def test_tags_ordered_by_popularity(self):
+        """Test ordering=popular lists the most used tags first"""
+        rare = Tag.objects.create(user=self.user, name='Rare')
+        common = Tag.objects.create(user=self.user, name='Common')
+        unused = Tag.objects.create(user=self.user, name='Unused')
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'R{i}', time_minutes=5,
+                price=Decimal('1.00'),
+            )
+            recipe.tags.add(common)
+            if i == 0:
+                recipe.tags.add(rare)
+        
+        res = self.client.get(TAGS_URL, {'ordering': 'popular'})
+        
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [t['id'] for t in res.data], [common.id, rare.id, unused.id]
+        )
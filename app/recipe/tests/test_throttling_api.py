@@ -0,0 +1,110 @@
+"""
+Tests for per-user and per-action API throttles
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.throttling import rejection_counts
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+BATCH_DELETE_URL = reverse('recipe:recipe-batch-delete')
+
+RATES = {
+    'user': (5, 0.001),
+    'anon': (5, 0.001),
+    'recipe_list': (3, 0.001),
+    'recipe_search': (1, 0.001),
+    'upload': (1, 0.001),
+    'batch': (1, 0.001),
+}
+
+
+@override_settings(API_THROTTLE_RATES=RATES)
+class ThrottleApiTests(TestCase):
+    """Test throttled recipe endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(
+            'throttle@example.com', 'testtestuser'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_budget(self):
+        codes = [self.client.get(RECIPES_URL).status_code for _ in range(4)]
+
+        self.assertEqual(codes, [200, 200, 200, 429])
+
+    def test_rejection_has_retry_after_and_is_counted(self):
+        self.client.get(RECIPES_URL, {'min_time': 5})
+        res = self.client.get(RECIPES_URL, {'min_time': 5})
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(res['Retry-After']), 0)
+        self.assertEqual(rejection_counts(), {'recipe_search': 1})
+
+    def test_filtered_list_has_own_budget(self):
+        self.client.get(RECIPES_URL, {'tags': '1'})
+
+        self.assertEqual(
+            self.client.get(RECIPES_URL, {'tags': '1'}).status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_batch_budget(self):
+        self.client.post(BATCH_DELETE_URL, {'ids': []}, format='json')
+        res = self.client.post(BATCH_DELETE_URL, {'ids': []}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_user_budget_covers_all_endpoints(self):
+        for _ in range(5):
+            self.client.get(TAGS_URL)
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(rejection_counts(), {'user': 1})
+
+    def test_budgets_are_per_user(self):
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testtestuser'
+        )
+        client = APIClient()
+        client.force_authenticate(other)
+        for _ in range(3):
+            self.client.get(RECIPES_URL)
+
+        res = client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_anonymous_budget_ignores_spoofed_forwarded_for(self):
+        client = APIClient()
+        codes = []
+        for i in range(6):
+            # Only the last entry, set by the proxy, is trusted.
+            res = client.post(
+                reverse('user:create'), {},
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{i}, 203.0.113.7',
+            )
+            codes.append(res.status_code)
+
+        self.assertEqual(codes, [400] * 5 + [429])
+        self.assertEqual(rejection_counts(), {'anon': 1})
+
+    @override_settings(API_THROTTLE_RATES={**RATES, 'recipe_list': None})
+    def test_scope_disabled(self):
+        codes = [self.client.get(RECIPES_URL).status_code for _ in range(5)]
+
+        self.assertEqual(set(codes), {200})
@@ -1,13 +1,45 @@
 """Views for recipe API"""
+import mimetypes
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+
 from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiParameter, OpenApiTypes
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DecimalField, IntegerField
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 # Create your views here.
-from core.models import Recipe, Tag, Ingredient
-from recipe import serializers
+from core.db.replicas import ReplicaReadMixin
+from core.idempotency import idempotent
+from core.models import Recipe, RecipeStats, Tag, Ingredient
+from core.stats import rebuild_user_stats
+from recipe import batch, serializers, similarity
+from user.authentication import ExpiringTokenAuthentication
+
+RECIPE_ORDERINGS = ['time_minutes', '-time_minutes', 'price', '-price']
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    'Idempotency-Key',
+    OpenApiTypes.STR,
+    OpenApiParameter.HEADER,
+    description='Retries with the same key replay the first response'
+)
+# Bounded like the columns, so NaN or out of range values are a 400
+# instead of a database error.
+TIME_FILTER = IntegerField(min_value=0, max_value=2 ** 31 - 1)
+PRICE_FILTER = DecimalField(max_digits=10, decimal_places=2, min_value=0)
+RECIPE_RANGE_FILTERS = {
+    'min_time': ('time_minutes__gte', TIME_FILTER),
+    'max_time': ('time_minutes__lte', TIME_FILTER),
+    'min_price': ('price__gte', PRICE_FILTER),
+    'max_price': ('price__lte', PRICE_FILTER),
+}
+RECIPE_FILTER_PARAMS = ['tags', 'ingredients', *RECIPE_RANGE_FILTERS]
 
 
 @extend_schema_view(
@@ -22,54 +54,293 @@ from recipe import serializers
                 'ingredients',
                 OpenApiTypes.STR,
                 description='Comma separated list of Ingredient IDs to filter'
+            ),
+            OpenApiParameter(
+                'min_time',
+                OpenApiTypes.INT,
+                description='Minimum time_minutes'
+            ),
+            OpenApiParameter(
+                'max_time',
+                OpenApiTypes.INT,
+                description='Maximum time_minutes'
+            ),
+            OpenApiParameter(
+                'min_price',
+                OpenApiTypes.DECIMAL,
+                description='Minimum price'
+            ),
+            OpenApiParameter(
+                'max_price',
+                OpenApiTypes.DECIMAL,
+                description='Maximum price'
+            ),
+            OpenApiParameter(
+                'ordering',
+                OpenApiTypes.STR,
+                enum=list(RECIPE_ORDERINGS),
+                description='Order by time or price (default newest first)'
             )
         ]
-    )
+    ),
+    create=extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER]),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     
     serializer_class = serializers.RecipeDetailSerializer
-    queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    queryset = Recipe.objects.filter(pending_deletion=False)
+    authentication_classes = [ExpiringTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_scopes = {
+        'similar': 'recipe_search',
+        'cookable': 'recipe_search',
+        'upload_image': 'upload',
+        'batch_delete': 'batch',
+        'batch_tags': 'batch',
+        'batch_ingredients': 'batch',
+        'batch_update': 'batch',
+    }
     
-    def _params_to_int(self, qs):
-        return [int(str_id) for str_id in qs.split(',')]
+    def get_throttle_scope(self):
+        if self.action == 'list':
+            # Filtered lists join the through tables; budget them separately.
+            params = self.request.query_params
+            if any(params.get(param) for param in RECIPE_FILTER_PARAMS):
+                return 'recipe_search'
+            return 'recipe_list'
+        return self.throttle_scopes.get(self.action)
+    
+    def _params_to_int(self, qs, param):
+        try:
+            return [int(str_id) for str_id in qs.split(',')]
+        except ValueError:
+            raise ValidationError(
+                {param: 'Must be a comma separated list of IDs.'}
+            )
+
+    def _int_param(self, param, default, minimum=0, maximum=None):
+        """Query parameter as an int clamped to [minimum, maximum]"""
+        try:
+            value = int(self.request.query_params.get(param, default))
+        except ValueError:
+            raise ValidationError({param: 'Must be a number.'})
+        if maximum is not None:
+            value = min(value, maximum)
+        return max(minimum, value)
+    
+    def _range_filters(self):
+        filters = {}
+        for param, (lookup, field) in RECIPE_RANGE_FILTERS.items():
+            value = self.request.query_params.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                filters[lookup] = field.run_validation(value)
+            except ValidationError as exc:
+                raise ValidationError({param: exc.detail})
+        return filters
     
     def get_queryset(self):
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
+        ordering = self.request.query_params.get('ordering')
         
-        queryset = self.queryset
+        queryset = self.queryset.filter(
+            user=self.request.user, **self._range_filters()
+        )
         
+        # Semi-joins keep one row per recipe without a DISTINCT, so the
+        # (user, time/price) indexes can still serve the ordering.
         if tags:
-            tag_ids = self._params_to_int(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            tag_ids = self._params_to_int(tags, 'tags')
+            queryset = queryset.filter(
+                id__in=Recipe.tags.through.objects.filter(
+                    tag_id__in=tag_ids
+                ).values('recipe_id')
+            )
         if ingredients:
-            ingredient_ids = self._params_to_int(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            ingredient_ids = self._params_to_int(ingredients, 'ingredients')
+            queryset = queryset.filter(
+                id__in=Recipe.ingredients.through.objects.filter(
+                    ingredient_id__in=ingredient_ids
+                ).values('recipe_id')
+            )
         
-        return queryset.filter(user=self.request.user).order_by('-id').distinct()
+        if ordering in RECIPE_ORDERINGS:
+            queryset = queryset.order_by(ordering, '-id')
+        else:
+            queryset = queryset.order_by('-id')
+        return queryset.prefetch_related('tags', 'ingredients')
     
     def get_serializer_class(self):
         if self.action == 'list':
             return serializers.RecipeSerializer
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
+        elif self.action == 'stats':
+            return serializers.RecipeStatsSerializer
+        elif self.action == 'similar':
+            return serializers.SimilarRecipeSerializer
+        elif self.action == 'cookable':
+            return serializers.CookableRecipeSerializer
+        elif self.action == 'batch_delete':
+            return serializers.RecipeBatchSerializer
+        elif self.action in ('batch_tags', 'batch_ingredients'):
+            return serializers.RecipeBatchRelationSerializer
+        elif self.action == 'batch_update':
+            return serializers.RecipeBatchUpdateSerializer
         return self.serializer_class
     
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+    
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+    
+    def perform_destroy(self, instance):
+        # Hidden immediately; the rows are purged in the background.
+        batch.delete_recipes(self.request.user, [instance.id])
         
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
     @action(methods=['POST'], detail=True, url_path='upload-image')
+    @idempotent
     def upload_image(self, request, pk=None):
         recipe = self.get_object()
         serializer = self.get_serializer(recipe, data=request.data)
+        # Raised rather than returned, so @idempotent does not store the
+        # 400 and a retry with the same key can still upload.
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status.HTTP_200_OK)
+    
+    @extend_schema(parameters=[
+        OpenApiParameter(
+            'limit',
+            OpenApiTypes.INT,
+            description='Maximum number of recipes (default 10)'
+        )
+    ])
+    @action(methods=['GET'], detail=True)
+    def similar(self, request, pk=None):
+        """Other recipes ranked by Jaccard overlap of ingredients and tags"""
+        recipe = self.get_object()
+        limit = self._int_param('limit', 10, minimum=1, maximum=50)
         
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status.HTTP_200_OK)
-        return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        index = similarity.get_index(request.user.id)
+        ranked = index.similar(recipe.id, limit)
+        # The index may lag behind; only serve live recipes of the user.
+        recipes = Recipe.objects.filter(
+            user=request.user, pending_deletion=False,
+            id__in=[recipe_id for recipe_id, _ in ranked],
+        ).prefetch_related('tags', 'ingredients').in_bulk()
+        results = []
+        for recipe_id, score in ranked:
+            if recipe_id in recipes:
+                recipes[recipe_id].similarity = score
+                results.append(recipes[recipe_id])
+        
+        serializer = self.get_serializer(results, many=True)
+        return Response(serializer.data)
+    
+    @extend_schema(parameters=[
+        OpenApiParameter(
+            'pantry',
+            OpenApiTypes.STR,
+            description='Comma separated list of Ingredient IDs on hand'
+        ),
+        OpenApiParameter(
+            'max_missing',
+            OpenApiTypes.INT,
+            description='Allowed number of missing ingredients (default 0)'
+        ),
+        OpenApiParameter(
+            'limit',
+            OpenApiTypes.INT,
+            description='Maximum number of recipes (default 50)'
+        ),
+    ])
+    @action(methods=['GET'], detail=False)
+    def cookable(self, request):
+        """Recipes that can be made from the pantry, fewest missing first"""
+        pantry = request.query_params.get('pantry')
+        pantry_ids = self._params_to_int(pantry, 'pantry') if pantry else []
+        max_missing = self._int_param('max_missing', 0)
+        limit = self._int_param('limit', 50, minimum=1, maximum=200)
+        
+        index = similarity.get_index(request.user.id)
+        matches = index.cookable(pantry_ids, max_missing, limit)
+        # The index may lag behind; only serve live recipes of the user.
+        recipes = Recipe.objects.filter(
+            user=request.user, pending_deletion=False,
+            id__in=[recipe_id for recipe_id, _ in matches],
+        ).prefetch_related('tags', 'ingredients').in_bulk()
+        results = []
+        for recipe_id, missing in matches:
+            if recipe_id in recipes:
+                recipes[recipe_id].missing_ingredients = missing
+                results.append(recipes[recipe_id])
+        
+        serializer = self.get_serializer(results, many=True)
+        return Response(serializer.data)
+    
+    @action(methods=['POST'], detail=False, url_path='batch-delete')
+    def batch_delete(self, request):
+        """Delete many recipes in a bounded number of statements"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        deleted = batch.delete_recipes(
+            request.user, serializer.validated_data['ids']
+        )
+        return Response({'deleted': deleted}, status.HTTP_200_OK)
+    
+    def _batch_relation(self, request, field, model):
+        context = {**self.get_serializer_context(), 'related_model': model}
+        serializer = self.get_serializer(data=request.data, context=context)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        updated = batch.change_relations(
+            request.user, data['ids'], field,
+            add=data['add'], remove=data['remove'],
+        )
+        return Response({'updated': updated}, status.HTTP_200_OK)
+    
+    @action(methods=['POST'], detail=False, url_path='batch-tags')
+    def batch_tags(self, request):
+        """Add and remove tags on many recipes"""
+        return self._batch_relation(request, 'tags', Tag)
+    
+    @action(methods=['POST'], detail=False, url_path='batch-ingredients')
+    def batch_ingredients(self, request):
+        """Add and remove ingredients on many recipes"""
+        return self._batch_relation(request, 'ingredients', Ingredient)
+    
+    @action(methods=['POST'], detail=False, url_path='batch-update')
+    def batch_update(self, request):
+        """Set the same field values on many recipes"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        values = dict(serializer.validated_data)
+        ids = values.pop('ids')
+        updated = batch.update_recipes(request.user, ids, values)
+        return Response({'updated': updated}, status.HTTP_200_OK)
+    
+    def _top_usage(self, model, limit=5):
+        return model.objects.filter(
+            user=self.request.user, recipe_count__gt=0
+        ).order_by('-recipe_count', '-name')[:limit]
+    
+    @action(methods=['GET'], detail=False)
+    def stats(self, request):
+        """Recipe statistics served from the incrementally updated summary"""
+        try:
+            stats = RecipeStats.objects.get(user=request.user)
+        except RecipeStats.DoesNotExist:
+            stats = rebuild_user_stats(request.user.id)
+        stats.top_tags = self._top_usage(Tag)
+        stats.top_ingredients = self._top_usage(Ingredient)
+        serializer = self.get_serializer(stats)
+        return Response(serializer.data)
 
 @extend_schema_view(
     list=extend_schema(
@@ -78,31 +349,102 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 'assinged_only',
                 OpenApiTypes.INT, enum=[0, 1],
                 description='Filter by items assigned to recipes'
+            ),
+            OpenApiParameter(
+                'ordering',
+                OpenApiTypes.STR, enum=['popular'],
+                description='Order by number of recipes using the item'
             )
         ]
     )
 )
-class BaseRecipeAttrViewSet(mixins.DestroyModelMixin, mixins.UpdateModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+class BaseRecipeAttrViewSet(ReplicaReadMixin,
+                            mixins.DestroyModelMixin,
+                            mixins.UpdateModelMixin,
+                            mixins.ListModelMixin,
+                            viewsets.GenericViewSet):
     
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [ExpiringTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_scopes = {'merge': 'batch'}
     
     def get_queryset(self):
         assinged_only = bool(
             int(self.request.query_params.get('assinged_only', 0))
         )
-        queryset = self.queryset
+        queryset = self.queryset.filter(user=self.request.user)
         if assinged_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = queryset.filter(recipe_count__gt=0)
         
-        return queryset.filter(user=self.request.user).order_by('-name').distinct()
+        if self.request.query_params.get('ordering') == 'popular':
+            return queryset.order_by('-recipe_count', '-name')
+        return queryset.order_by('-name')
+    
+    def get_serializer_class(self):
+        if self.action == 'merge':
+            return serializers.MergeSerializer
+        return self.serializer_class
+    
+    @action(methods=['POST'], detail=True)
+    def merge(self, request, pk=None):
+        """Merge other items into this one, moving their recipes over"""
+        target = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        merged = batch.merge_related(
+            request.user, self.recipe_field, target,
+            serializer.validated_data['sources'],
+        )
+        target.refresh_from_db()
+        data = self.serializer_class(target).data
+        return Response({**data, 'merged': merged}, status.HTTP_200_OK)
     
 class TagViewSet(BaseRecipeAttrViewSet):
     
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
+    recipe_field = 'tags'
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     
     serializer_class = serializers.IngredientSerializer
-    queryset = Ingredient.objects.all()
\ No newline at end of file
+    queryset = Ingredient.objects.all()
+    recipe_field = 'ingredients'
+
+class RecipeImageView(APIView):
+    """Recipe images, delivered only to the recipe owner"""
+    
+    authentication_classes = [ExpiringTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    
+    @extend_schema(responses={(200, 'image/*'): OpenApiTypes.BINARY})
+    def get(self, request, path):
+        owned = Recipe.objects.filter(
+            image=path, user=request.user, pending_deletion=False
+        ).exists()
+        if not owned:
+            # Same answer as a missing file, so paths cannot be probed.
+            raise Http404
+        
+        content_type = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        )
+        if settings.MEDIA_ACCEL_REDIRECT:
+            # The proxy sends the file from an internal location.
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = (
+                f'{settings.MEDIA_ACCEL_PREFIX}{path}'
+            )
+        else:
+            try:
+                response = FileResponse(
+                    open(safe_join(settings.MEDIA_ROOT, path), 'rb'),
+                    content_type=content_type,
+                )
+            except (OSError, ValueError):
+                raise Http404
+        patch_cache_control(
+            response, private=True, max_age=settings.MEDIA_CACHE_MAX_AGE
+        )
+        return response
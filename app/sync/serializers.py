@@ -0,0 +1,23 @@
+"""Serializers for sync API"""
+
+from rest_framework import serializers
+from recipe.serializers import (
+    IngredientSerializer, RecipeDetailSerializer, TagSerializer
+)
+
+
+class DeletedSerializer(serializers.Serializer):
+    """Ids deleted since the cursor, per kind"""
+    recipe = serializers.ListField(child=serializers.IntegerField())
+    tag = serializers.ListField(child=serializers.IntegerField())
+    ingredient = serializers.ListField(child=serializers.IntegerField())
+
+
+class SyncSerializer(serializers.Serializer):
+    """One page of changes from core.sync.changes_since"""
+    recipes = RecipeDetailSerializer(many=True, read_only=True)
+    tags = TagSerializer(many=True, read_only=True)
+    ingredients = IngredientSerializer(many=True, read_only=True)
+    deleted = DeletedSerializer(read_only=True)
+    cursor = serializers.CharField(read_only=True)
+    has_more = serializers.BooleanField(read_only=True)
@@ -0,0 +1,99 @@
+"""
+Tests for the delta sync API
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import sync
+from core.models import Recipe, Tag
+
+SYNC_URL = reverse('sync:sync')
+
+
+class PublicSyncApiTests(TestCase):
+    """Test unauthenticated API requests"""
+
+    def test_auth_required(self):
+        res = APIClient().get(SYNC_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(SYNC_LAG=timedelta(0))
+class PrivateSyncApiTests(TestCase):
+    """Test authenticated API requests"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'sync@example.com', 'testtestuser'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_full_then_delta_sync(self):
+        recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=Decimal('2.00')
+        )
+        tag = Tag.objects.create(user=self.user, name='Quick')
+        recipe.tags.add(tag)
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testtestuser'
+        )
+        Tag.objects.create(user=other, name='Not mine')
+
+        res = self.client.get(SYNC_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data['recipes']], [recipe.id])
+        self.assertEqual(
+            res.data['recipes'][0]['tags'], [{'id': tag.id, 'name': 'Quick'}]
+        )
+        self.assertEqual([t['id'] for t in res.data['tags']], [tag.id])
+        self.assertFalse(res.data['has_more'])
+
+        tag_id = tag.id
+        tag.delete()
+        res = self.client.get(SYNC_URL, {'since': res.data['cursor']})
+
+        self.assertEqual(res.data['deleted']['tag'], [tag_id])
+        self.assertEqual([r['id'] for r in res.data['recipes']], [recipe.id])
+        self.assertEqual(res.data['tags'], [])
+
+    def test_limit(self):
+        for i in range(3):
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+
+        res = self.client.get(SYNC_URL, {'limit': 2})
+
+        self.assertEqual(len(res.data['tags']), 2)
+        self.assertTrue(res.data['has_more'])
+
+    def test_invalid_cursor(self):
+        res = self.client.get(SYNC_URL, {'since': 'garbage'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_oversized_cursor(self):
+        res = self.client.get(
+            SYNC_URL, {'since': '99999999999999999999-0-0'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('since', res.data)
+
+    def test_expired_cursor(self):
+        cursor = sync.encode_cursor(timezone.now() - timedelta(days=365), 0, 0)
+
+        res = self.client.get(SYNC_URL, {'since': cursor})
+
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
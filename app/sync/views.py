@@ -0,0 +1,63 @@
+"""Views for sync API"""
+from django.conf import settings
+
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import sync
+from sync import serializers
+from user.authentication import ExpiringTokenAuthentication
+
+
+class SyncView(APIView):
+    """Recipes, tags and ingredients changed or deleted since a cursor"""
+    
+    authentication_classes = [ExpiringTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    
+    def _limit(self):
+        try:
+            limit = int(self.request.query_params.get(
+                'limit', settings.SYNC_PAGE_SIZE
+            ))
+        except ValueError:
+            raise ValidationError({'limit': 'Must be a number.'})
+        return max(1, min(limit, settings.SYNC_MAX_PAGE_SIZE))
+    
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'since',
+                OpenApiTypes.STR,
+                description=(
+                    'Cursor from the previous response '
+                    '(omit for a full sync)'
+                )
+            ),
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description='Maximum number of changes (default 200)'
+            ),
+        ],
+        responses=serializers.SyncSerializer,
+    )
+    def get(self, request):
+        since = request.query_params.get('since') or None
+        if since:
+            try:
+                sync.decode_cursor(since)
+            except ValueError:
+                raise ValidationError({'since': 'Invalid cursor.'})
+        try:
+            page = sync.changes_since(request.user, since, self._limit())
+        except sync.CursorExpired:
+            return Response(
+                {'detail': 'Cursor expired; sync again without since.'},
+                status.HTTP_410_GONE,
+            )
+        return Response(serializers.SyncSerializer(page).data)
@@ -0,0 +1,110 @@
+"""
+Token authentication with sliding expiry.
+
+Token usage is recorded in a per-process buffer and written to
+TokenActivity in batches, so authenticating stays a single read.
+"""
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core.models import TokenActivity
+
+
+class ActivityBuffer:
+    """Coalesces token usage timestamps and flushes them periodically"""
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def last_seen(self, key):
+        with self._lock:
+            return self._pending.get(key)
+
+    def touch(self, key, last_known, now):
+        """Record usage unless the known timestamp is recent enough"""
+        resolution = settings.TOKEN_ACTIVITY_RESOLUTION
+        if last_known and (now - last_known).total_seconds() < resolution:
+            return
+        with self._lock:
+            self._pending[key] = now
+            interval = settings.TOKEN_ACTIVITY_FLUSH_INTERVAL
+            due = time.monotonic() - self._last_flush >= interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Upsert all buffered timestamps in one statement"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+        existing = Token.objects.filter(
+            key__in=pending
+        ).values_list('key', flat=True)
+        rows = [
+            TokenActivity(token_id=key, last_used=pending[key])
+            for key in existing
+        ]
+        TokenActivity.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['token'],
+            update_fields=['last_used'],
+        )
+        return len(rows)
+
+
+activity_buffer = ActivityBuffer()
+atexit.register(activity_buffer.flush)
+
+
+def token_last_seen(token):
+    """Latest known use of a token across the buffer and the database"""
+    seen = [token.created, activity_buffer.last_seen(token.key)]
+    try:
+        seen.append(token.activity.last_used)
+    except ObjectDoesNotExist:
+        pass
+    return max(value for value in seen if value is not None)
+
+
+def token_expired(token, now=None):
+    now = now or timezone.now()
+    return now - token_last_seen(token) > settings.TOKEN_IDLE_TIMEOUT
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """Token authentication rejecting tokens idle for too long"""
+
+    def authenticate_credentials(self, key):
+        try:
+            token = Token.objects.select_related(
+                'user', 'activity'
+            ).get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        now = timezone.now()
+        last_seen = token_last_seen(token)
+        if now - last_seen > settings.TOKEN_IDLE_TIMEOUT:
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+
+        activity_buffer.touch(token.key, last_seen, now)
+        return (token.user, token)
@@ -6,6 +6,9 @@ from django.contrib.auth import get_user_model, authenticate
 from rest_framework import serializers
 from django.utils.translation import gettext as _
 
+from core.throttling import record_rejection
+from user.throttling import LoginThrottle, hash_timer
+
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for the user model"""
     
@@ -38,8 +41,24 @@ class AuthTokenSerializer(serializers.Serializer):
     def validate(self, attrs):
         email = attrs.get('email')
         password = attrs.get('password')
+        request = self.context.get('request')
+        
+        LoginThrottle(request, email).check()
         
-        user = authenticate(request=self.context.get('request'), username=email, password=password)
+        user_model = get_user_model()
+        known = user_model._default_manager.filter(
+            **{user_model.USERNAME_FIELD: email}
+        ).exists()
+        if known:
+            user = hash_timer.measure(
+                authenticate, request=request,
+                username=email, password=password,
+            )
+        else:
+            # Skip the hash for unknown emails but take as long as one.
+            record_rejection('login_unknown_email')
+            hash_timer.imitate()
+            user = None
         
         if not user:
             msg = _('Unable to authenticate with the provided credentials')
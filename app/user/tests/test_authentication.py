@@ -0,0 +1,119 @@
+"""
+Tests for sliding expiry token authentication
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import TokenActivity
+from user.authentication import activity_buffer
+
+ME_URL = reverse('user:me')
+TOKEN_URL = reverse('user:token')
+
+
+def create_token(user, age=timedelta(0)):
+    token = Token.objects.create(user=user)
+    Token.objects.filter(key=token.key).update(created=timezone.now() - age)
+    token.refresh_from_db()
+    return token
+
+
+@override_settings(
+    TOKEN_IDLE_TIMEOUT=timedelta(days=1),
+    TOKEN_ACTIVITY_RESOLUTION=60,
+    TOKEN_ACTIVITY_FLUSH_INTERVAL=3600,
+)
+class ExpiringTokenTests(TestCase):
+    """Test token expiry and batched activity tracking"""
+
+    def setUp(self):
+        activity_buffer.flush()
+        self.user = get_user_model().objects.create_user(
+            email='token@example.com', password='testtestuser'
+        )
+        self.client = APIClient()
+
+    def _get_me(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return self.client.get(ME_URL)
+
+    def test_fresh_token_accepted(self):
+        token = create_token(self.user)
+
+        res = self._get_me(token)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_idle_token_rejected(self):
+        token = create_token(self.user, age=timedelta(days=2))
+
+        res = self._get_me(token)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_recent_activity_extends_token(self):
+        token = create_token(self.user, age=timedelta(days=2))
+        TokenActivity.objects.create(
+            token=token, last_used=timezone.now() - timedelta(hours=1)
+        )
+
+        res = self._get_me(token)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_usage_buffered_and_coalesced(self):
+        token = create_token(self.user, age=timedelta(hours=2))
+
+        for _ in range(3):
+            with self.assertNumQueries(1):
+                res = self._get_me(token)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertFalse(TokenActivity.objects.exists())
+        self.assertEqual(activity_buffer.flush(), 1)
+        activity = TokenActivity.objects.get(token=token)
+        self.assertAlmostEqual(
+            activity.last_used, timezone.now(), delta=timedelta(seconds=30)
+        )
+
+    def test_expired_token_rotated_on_login(self):
+        cache.clear()
+        old = create_token(self.user, age=timedelta(days=2))
+
+        res = self.client.post(
+            TOKEN_URL, {'email': self.user.email, 'password': 'testtestuser'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data['token'], old.key)
+        self.assertFalse(Token.objects.filter(key=old.key).exists())
+
+    def test_purge_expired_tokens(self):
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='pw12345'
+        )
+        third = get_user_model().objects.create_user(
+            email='third@example.com', password='pw12345'
+        )
+        expired = create_token(self.user, age=timedelta(days=3))
+        fresh = create_token(other)
+        active = create_token(third, age=timedelta(days=3))
+        TokenActivity.objects.create(token=active, last_used=timezone.now())
+
+        out = StringIO()
+        call_command('purge_expired_tokens', chunk_size=1, stdout=out)
+
+        self.assertFalse(Token.objects.filter(key=expired.key).exists())
+        self.assertTrue(Token.objects.filter(key=fresh.key).exists())
+        self.assertTrue(Token.objects.filter(key=active.key).exists())
+        self.assertIn('Purged 1 expired tokens', out.getvalue())
@@ -2,13 +2,17 @@
 Tests for user API
 """
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from unittest.mock import patch
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.querycount import QueryCountAssertionsMixin
+
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
 ME_URL = reverse('user:me')
@@ -21,6 +25,7 @@ class PublicUserApiTests(TestCase):
     """Test the public features of User API"""
     
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
     
     def test_create_user_success(self):
@@ -103,7 +108,92 @@ class PublicUserApiTests(TestCase):
         
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
         
-class PrivateUserApiTests(TestCase):
+@override_settings(
+    LOGIN_THROTTLE_RATES={'email': (2, 0.001), 'ip': (3, 0.001)}
+)
+class LoginThrottleTests(TestCase):
+    """Test throttling of token requests"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        create_user(
+            email='test1@example.com', password='testtestuser',
+            name='Test One',
+        )
+    
+    def test_email_throttled(self):
+        """Test repeated attempts for one email are rejected before hashing"""
+        payload = {'email': 'test1@example.com', 'password': 'wrongpassword'}
+        for _ in range(2):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        with patch('user.serializers.authenticate') as patched_authenticate:
+            res = self.client.post(TOKEN_URL, payload)
+        
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        patched_authenticate.assert_not_called()
+    
+    @patch('user.throttling.time.sleep')
+    def test_ip_throttled(self, patched_sleep):
+        """Test attempts across emails share the client IP budget"""
+        for i in range(3):
+            res = self.client.post(
+                TOKEN_URL, {'email': f'user{i}@example.com', 'password': 'pw'}
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        res = self.client.post(
+            TOKEN_URL, {'email': 'user9@example.com', 'password': 'pw'}
+        )
+        
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+    
+    @patch('user.throttling.time.sleep')
+    def test_ip_throttle_ignores_spoofed_forwarded_for(self, patched_sleep):
+        """Test addresses a client adds to X-Forwarded-For are not trusted"""
+        codes = []
+        for i in range(4):
+            # nginx appends the real client address to the client's value.
+            res = self.client.post(
+                TOKEN_URL, {'email': f'user{i}@example.com', 'password': 'pw'},
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{i}, 203.0.113.7',
+            )
+            codes.append(res.status_code)
+        
+        self.assertEqual(codes, [400, 400, 400, 429])
+    
+    @patch('user.throttling.time.sleep')
+    @patch('user.serializers.authenticate')
+    def test_unknown_email_skips_hashing(self, patched_authenticate,
+                                         patched_sleep):
+        """Test unknown emails are rejected without hashing but with a delay"""
+        payload = {'email': 'nobody@example.com', 'password': 'testtestuser'}
+        
+        res = self.client.post(TOKEN_URL, payload)
+        
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        patched_authenticate.assert_not_called()
+        patched_sleep.assert_called_once()
+        self.assertGreater(patched_sleep.call_args[0][0], 0)
+    
+    def test_rejections_counted(self):
+        """Test throttled attempts show up in the rejection counters"""
+        payload = {'email': 'test1@example.com', 'password': 'wrongpassword'}
+        for _ in range(4):
+            self.client.post(TOKEN_URL, payload)
+        
+        admin = get_user_model().objects.create_superuser(
+            'admin@example.com', 'testtestuser'
+        )
+        self.client.force_authenticate(admin)
+        res = self.client.get(reverse('throttles'))
+        
+        self.assertEqual(res.data['login_email'], 2)
+
+class PrivateUserApiTests(QueryCountAssertionsMixin, TestCase):
     """Test API requests that require authentication"""
     
     def setUp(self):
@@ -129,6 +219,14 @@ class PrivateUserApiTests(TestCase):
             'name': self.user.name
         })
     
+    def test_retrieve_profile_no_duplicate_queries(self):
+        """Test retrieving the profile does not repeat queries"""
+        
+        with self.assertNoDuplicateQueries(threshold=1):
+            res = self.client.get(ME_URL)
+        
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+    
     def test_post_me_not_allowed(self):
         """Test post me not allowed"""
         
@@ -145,4 +243,13 @@ class PrivateUserApiTests(TestCase):
         self.user.refresh_from_db()
         self.assertEqual(self.user.name, payload['name'])
         self.assertTrue(self.user.check_password(payload['password']))
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(res.status_code, status.HTTP_200_OK)    
+    def test_delete_profile_deactivates_account(self):
+        """Test deleting the profile hides the account until it is purged"""
+        
+        res = self.client.delete(ME_URL)
+        
+        self.user.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(self.user.is_active)
+        self.assertIsNotNone(self.user.deletion_requested_at)
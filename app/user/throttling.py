@@ -0,0 +1,60 @@
+"""
+Login throttling protecting workers from password hashing floods
+"""
+import hashlib
+import random
+import threading
+import time
+
+from django.conf import settings
+from rest_framework import exceptions
+from rest_framework.throttling import BaseThrottle
+
+from core.throttling import TokenBucket, record_rejection
+
+
+class LoginThrottle:
+    """Per-email and per-IP token buckets checked before any hashing"""
+
+    def __init__(self, request, email):
+        rates = settings.LOGIN_THROTTLE_RATES
+        email_key = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        ident = BaseThrottle().get_ident(request) if request else 'unknown'
+        self.buckets = [
+            ('login_email',
+             TokenBucket(f'login:email:{email_key}', *rates['email'])),
+            ('login_ip', TokenBucket(f'login:ip:{ident}', *rates['ip'])),
+        ]
+
+    def check(self):
+        """Consume one attempt or raise Throttled"""
+        for scope, bucket in self.buckets:
+            wait = bucket.consume()
+            if wait:
+                record_rejection(scope)
+                raise exceptions.Throttled(wait=wait)
+
+
+class HashTimer:
+    """Tracks the time a password check takes to imitate it on misses"""
+
+    def __init__(self, initial=0.25, weight=0.2):
+        self.average = initial
+        self.weight = weight
+        self._lock = threading.Lock()
+
+    def measure(self, func, *args, **kwargs):
+        start = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self.average += self.weight * (elapsed - self.average)
+
+    def imitate(self):
+        """Sleep for about one password check without spending CPU"""
+        time.sleep(self.average * random.uniform(0.9, 1.1))
+
+
+hash_timer = HashTimer()
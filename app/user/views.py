@@ -1,11 +1,13 @@
 from django.shortcuts import render
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from .serializers import UserSerializer, AuthTokenSerializer
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.authtoken.models import Token
+from core.purge import request_account_deletion
+from .authentication import ExpiringTokenAuthentication, token_expired
 # Create your views here.
 
 class CreateUserView(generics.CreateAPIView):
@@ -31,12 +33,19 @@ class CreateAuthTokenView(ObtainAuthToken):
             return Response({'error': 'Invalid credentials'}, status=status.HTTP_400_BAD_REQUEST)
 
         token, created = Token.objects.get_or_create(user=user)
+        if not created and token_expired(token):
+            token.delete()
+            token = Token.objects.create(user=user)
         return Response({'token': token.key})
     
-class ManagerUserView(generics.RetrieveUpdateAPIView):
+class ManagerUserView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [ExpiringTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
\ No newline at end of file
+        return self.request.user
+    
+    def perform_destroy(self, instance):
+        # The account's rows are removed later by purge_pending_deletions.
+        request_account_deletion(instance)
\ No newline at end of file
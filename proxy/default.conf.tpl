@@ -0,0 +1,96 @@
+# nginx server for the recipe API, rendered with envsubst (for example by
+# the official nginx image from /etc/nginx/templates/default.conf.template).
+#
+#   LISTEN_PORT  port nginx listens on
+#   APP_HOST     host running uWSGI
+#   APP_PORT     uWSGI --http11-socket port (9000 in scripts/run.sh)
+#
+# Static files are read from the shared /vol/web volume and sent with
+# sendfile. Media requests are checked by Django, which answers with an
+# X-Accel-Redirect to /protected-media/ (scripts/run.sh sets
+# MEDIA_ACCEL_REDIRECT=1) so the file itself never passes through Python.
+
+upstream app {
+    server ${APP_HOST}:${APP_PORT};
+    # Idle HTTP/1.1 connections kept open to uWSGI per nginx worker.
+    keepalive 32;
+    keepalive_requests 1000;
+    keepalive_timeout 60s;
+}
+
+# ManifestStaticFilesStorage copies every static file to a name with a
+# content hash (name.0123456789ab.css) that never changes; the original
+# names may be replaced on the next deploy.
+map $uri $static_cache_control {
+    "~\.[0-9a-f]{12}\.[A-Za-z0-9]+$"  "public, max-age=31536000, immutable";
+    default                           "public, max-age=3600";
+}
+
+server {
+    listen ${LISTEN_PORT};
+    server_tokens off;
+
+    sendfile on;
+    tcp_nopush on;
+    tcp_nodelay on;
+    open_file_cache max=10000 inactive=5m;
+    open_file_cache_valid 1m;
+    open_file_cache_errors on;
+
+    gzip on;
+    gzip_comp_level 5;
+    gzip_min_length 1024;
+    gzip_proxied any;
+    gzip_vary on;
+    gzip_types
+        application/json
+        application/vnd.oai.openapi
+        application/vnd.oai.openapi+json
+        application/javascript
+        text/css
+        image/svg+xml;
+
+    # API bodies are small JSON documents; only image uploads (directly or
+    # inside a batch) are larger.
+    client_max_body_size 1m;
+    client_body_buffer_size 128k;
+
+    proxy_http_version 1.1;
+    proxy_set_header Connection "";
+    proxy_set_header Host $host;
+    # Replace, not append: the app trusts one proxy hop (NUM_PROXIES=1).
+    proxy_set_header X-Forwarded-For $remote_addr;
+    proxy_set_header X-Forwarded-Proto $scheme;
+    proxy_read_timeout 60s;
+
+    location /static/static/ {
+        alias /vol/web/static/;
+        access_log off;
+        add_header Cache-Control $static_cache_control;
+    }
+
+    location /static/media/ {
+        proxy_pass http://app;
+    }
+
+    location /protected-media/ {
+        internal;
+        alias /vol/web/media/;
+        # Cache-Control comes from Django (private to the owner).
+    }
+
+    location ~ ^/api/(recipe/recipes/[0-9]+/upload-image|batch)/$ {
+        client_max_body_size 10m;
+        client_body_buffer_size 1m;
+        proxy_pass http://app;
+    }
+
+    location ~ ^/(healthz|readyz)/?$ {
+        access_log off;
+        proxy_pass http://app;
+    }
+
+    location / {
+        proxy_pass http://app;
+    }
+}
@@ -5,5 +5,11 @@ set -e
 python manage.py wait_for_db
 python manage.py collectstatic --noinput
 python manage.py migrate
+python manage.py build_schema
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
\ No newline at end of file
+# The nginx proxy serves media files after Django checked access.
+export MEDIA_ACCEL_REDIRECT="${MEDIA_ACCEL_REDIRECT:-1}"
+
+# --lazy-apps loads the app after fork so no worker inherits a DB connection.
+# The HTTP/1.1 socket lets the nginx proxy keep connections alive.
+uwsgi --http11-socket :9000 --http-auto-chunked --workers 4 --master --enable-threads --lazy-apps --module app.wsgi
\ No newline at end of file